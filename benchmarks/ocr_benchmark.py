@@ -0,0 +1,71 @@
+"""
+Benchmarks the throughput of the OCR of images, one tesseract process per image against the pool of warm OCR workers
+with preprocessing and tiling.
+
+Requires the tesseract binary. Usage: python -m benchmarks.ocr_benchmark [--images 20] [--workers 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import pytesseract
+from PIL import Image, ImageDraw
+
+from mr_file_converter.services.ocr.ocr_service import OCRService
+
+
+def create_text_image(file_path: str, lines_count: int):
+    """
+    Creates a scan like image of 600 DPI with lines of text.
+    """
+    image = Image.new('RGB', (2400, 60 * lines_count + 100), color='white')
+    draw = ImageDraw.Draw(image)
+    for line in range(lines_count):
+        draw.text((50, 50 + 60 * line), f'Line number {line} of the benchmark text', fill='black', font_size=40)
+    image.save(file_path, dpi=(600, 600))
+
+
+def measure(image_to_text: Callable[[str], str], image_file_paths: List[str], concurrency: int) -> float:
+    """
+    Returns the throughput in images per second when the images are converted by concurrent requests.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(image_to_text, image_file_paths))
+    return len(image_file_paths) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=20, help='the amount of images to convert')
+    parser.add_argument('--lines', type=int, default=40, help='the amount of text lines in every image')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='the amount of OCR workers')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_file_paths = [os.path.join(directory, f'{number}.png') for number in range(args.images)]
+        for image_file_path in image_file_paths:
+            create_text_image(image_file_path, args.lines)
+
+        def tesseract_per_image(image_file_path: str) -> str:
+            with Image.open(image_file_path) as image:
+                return pytesseract.image_to_string(image)
+
+        ocr_service = OCRService(max_workers=args.workers)
+        try:
+            # the first request starts the workers, they are warm for the measured requests
+            ocr_service.image_to_text(image_file_paths[0])
+            for name, image_to_text in (
+                ('tesseract per image', tesseract_per_image), ('OCR workers', ocr_service.image_to_text)
+            ):
+                throughput = measure(image_to_text, image_file_paths, concurrency=args.workers)
+                print(f'{name}: {throughput:.2f} images/s')
+        finally:
+            ocr_service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
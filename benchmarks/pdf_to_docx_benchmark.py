@@ -0,0 +1,59 @@
+"""
+Benchmarks the pdf to docx conversion in a single process against the conversion in shards of pages.
+
+Usage: python -m benchmarks.pdf_to_docx_benchmark [--pages 60] [--workers 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import PyPDF2
+
+from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.pdf.pdf_service import PdfService
+
+TEST_PDF_FILE_PATH = 'tests/conversations/file/test_data/test.pdf'
+
+
+def create_multi_page_pdf(file_path: str, pages_count: int):
+    """
+    Creates a pdf file by repeating the pages of the test pdf file.
+    """
+    test_pdf_pages = PyPDF2.PdfReader(TEST_PDF_FILE_PATH).pages
+    pdf_writer = PyPDF2.PdfWriter()
+    for page_number in range(pages_count):
+        pdf_writer.add_page(test_pdf_pages[page_number % len(test_pdf_pages)])
+    with open(file_path, 'wb') as pdf_file:
+        pdf_writer.write(pdf_file)
+
+
+def measure(pdf_service: PdfService, source_file_path: str) -> float:
+    start = time.perf_counter()
+    with pdf_service.to_docx(source_file_path, custom_file_name='benchmark'):
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=60, help='the amount of pages of the synthetic pdf')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='the amount of worker processes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        synthetic_pdf_file_path = os.path.join(directory, 'synthetic.pdf')
+        create_multi_page_pdf(synthetic_pdf_file_path, args.pages)
+
+        for name, source_file_path in (
+            ('test.pdf', TEST_PDF_FILE_PATH), (f'synthetic {args.pages} pages', synthetic_pdf_file_path)
+        ):
+            single = measure(PdfService(io_service=IOService(), max_workers=1), source_file_path)
+            sharded = measure(PdfService(io_service=IOService(), max_workers=args.workers), source_file_path)
+            print(
+                f'{name}: single process {single:.2f}s, {args.workers} shards {sharded:.2f}s, '
+                f'speedup x{single / sharded:.2f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmarks rendering html into png with a browser that is started for every render (Html2Image) against the pool of
+long-lived browsers of the renderer service.
+
+Requires chrome (or CHROME_BIN). Usage: python -m benchmarks.renderer_benchmark [--renders 20] [--pool-size 2]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from html2image import Html2Image
+
+from mr_file_converter.services.renderer.renderer_service import \
+    RendererService
+
+TEST_HTML_FILE_PATH = 'tests/conversations/file/test_data/test.html'
+
+
+def measure(render: Callable[[int], None], renders_count: int, concurrency: int) -> float:
+    """
+    Returns the throughput in renders per second when rendering concurrently.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(render, range(renders_count)))
+    return renders_count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--renders', type=int, default=20, help='the amount of renders')
+    parser.add_argument('--pool-size', type=int, default=2, help='the amount of browsers in the pool')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        def render_with_new_browser(number: int):
+            Html2Image(output_path=directory).screenshot(html_file=TEST_HTML_FILE_PATH, save_as=f'{number}.png')
+
+        renderer_service = RendererService(
+            chrome_path=os.getenv('CHROME_BIN'), pool_size=args.pool_size, max_renders=100, render_timeout=30
+        )
+
+        def render_with_pool(number: int):
+            renderer_service.render_file(
+                TEST_HTML_FILE_PATH, file_path=os.path.join(directory, f'{number}.png'), output_format='png'
+            )
+
+        try:
+            for name, render in (('browser per render', render_with_new_browser), ('renderer pool', render_with_pool)):
+                throughput = measure(render, args.renders, concurrency=args.pool_size)
+                print(f'{name}: {throughput:.2f} renders/s')
+        finally:
+            renderer_service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,46 @@
+import os
+
 from dependency_injector.wiring import Provide, inject
 from telegram.ext import Updater
 
 import mr_file_converter.dispatcher as dp
 from mr_file_converter.containers import Application
+from mr_file_converter.services.event_loop.event_loop_service import \
+    EventLoopService
+from mr_file_converter.services.executor.conversion_executor import \
+    ConversionExecutor
+from mr_file_converter.services.ocr.ocr_service import OCRService
+from mr_file_converter.services.pdf.pdf_service import PdfService
+from mr_file_converter.services.renderer.renderer_service import \
+    RendererService
+from mr_file_converter.services.webhook.webhook_service import WebhookService
 
 
 @inject
 def main(
-    updater: Updater = Provide[Application.core.updater]
+    updater: Updater = Provide[Application.core.updater],
+    webhook_service: WebhookService = Provide[Application.services.webhook],
+    event_loop_service: EventLoopService = Provide[Application.services.event_loop],
+    conversion_executor: ConversionExecutor = Provide[Application.services.conversion_executor],
+    ocr_service: OCRService = Provide[Application.services.ocr],
+    renderer_service: RendererService = Provide[Application.services.renderer],
+    pdf_service: PdfService = Provide[Application.services.pdf]
 ):
     dispatcher = updater.dispatcher
     dp.setup_dispatcher(dispatcher)
-    updater.start_polling()
-    updater.idle()
+    try:
+        if os.getenv('BOT_MODE', 'polling') == 'webhook':
+            webhook_service.run()
+        else:
+            updater.start_polling()
+            updater.idle()
+    finally:
+        # the worker processes and the browsers are stopped along with the bot
+        event_loop_service.shutdown()
+        conversion_executor.shutdown()
+        ocr_service.shutdown()
+        renderer_service.shutdown()
+        pdf_service.shutdown()
 
 
 if __name__ == '__main__':
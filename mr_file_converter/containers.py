@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dependency_injector import containers, providers
 from telegram.ext import Updater
@@ -15,24 +16,67 @@ from mr_file_converter.conversations.youtube.youtube_downloader_handler import \
     YoutubeDownloaderHandlers
 from mr_file_converter.converters import (JsonConverter, XMLConverter,
                                           YamlConverter)
+from mr_file_converter.services.admission.admission_service import \
+    AdmissionService
+from mr_file_converter.services.audio.audio_service import AudioService
+from mr_file_converter.services.batch.batch_service import FileBatchService
+from mr_file_converter.services.cache.cache_service import \
+    ConversionCacheService
+from mr_file_converter.services.cache.youtube_media_cache_service import \
+    YouTubeMediaCacheService
 from mr_file_converter.services.command.command_service import CommandService
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.downloader.youtube_downloader_service import \
+    YouTubeDownloaderService
+from mr_file_converter.services.downloader.youtube_metadata_service import \
+    YouTubeMetadataService
+from mr_file_converter.services.event_loop.event_loop_service import \
+    EventLoopService
+from mr_file_converter.services.executor.conversion_executor import (
+    InlineConversionExecutor, ProcessPoolConversionExecutor)
 from mr_file_converter.services.html.html_service import HTMLService
 from mr_file_converter.services.io.io_service import IOService
 from mr_file_converter.services.json.json_service import JsonService
+from mr_file_converter.services.ocr.ocr_service import OCRService
 from mr_file_converter.services.pdf.pdf_service import PdfService
+from mr_file_converter.services.persistence.sqlite_persistence import \
+    SQLitePersistence
 from mr_file_converter.services.photo.photo_service import PhotoService
+from mr_file_converter.services.renderer.renderer_service import \
+    RendererService
+from mr_file_converter.services.telegram.file_download_service import \
+    TelegramFileDownloadService
+from mr_file_converter.services.telegram.file_id_service import \
+    TelegramFileIdService
+from mr_file_converter.services.telegram.file_upload_service import \
+    TelegramFileUploadService
 from mr_file_converter.services.telegram.telegram_service import \
     TelegramService
 from mr_file_converter.services.url.url_service import URLService
+from mr_file_converter.services.webhook.webhook_service import WebhookService
 from mr_file_converter.services.xml.xml_service import XMLService
 from mr_file_converter.services.yaml.yaml_service import YamlService
 
 
 class Core(containers.DeclarativeContainer):
 
+    persistence = providers.Selector(
+        providers.Callable(os.getenv, 'PERSISTENCE_BACKEND', 'none'),
+        sqlite=providers.Singleton(
+            SQLitePersistence,
+            database_path=os.getenv(
+                'PERSISTENCE_DATABASE_PATH', 'mr_file_converter.db'
+            )
+        ),
+        none=providers.Object(None)
+    )
+
     updater = providers.Resource(
         Updater,
         token=os.getenv('BOT_TOKEN'),
+        persistence=persistence,
+        workers=int(os.getenv('DISPATCHER_WORKERS', 4))
     )
 
 
@@ -46,8 +90,68 @@ class Services(containers.DeclarativeContainer):
     core = providers.DependenciesContainer()
     converters = providers.DependenciesContainer()
 
-    telegram = providers.Factory(TelegramService, updater=core.updater)
+    file_id = providers.Singleton(
+        TelegramFileIdService,
+        database_path=os.getenv(
+            'TELEGRAM_FILE_ID_DATABASE_PATH', 'telegram_file_ids.db'
+        )
+    )
     io = providers.Factory(IOService)
+    event_loop = providers.Singleton(
+        EventLoopService,
+        blocking_workers=int(os.getenv('BLOCKING_WORKERS', 32))
+    )
+    admission = providers.Singleton(
+        AdmissionService,
+        max_jobs=int(os.getenv('MAX_JOBS', 8)),
+        max_jobs_per_user=int(os.getenv('MAX_JOBS_PER_USER', 1)),
+        max_queue_size=int(os.getenv('MAX_QUEUED_JOBS', 100))
+    )
+    file_download = providers.Singleton(
+        TelegramFileDownloadService,
+        updater=core.updater,
+        io_service=io,
+        downloads_directory=os.getenv(
+            'TELEGRAM_DOWNLOADS_DIRECTORY',
+            os.path.join(tempfile.gettempdir(), 'mr_file_converter_downloads')
+        ),
+        # the bot api does not let bots download files larger than 20 MB
+        max_file_size_bytes=int(
+            os.getenv('TELEGRAM_MAX_DOWNLOAD_SIZE_BYTES', 20 * 1024 * 1024)
+        ),
+        max_concurrent_downloads=int(os.getenv('TELEGRAM_DOWNLOAD_WORKERS', 4)),
+        orphan_max_age_seconds=float(
+            os.getenv('TELEGRAM_DOWNLOAD_ORPHAN_MAX_AGE_SECONDS', 24 * 60 * 60)
+        )
+    )
+    file_upload = providers.Selector(
+        providers.Callable(os.getenv, 'TELEGRAM_UPLOAD_MODE', 'streaming'),
+        streaming=providers.Singleton(
+            TelegramFileUploadService,
+            updater=core.updater,
+            max_concurrent_uploads=int(os.getenv('TELEGRAM_UPLOAD_WORKERS', 4))
+        ),
+        buffered=providers.Object(None)
+    )
+    telegram = providers.Factory(
+        TelegramService,
+        updater=core.updater,
+        file_id_service=file_id,
+        download_service=file_download,
+        upload_service=file_upload
+    )
+    webhook = providers.Factory(
+        WebhookService,
+        updater=core.updater,
+        webhook_url=os.getenv('WEBHOOK_URL'),
+        listen=os.getenv('WEBHOOK_LISTEN', '0.0.0.0'),
+        port=int(os.getenv('WEBHOOK_PORT', 8443)),
+        url_path=os.getenv('WEBHOOK_URL_PATH', '/telegram'),
+        workers=int(os.getenv('WEBHOOK_WORKERS', 4)),
+        max_queue_size=int(os.getenv('WEBHOOK_MAX_QUEUE_SIZE', 100)),
+        max_connections=int(os.getenv('WEBHOOK_MAX_CONNECTIONS', 40)),
+        secret_token=os.getenv('WEBHOOK_SECRET_TOKEN')
+    )
     command = providers.Factory(
         CommandService, telegram_service=telegram, io_service=io
     )
@@ -57,7 +161,10 @@ class Services(containers.DeclarativeContainer):
         io_service=io,
         json_converter=converters.json,
         yml_converter=converters.yaml,
-        xml_converter=converters.xml
+        xml_converter=converters.xml,
+        streaming_threshold_bytes=int(
+            os.getenv('JSON_STREAMING_THRESHOLD_BYTES', JsonService.default_streaming_threshold_bytes)
+        )
     )
     yaml = providers.Factory(
         YamlService,
@@ -71,24 +178,97 @@ class Services(containers.DeclarativeContainer):
         io_service=io,
         json_converter=converters.json,
         yml_converter=converters.yaml,
-        xml_converter=converters.xml
+        xml_converter=converters.xml,
+        streaming_threshold_bytes=int(
+            os.getenv('XML_STREAMING_THRESHOLD_BYTES', XMLService.default_streaming_threshold_bytes)
+        )
+    )
+    renderer = providers.Singleton(
+        RendererService,
+        chrome_path=os.getenv('CHROME_BIN'),
+        pool_size=int(os.getenv('RENDERER_POOL_SIZE', 2)),
+        max_renders=int(os.getenv('RENDERER_MAX_RENDERS', 100)),
+        render_timeout=float(os.getenv('RENDERER_TIMEOUT_SECONDS', 30))
     )
     html = providers.Factory(
         HTMLService,
-        io_service=io
+        io_service=io,
+        renderer_service=renderer
     )
-    pdf = providers.Factory(
+    pdf = providers.Singleton(
         PdfService,
-        io_service=io
+        io_service=io,
+        max_workers=int(os.getenv('PDF_WORKERS', os.cpu_count() or 1)),
+        pages_per_chunk=int(os.getenv('PDF_TEXT_PAGES_PER_CHUNK', 25))
+    )
+    url = providers.Factory(URLService, io_service=io, renderer_service=renderer)
+    ocr = providers.Singleton(
+        OCRService,
+        max_workers=int(os.getenv('OCR_WORKERS', os.cpu_count() or 1)),
+        language=os.getenv('OCR_LANGUAGE', 'eng'),
+        target_dpi=int(os.getenv('OCR_TARGET_DPI', 300)),
+        max_tile_pixels=int(os.getenv('OCR_MAX_TILE_PIXELS', 4000 * 1000))
+    )
+    png = providers.Factory(PhotoService, io_service=io, ocr_service=ocr)
+    conversion_registry = providers.Singleton(
+        ConversionRegistry,
+        services=providers.List(json, yaml, xml, html, pdf, png)
+    )
+    cache = providers.Singleton(
+        ConversionCacheService,
+        cache_directory=os.getenv(
+            'CONVERSION_CACHE_DIRECTORY',
+            os.path.join(tempfile.gettempdir(), 'mr_file_converter_cache')
+        ),
+        max_size_bytes=int(
+            os.getenv('CONVERSION_CACHE_MAX_SIZE_BYTES', 1024 * 1024 * 1024)
+        ),
+        converter_version=os.getenv('CONVERTER_VERSION', '0.1.0')
+    )
+    conversion_executor = providers.Selector(
+        providers.Callable(os.getenv, 'CONVERSION_EXECUTOR', 'process'),
+        process=providers.Singleton(
+            ProcessPoolConversionExecutor,
+            io_service=io,
+            max_workers=int(os.getenv('CONVERSION_WORKERS', os.cpu_count() or 1)),
+            format_limits=ProcessPoolConversionExecutor.parse_format_limits(
+                os.getenv('CONVERSION_FORMAT_LIMITS', 'photo:text=1,pdf:docx=1')
+            ),
+            inline_services=os.getenv('CONVERSION_INLINE_SERVICES', 'html,pdf,png').split(',')
+        ),
+        inline=providers.Singleton(InlineConversionExecutor)
+    )
+    audio = providers.Singleton(
+        AudioService,
+        ffmpeg_path=os.getenv('FFMPEG_BIN'),
+        bitrate_kbps=int(os.getenv('AUDIO_BITRATE_KBPS', 192)),
+        max_workers=int(os.getenv('AUDIO_WORKERS', os.cpu_count() or 1))
+    )
+    youtube_metadata = providers.Singleton(
+        YouTubeMetadataService,
+        ttl_seconds=float(os.getenv('YOUTUBE_METADATA_TTL_SECONDS', 30 * 60)),
+        max_entries=int(os.getenv('YOUTUBE_METADATA_MAX_ENTRIES', 1000))
+    )
+    youtube_media_cache = providers.Singleton(YouTubeMediaCacheService, file_id_service=file_id)
+    batch = providers.Singleton(
+        FileBatchService,
+        window_seconds=float(os.getenv('FILE_BATCH_WINDOW_SECONDS', 1.5)),
+        max_batch_size=int(os.getenv('FILE_BATCH_MAX_FILES', 50))
     )
-    url = providers.Factory(URLService, io_service=io)
-    png = providers.Factory(PhotoService, io_service=io)
 
 
 class Conversations(containers.DeclarativeContainer):
     services = providers.DependenciesContainer()
     youtube_downloader = providers.Factory(
-        YoutubeDownloaderConversation, telegram_service=services.telegram
+        YoutubeDownloaderConversation,
+        telegram_service=services.telegram,
+        io_service=services.io,
+        audio_service=services.audio,
+        youtube_metadata_service=services.youtube_metadata,
+        max_file_size_bytes=int(
+            os.getenv('YOUTUBE_MAX_FILE_SIZE_BYTES', YouTubeDownloaderService.default_max_file_size_bytes)
+        ),
+        media_cache_service=services.youtube_media_cache
     )
     url = providers.Factory(
         URLConversation,
@@ -100,12 +280,11 @@ class Conversations(containers.DeclarativeContainer):
         FileConversation,
         telegram_service=services.telegram,
         io_service=services.io,
-        json_service=services.json,
-        yaml_service=services.yaml,
-        xml_service=services.xml,
-        html_service=services.html,
-        pdf_service=services.pdf,
-        photo_service=services.png
+        conversion_registry=services.conversion_registry,
+        cache_service=services.cache,
+        conversion_executor=services.conversion_executor,
+        photo_service=services.png,
+        batch_service=services.batch
     )
 
 
@@ -116,13 +295,23 @@ class Handlers(containers.DeclarativeContainer):
     youtube_downloader = providers.Factory(
         YoutubeDownloaderHandlers,
         youtube_downloader_conversation=conversations.youtube_downloader,
-        command_service=services.command
+        command_service=services.command,
+        event_loop_service=services.event_loop,
+        admission_service=services.admission
     )
     file = providers.Factory(
-        FileHandlers, file_conversation=conversations.file, command_service=services.command
+        FileHandlers,
+        file_conversation=conversations.file,
+        command_service=services.command,
+        event_loop_service=services.event_loop,
+        admission_service=services.admission
     )
     url = providers.Factory(
-        URLHandlers, url_conversation=conversations.url, command_service=services.command
+        URLHandlers,
+        url_conversation=conversations.url,
+        command_service=services.command,
+        event_loop_service=services.event_loop,
+        admission_service=services.admission
     )
 
 
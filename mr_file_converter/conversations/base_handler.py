@@ -1,12 +1,29 @@
-from telegram.ext import CommandHandler, Filters, MessageHandler
+import asyncio
+import functools
+from typing import Callable
 
+from telegram import Update
+from telegram.ext import (CallbackContext, CommandHandler, ConversationHandler,
+                          Filters, MessageHandler)
+
+from mr_file_converter.services.admission.admission_service import \
+    AdmissionService
 from mr_file_converter.services.command.command_service import CommandService
+from mr_file_converter.services.event_loop.event_loop_service import \
+    EventLoopService
 
 
 class BaseConversationHandler:
 
-    def __init__(self, command_service: CommandService):
+    def __init__(
+        self,
+        command_service: CommandService,
+        event_loop_service: EventLoopService,
+        admission_service: AdmissionService
+    ):
         self.command_service = command_service
+        self.event_loop_service = event_loop_service
+        self.admission_service = admission_service
 
     def get_fallbacks(self, regex='^exit$'):
         return [
@@ -18,3 +35,38 @@ class BaseConversationHandler:
                 "cancel", callback=self.command_service.cancel
             )
         ]
+
+    def admitted(self, callback: Callable) -> Callable:
+        """
+        Wraps a callback that does the heavy work of a conversation (downloads, conversions) so it runs only once the
+        admission service admits it, the user is told their position in the queue while it waits.
+        """
+        telegram_service = self.command_service.telegram_service
+
+        @functools.wraps(callback)
+        async def run_admitted(update: Update, context: CallbackContext):
+            async with self.admission_service.admit(
+                telegram_service.get_user_id(update),
+                on_queued=lambda position: asyncio.to_thread(
+                    telegram_service.send_message,
+                    update,
+                    text=f'The bot is busy at the moment, your request is number {position} in the queue '
+                         f'and will start shortly'
+                )
+            ):
+                return await self.event_loop_service.run_callback(callback, update, context)
+        return run_admitted
+
+    def run_on_event_loop(self, conversation_handler: ConversationHandler) -> ConversationHandler:
+        """
+        Runs all the callbacks of a conversation on the event loop rather than on the worker threads of the dispatcher.
+        """
+        for handler in [
+            *conversation_handler.entry_points,
+            *(handler for handlers in conversation_handler.states.values() for handler in handlers),
+            *conversation_handler.fallbacks
+        ]:
+            handler.callback = self.event_loop_service.callback(handler.callback)
+            # the wrapped callback returns a promise right away, so it runs on the dispatcher thread
+            handler.run_async = False
+        return conversation_handler
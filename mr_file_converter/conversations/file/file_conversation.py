@@ -1,21 +1,26 @@
+import asyncio
+import functools
 import logging
-from typing import Callable
+from typing import Any, Dict, List, Tuple
 
 from magic import from_file
-from telegram import Update
+from telegram import Message, Update
 from telegram.ext import CallbackContext, ConversationHandler
 
 from mr_file_converter.conversations.file.errors import (FileConversionError,
                                                          FileTypeNotSupported)
-from mr_file_converter.services.html.html_service import HTMLService
+from mr_file_converter.services.batch.batch_service import FileBatchService
+from mr_file_converter.services.cache.cache_service import \
+    ConversionCacheService
+from mr_file_converter.services.conversion.conversion_registry import (
+    ConversionRegistry, ConversionStep, enter_concurrently)
+from mr_file_converter.services.conversion.file_types import FileTypes
+from mr_file_converter.services.executor.conversion_executor import \
+    ConversionExecutor
 from mr_file_converter.services.io.io_service import IOService
-from mr_file_converter.services.json.json_service import JsonService
-from mr_file_converter.services.pdf.pdf_service import PdfService
 from mr_file_converter.services.photo.photo_service import PhotoService
 from mr_file_converter.services.telegram.telegram_service import \
     TelegramService
-from mr_file_converter.services.xml.xml_service import XMLService
-from mr_file_converter.services.yaml.yaml_service import YamlService
 
 logger = logging.getLogger(__name__)
 
@@ -24,63 +29,51 @@ class FileConversation:
     """
     This service is responsible to manage all the operations related to file conversions.
     """
-    class FileTypes:
-        YML = 'yml'
-        JSON = 'json'
-        XML = 'xml'
-        TEXT = 'text'
-        HTML = 'html'
-        PDF = 'pdf'
-        PNG = 'png'
-        JPG = 'jpg'
-        DOCX = 'docx'
-        PHOTO = 'photo'  # any photo file type such as photo,jpg
-
-        @classmethod
-        def equivalent_file_formats(cls) -> dict:
-            return {
-                cls.JSON: [cls.YML, cls.TEXT, cls.XML],
-                cls.YML: [cls.JSON, cls.TEXT, cls.XML],
-                cls.XML: [cls.JSON, cls.YML],
-                cls.HTML: [cls.PDF, cls.PNG, cls.JPG, cls.TEXT],
-                cls.PDF: [cls.DOCX, cls.TEXT],
-                cls.PHOTO: [cls.PDF, cls.TEXT]
-            }
+    FileTypes = FileTypes
+    done_button = 'convert'
+    # the maximum amount of files telegram sends as a single album, more files are sent as a zip file
+    max_album_size = 10
+
     (
         check_file_type_stage,
         ask_custom_file_name_stage,
         convert_file_stage,
-        convert_additional_file_answer_stage
-    ) = range(4)
+        convert_additional_file_answer_stage,
+        ask_page_range_stage
+    ) = range(5)
 
     def __init__(
         self,
         telegram_service: TelegramService,
         io_service: IOService,
-        json_service: JsonService,
-        yaml_service: YamlService,
-        xml_service: XMLService,
-        html_service: HTMLService,
-        pdf_service: PdfService,
-        photo_service: PhotoService
+        conversion_registry: ConversionRegistry,
+        cache_service: ConversionCacheService,
+        conversion_executor: ConversionExecutor,
+        photo_service: PhotoService,
+        batch_service: FileBatchService
     ):
         self.telegram_service = telegram_service
         self.io_service = io_service
-        self.json_service = json_service
-        self.yaml_service = yaml_service
-        self.xml_service = xml_service
-        self.html_service = html_service
-        self.pdf_service = pdf_service
+        self.conversion_registry = conversion_registry
+        self.cache_service = cache_service
+        self.conversion_executor = conversion_executor
         self.photo_service = photo_service
+        self.batch_service = batch_service
 
     def start_message(self, update: Update, context: CallbackContext):
         self.telegram_service.send_message(
             update=update, text='Please add here a file you would like to convert.')
         return self.check_file_type_stage
 
+    def add_to_batch(self, update: Update, context: CallbackContext):
+        self.batch_service.add(self.telegram_service.get_message(update))
+
     def get_file_type(self, update: Update, context: CallbackContext) -> str:
         file_path = self.telegram_service.get_file(update)
         context.user_data['source_file_path'] = file_path
+        return self.detect_file_type(file_path)
+
+    def detect_file_type(self, file_path: str) -> str:
         file_type = from_file(file_path, mime=True)
         print(f'{file_type=}, {file_path=}')
         logger.debug(f'The type of the file {file_path} is {file_type}')
@@ -104,96 +97,318 @@ class FileConversation:
             file_type = self.FileTypes.PHOTO
         return file_type
 
-    def check_file_type(self, update: Update, context: CallbackContext) -> int:
+    async def collect_batch(self, update: Update) -> List[Message]:
+        """
+        Waits for the rest of the files that were sent together with the file of the update.
+        """
+        return await self.batch_service.collect(self.telegram_service.get_message(update))
+
+    async def check_file_type(
+        self, update: Update, context: CallbackContext, batch: List[Message] | None = None
+    ) -> int:
+        """
+        Offers the types that the file, or the batch of files that were sent together with it, can be converted to. The
+        batch is collected first unless it is given. The files are downloaded and checked on the blocking executor of
+        the event loop.
+        """
+        context.user_data.pop('source_files', None)
+        context.user_data.pop('page_range', None)
+        if batch is None:
+            batch = await self.collect_batch(update)
+        if len(batch) > 1:
+            return await asyncio.to_thread(self.check_batch_file_types, update, context, batch)
+        return await asyncio.to_thread(self.check_single_file_type, update, context)
+
+    def check_single_file_type(self, update: Update, context: CallbackContext) -> int:
         file_type = self.get_file_type(update, context)
-        if equivalent_types := self.FileTypes.equivalent_file_formats().get(file_type):
+        if equivalent_types := self.conversion_registry.get_reachable_formats(file_type):
             context.user_data['source_file_type'] = file_type
-            self.telegram_service.reply_to_message(
-                update=update,
+            self.ask_requested_formats(
+                update,
+                context,
                 text=f'The type of the file is {file_type}, It can be converted to the following types, '
-                     f'please choose one of the types to convert into.',
-                reply_markup=self.telegram_service.get_inline_keyboard(
-                    buttons=equivalent_types
-                )
+                     f'please choose one or more of the types to convert into and press {self.done_button}.',
+                formats=equivalent_types
             )
             return self.ask_custom_file_name_stage
         raise FileTypeNotSupported(_file_type=file_type)
 
-    def ask_custom_file_name(self, update: Update, context: CallbackContext) -> int:
-        context.user_data['requested_format'] = self.telegram_service.get_message_data(
-            update
+    def check_batch_file_types(self, update: Update, context: CallbackContext, messages: List[Message]) -> int:
+        """
+        Downloads the files of a batch concurrently and offers the types that all of the files can be converted to.
+        """
+        source_files = [
+            [file_path, self.detect_file_type(file_path)] for file_path in self.telegram_service.get_files(messages)
+        ]
+        file_types = list(dict.fromkeys(file_type for _, file_type in source_files))
+        reachable_formats = [self.conversion_registry.get_reachable_formats(file_type) for file_type in file_types]
+
+        if equivalent_types := [
+            _format for _format in reachable_formats[0] if all(_format in formats for formats in reachable_formats)
+        ]:
+            context.user_data['source_files'] = source_files
+            text = f'Got {len(source_files)} files of the types {", ".join(file_types)}, they can be converted to the ' \
+                   f'following types, please choose one or more of the types to convert into and press ' \
+                   f'{self.done_button}.'
+            if file_types == [self.FileTypes.PHOTO]:
+                text += f' The photos are merged into a single {self.FileTypes.PDF} file.'
+            self.ask_requested_formats(update, context, text=text, formats=equivalent_types)
+            return self.ask_custom_file_name_stage
+
+        for file_path, _ in source_files:
+            self.telegram_service.remove_downloaded_file(file_path)
+        raise FileTypeNotSupported(_file_type=', '.join(file_types))
+
+    def ask_requested_formats(self, update: Update, context: CallbackContext, text: str, formats: List[str]):
+        context.user_data['available_formats'] = formats
+        context.user_data['requested_formats'] = []
+        self.telegram_service.reply_to_message(
+            update=update,
+            text=text,
+            reply_markup=self.telegram_service.get_multi_select_keyboard(
+                buttons=formats, selected=[], done_button=self.done_button
+            )
         )
+
+    def ask_custom_file_name(self, update: Update, context: CallbackContext) -> int:
+        """
+        Toggles the chosen format, and asks for the file name once the user is done choosing the formats.
+        """
+        requested_formats = context.user_data['requested_formats']
+        chosen_button = self.telegram_service.get_message_data(update)
+
+        if chosen_button != self.done_button:
+            if chosen_button in requested_formats:
+                requested_formats.remove(chosen_button)
+            else:
+                requested_formats.append(chosen_button)
+            self.telegram_service.edit_message_reply_markup(
+                update,
+                reply_markup=self.telegram_service.get_multi_select_keyboard(
+                    buttons=context.user_data['available_formats'],
+                    selected=requested_formats,
+                    done_button=self.done_button
+                )
+            )
+            return self.ask_custom_file_name_stage
+
+        if not requested_formats:
+            self.telegram_service.send_message(update=update, text='Please choose at least one type to convert into')
+            return self.ask_custom_file_name_stage
+
+        if (
+            context.user_data.get('source_file_type') == self.FileTypes.PDF and
+            self.FileTypes.DOCX in requested_formats and
+            not context.user_data.get('source_files')
+        ):
+            self.telegram_service.send_message(
+                update=update,
+                text=f'Please enter the pages to convert into {self.FileTypes.DOCX}, such as 2-5, or "all" for all the '
+                     f'pages'
+            )
+            return self.ask_page_range_stage
+
+        return self.ask_file_name(update)
+
+    def ask_file_name(self, update: Update) -> int:
         self.telegram_service.send_message(
             update=update,
             text='Please enter the file name you want for the converted file'
         )
         return self.convert_file_stage
 
+    @staticmethod
+    def parse_page_range(text: str) -> Tuple[int, int] | None:
+        """
+        Parses pages as the user counts them, such as 2-5 or a single page, into the range [start_page, end_page) of the
+        pages, or returns None if the text is not a range of pages.
+        """
+        first_page, separator, last_page = text.partition('-')
+        if not separator:
+            last_page = first_page
+        if not (first_page.strip().isdecimal() and last_page.strip().isdecimal()):
+            return None
+        if not 1 <= int(first_page) <= int(last_page):
+            return None
+        return int(first_page) - 1, int(last_page)
+
+    def ask_page_range(self, update: Update, context: CallbackContext) -> int:
+        """
+        Keeps the pages of the pdf to convert into docx, and asks for the file name.
+        """
+        answer = self.telegram_service.get_message_data(update).strip()
+        if answer.lower() != 'all':
+            if not (page_range := self.parse_page_range(answer)):
+                self.telegram_service.send_message(
+                    update=update, text='Please enter pages such as 2-5, a single page such as 3, or "all"'
+                )
+                return self.ask_page_range_stage
+            context.user_data['page_range'] = page_range
+        return self.ask_file_name(update)
+
     def convert_file(
         self,
         update: Update,
         context: CallbackContext,
         should_delete_source_file: bool = True
     ):
-        _requested_format = context.user_data.get('requested_format')
+        requested_formats = context.user_data.get('requested_formats')
+        source_files = context.user_data.get('source_files')
         source_file_type = context.user_data.get('source_file_type')
         source_file_path = context.user_data.get('source_file_path')
+        page_range = context.user_data.get('page_range')
         custom_file_name = self.telegram_service.get_message_data(update)
 
+        if source_files:
+            source_file_type = ', '.join(dict.fromkeys(file_type for _, file_type in source_files))
+            source_file_paths = [file_path for file_path, _ in source_files]
+        else:
+            source_file_paths = [source_file_path]
+
         try:
-            with self.get_service(
-                source_file_type, _requested_format
-            )(source_file_path, custom_file_name) as destination_file_path:
-                self.telegram_service.send_file(
-                    update,
-                    document_path=destination_file_path,
-                    file_name=f'{custom_file_name}.{_requested_format}'
+            if source_files:
+                self.convert_batch(update, source_files, requested_formats, custom_file_name)
+            elif len(requested_formats) == 1:
+                self.convert_into_format(
+                    update, source_file_type, source_file_path, requested_formats[0], custom_file_name, page_range
+                )
+            else:
+                self.convert_into_formats(
+                    update, source_file_type, source_file_path, requested_formats, custom_file_name, page_range
                 )
-                return self.ask_convert_additional_file(update)
+            return self.ask_convert_additional_file(update)
         except Exception as e:
             raise FileConversionError(
                 source_format=source_file_type,
-                target_format=_requested_format,
+                target_format=', '.join(requested_formats),
                 original_exception=e
             )
         finally:
             if should_delete_source_file:
-                self.io_service.remove_file(source_file_path)
-
-    def get_service(self, source_file_type: str, _requested_format: str) -> Callable:
-
-        format_to_service_func = {
-            self.FileTypes.YML: {
-                self.FileTypes.JSON: self.yaml_service.to_json,
-                self.FileTypes.TEXT: self.yaml_service.to_text,
-                self.FileTypes.XML: self.yaml_service.to_xml
-            },
-            self.FileTypes.JSON: {
-                self.FileTypes.YML: self.json_service.to_yml,
-                self.FileTypes.TEXT: self.json_service.to_text,
-                self.FileTypes.XML: self.json_service.to_xml
-            },
-            self.FileTypes.XML: {
-                self.FileTypes.YML: self.xml_service.to_yml,
-                self.FileTypes.JSON: self.xml_service.to_json
-            },
-            self.FileTypes.HTML: {
-                self.FileTypes.PDF: self.html_service.to_pdf,
-                self.FileTypes.PNG: self.html_service.to_png,
-                self.FileTypes.JPG: self.html_service.to_jpg,
-                self.FileTypes.TEXT: self.html_service.to_text
-            },
-            self.FileTypes.PDF: {
-                self.FileTypes.DOCX: self.pdf_service.to_docx,
-                self.FileTypes.TEXT: self.pdf_service.to_txt
-            },
-            self.FileTypes.PHOTO: {
-                self.FileTypes.PDF: self.photo_service.to_pdf,
-                self.FileTypes.TEXT: self.photo_service.to_text
-            }
-        }
-
-        return format_to_service_func[source_file_type][_requested_format]
+                for file_path in source_file_paths:
+                    self.telegram_service.remove_downloaded_file(file_path)
+
+    def plan(
+        self, source_file_type: str, requested_format: str, page_range: Tuple[int, int] | None = None
+    ) -> List[ConversionStep]:
+        """
+        Plans the conversion into the requested format, a pdf is converted into docx only for the pages of the page
+        range, if one is given.
+        """
+        steps = self.conversion_registry.plan(source_file_type, requested_format)
+        if not page_range:
+            return steps
+        return [
+            step.with_kwargs(page_range=tuple(page_range))
+            if (step.source_format, step.target_format) == (self.FileTypes.PDF, self.FileTypes.DOCX) else step
+            for step in steps
+        ]
+
+    @staticmethod
+    def get_conversion_options(steps: List[ConversionStep]) -> Dict[str, Any]:
+        """
+        Returns the keyword arguments of all the conversions of a plan, which are part of the key of its cached result.
+        """
+        return {name: value for step in steps for name, value in step.kwargs.items()}
+
+    def convert_into_format(
+        self,
+        update: Update,
+        source_file_type: str,
+        source_file_path: str,
+        requested_format: str,
+        custom_file_name: str,
+        page_range: Tuple[int, int] | None = None
+    ):
+        steps = self.plan(source_file_type, requested_format, page_range)
+        with self.cache_service.cached(
+            source_file_path,
+            requested_format=requested_format,
+            convert=lambda: self.conversion_executor.execute(steps, source_file_path, custom_file_name),
+            options=self.get_conversion_options(steps)
+        ) as destination_file_path:
+            self.telegram_service.send_file(
+                update,
+                document_path=destination_file_path,
+                file_name=f'{custom_file_name}.{requested_format}'
+            )
+
+    def convert_into_formats(
+        self,
+        update: Update,
+        source_file_type: str,
+        source_file_path: str,
+        requested_formats: List[str],
+        custom_file_name: str,
+        page_range: Tuple[int, int] | None = None
+    ):
+        """
+        Converts the file into all the requested formats at once (the file is parsed only once) and sends all the
+        converted files together, as an album or as a zip file.
+        """
+        plans = {_format: self.plan(source_file_type, _format, page_range) for _format in requested_formats}
+        with self.cache_service.cached_many(
+            source_file_path,
+            requested_formats=requested_formats,
+            convert=lambda missing_formats: self.conversion_executor.execute_many(
+                {_format: plans[_format] for _format in missing_formats},
+                source_file_path,
+                custom_file_name
+            ),
+            options={_format: self.get_conversion_options(steps) for _format, steps in plans.items()}
+        ) as destination_file_paths:
+            self.send_converted_files(
+                update,
+                files={
+                    f'{custom_file_name}.{_format}': destination_file_path
+                    for _format, destination_file_path in destination_file_paths.items()
+                },
+                custom_file_name=custom_file_name
+            )
+
+    def convert_batch(
+        self, update: Update, source_files: List[List[str]], requested_formats: List[str], custom_file_name: str
+    ):
+        """
+        Converts every file of a batch into the requested formats concurrently through the conversion executor, and
+        sends all the converted files together. A batch of photos is merged into a single pdf file.
+        """
+        merge_photos = all(file_type == self.FileTypes.PHOTO for _, file_type in source_files)
+        conversions = {}
+        for requested_format in requested_formats:
+            if merge_photos and requested_format == self.FileTypes.PDF:
+                conversions[f'{custom_file_name}.{requested_format}'] = self.photo_service.merge_to_pdf(
+                    [file_path for file_path, _ in source_files], custom_file_name
+                )
+                continue
+            for number, (source_file_path, source_file_type) in enumerate(source_files, start=1):
+                file_name = f'{custom_file_name}_{number}'
+                conversions[f'{file_name}.{requested_format}'] = self.cache_service.cached(
+                    source_file_path,
+                    requested_format=requested_format,
+                    convert=functools.partial(
+                        self.conversion_executor.execute,
+                        self.conversion_registry.plan(source_file_type, requested_format),
+                        source_file_path,
+                        file_name
+                    )
+                )
+
+        with enter_concurrently(conversions) as files:
+            self.send_converted_files(update, files=files, custom_file_name=custom_file_name)
+
+    def send_converted_files(self, update: Update, files: Dict[str, str], custom_file_name: str):
+        """
+        Sends the converted files ({file name: path}) together, as an album or as a zip file.
+        """
+        if len(files) == 1:
+            [(file_name, file_path)] = files.items()
+            self.telegram_service.send_file(update, document_path=file_path, file_name=file_name)
+        elif len(files) <= self.max_album_size:
+            self.telegram_service.send_files(update, files=files)
+        else:
+            with self.io_service.create_zip_file(f'{custom_file_name}.zip', files=files) as zip_file:
+                self.telegram_service.send_file(update, document_path=zip_file, file_name=f'{custom_file_name}.zip')
 
     def ask_convert_additional_file(self, update: Update) -> int:
         self.telegram_service.send_message(
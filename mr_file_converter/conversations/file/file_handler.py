@@ -1,28 +1,58 @@
-from telegram.ext import (CallbackQueryHandler, CommandHandler,
-                          ConversationHandler, Filters, MessageHandler)
+import functools
+
+from telegram import Update
+from telegram.ext import (CallbackContext, CallbackQueryHandler,
+                          CommandHandler, ConversationHandler, Filters,
+                          MessageHandler)
 
 from mr_file_converter.conversations.base_handler import \
     BaseConversationHandler
 from mr_file_converter.conversations.file.file_conversation import \
     FileConversation
+from mr_file_converter.services.admission.admission_service import \
+    AdmissionService
 from mr_file_converter.services.command.command_service import CommandService
+from mr_file_converter.services.event_loop.event_loop_service import \
+    EventLoopService
 
 
 class FileHandlers(BaseConversationHandler):
 
-    def __init__(self, file_conversation: FileConversation, command_service: CommandService):
-        super().__init__(command_service)
+    def __init__(
+        self,
+        file_conversation: FileConversation,
+        command_service: CommandService,
+        event_loop_service: EventLoopService,
+        admission_service: AdmissionService
+    ):
+        super().__init__(command_service, event_loop_service, admission_service)
         self.file_conversation = file_conversation
 
-    def conversation_handlers(self) -> ConversationHandler:
-        return ConversationHandler(
+    def batch_handler(self) -> MessageHandler:
+        """
+        Collects every file that is sent to the bot into the batch of its chat, before the conversation handles it.
+        """
+        return MessageHandler(Filters.document | Filters.photo, self.file_conversation.add_to_batch)
+
+    async def check_file_type(self, update: Update, context: CallbackContext) -> int:
+        """
+        Collects the batch of the file before the check is admitted, so no job slot is held while waiting for the rest
+        of the files of the batch.
+        """
+        batch = await self.file_conversation.collect_batch(update)
+        return await self.admitted(
+            functools.partial(self.file_conversation.check_file_type, batch=batch)
+        )(update, context)
+
+    def conversation_handlers(self, persistent: bool = False) -> ConversationHandler:
+        return self.run_on_event_loop(ConversationHandler(
             entry_points=[
                 CommandHandler('file', self.file_conversation.start_message)
             ],
             states={
                 self.file_conversation.check_file_type_stage: [
                     MessageHandler(
-                        Filters.document | Filters.photo, self.file_conversation.check_file_type
+                        Filters.document | Filters.photo, self.check_file_type
                     )
                 ],
                 self.file_conversation.ask_custom_file_name_stage: [
@@ -30,9 +60,14 @@ class FileHandlers(BaseConversationHandler):
                         callback=self.file_conversation.ask_custom_file_name
                     )
                 ],
+                self.file_conversation.ask_page_range_stage: [
+                    MessageHandler(
+                        Filters.text, self.file_conversation.ask_page_range
+                    )
+                ],
                 self.file_conversation.convert_file_stage: [
                     MessageHandler(
-                        Filters.text, self.file_conversation.convert_file
+                        Filters.text, self.admitted(self.file_conversation.convert_file)
                     )
                 ],
                 self.file_conversation.convert_additional_file_answer_stage: [
@@ -42,6 +77,7 @@ class FileHandlers(BaseConversationHandler):
                 ]
             },
             fallbacks=self.get_fallbacks(),
-            run_async=True,
-            allow_reentry=True
-        )
+            allow_reentry=True,
+            name='file',
+            persistent=persistent
+        ))
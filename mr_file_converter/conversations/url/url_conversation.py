@@ -62,6 +62,7 @@ class URLConversation:
 
         url = self.telegram_service.get_message_data(update)
         try:
+            self.url_service.validate_url(url)
             self.urlopen(url, context=ignore_ssl())
         except Exception as e:
             raise InvalidURL(
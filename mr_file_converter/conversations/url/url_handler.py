@@ -5,17 +5,27 @@ from mr_file_converter.conversations.base_handler import \
     BaseConversationHandler
 from mr_file_converter.conversations.url.url_conversation import \
     URLConversation
+from mr_file_converter.services.admission.admission_service import \
+    AdmissionService
 from mr_file_converter.services.command.command_service import CommandService
+from mr_file_converter.services.event_loop.event_loop_service import \
+    EventLoopService
 
 
 class URLHandlers(BaseConversationHandler):
 
-    def __init__(self, url_conversation: URLConversation, command_service: CommandService):
-        super().__init__(command_service)
+    def __init__(
+        self,
+        url_conversation: URLConversation,
+        command_service: CommandService,
+        event_loop_service: EventLoopService,
+        admission_service: AdmissionService
+    ):
+        super().__init__(command_service, event_loop_service, admission_service)
         self.url_conversation = url_conversation
 
-    def conversation_handlers(self) -> ConversationHandler:
-        return ConversationHandler(
+    def conversation_handlers(self, persistent: bool = False) -> ConversationHandler:
+        return self.run_on_event_loop(ConversationHandler(
             entry_points=[
                 CommandHandler('url', self.url_conversation.start_message)
             ],
@@ -32,7 +42,7 @@ class URLHandlers(BaseConversationHandler):
                 ],
                 self.url_conversation.convert_url_stage: [
                     MessageHandler(
-                        Filters.text, self.url_conversation.convert_url
+                        Filters.text, self.admitted(self.url_conversation.convert_url)
                     )
                 ],
                 self.url_conversation.convert_additional_url_stage: [
@@ -42,6 +52,7 @@ class URLHandlers(BaseConversationHandler):
                 ]
             },
             fallbacks=self.get_fallbacks(),
-            run_async=True,
-            allow_reentry=True
-        )
+            allow_reentry=True,
+            name='url',
+            persistent=persistent
+        ))
@@ -1,14 +1,20 @@
+import functools
 import logging
 
-from pytube import YouTube
-from telegram import Update
-from telegram.ext import CallbackContext
+from telegram import Message, Update
+from telegram.ext import CallbackContext, ConversationHandler
 
+from mr_file_converter.services.audio.audio_service import AudioService
+from mr_file_converter.services.cache.youtube_media_cache_service import \
+    YouTubeMediaCacheService
 from mr_file_converter.services.downloader.errors import (
-    InvalidYouTubeURL, YouTubeVideoDownloadError)
+    InvalidYouTubeURL, YouTubeVideoDownloadError, YouTubeVideoTooLarge)
 from mr_file_converter.services.downloader.youtube_downloader_service import (
     YouTubeAudioDownloaderService, YouTubeDownloaderService,
     YouTubeVideoDownloaderService)
+from mr_file_converter.services.downloader.youtube_metadata_service import \
+    YouTubeMetadataService
+from mr_file_converter.services.io.io_service import IOService
 from mr_file_converter.services.telegram.telegram_service import \
     TelegramService
 
@@ -19,8 +25,21 @@ class YoutubeDownloaderConversation:
 
     check_youtube_url_stage, download_stage = range(2)
 
-    def __init__(self, telegram_service: TelegramService):
+    def __init__(
+        self,
+        telegram_service: TelegramService,
+        io_service: IOService,
+        audio_service: AudioService,
+        youtube_metadata_service: YouTubeMetadataService,
+        max_file_size_bytes: int = YouTubeDownloaderService.default_max_file_size_bytes,
+        media_cache_service: YouTubeMediaCacheService | None = None
+    ):
         self.telegram_service = telegram_service
+        self.io_service = io_service
+        self.audio_service = audio_service
+        self.youtube_metadata_service = youtube_metadata_service
+        self.max_file_size_bytes = max_file_size_bytes
+        self.media_cache_service = media_cache_service
         self.youtube_audio_downloader_cls = YouTubeAudioDownloaderService
         self.youtube_video_downloader_cls = YouTubeVideoDownloaderService
 
@@ -32,15 +51,14 @@ class YoutubeDownloaderConversation:
 
     def check_youtube_url(self, update: Update, context: CallbackContext):
         url = self.telegram_service.get_message_data(update)
-        try:
-            context.user_data['youtube'] = YouTube(url)
-            return self.choose_audio_or_video(update)
-        except Exception as e:
+        # validated locally, the metadata of the video is fetched only once the format is chosen
+        if not (video_id := self.youtube_metadata_service.parse_video_id(url)):
             raise InvalidYouTubeURL(
                 next_stage=self.check_youtube_url_stage,
-                url=url,
-                original_exception=e
+                url=url
             )
+        context.user_data['youtube_video_id'] = video_id
+        return self.choose_audio_or_video(update)
 
     def choose_audio_or_video(self, update: Update):
         self.telegram_service.send_message(
@@ -59,25 +77,49 @@ class YoutubeDownloaderConversation:
         )
 
         try:
-            with self.youtube_downloader_factory(context, _format) as youtube_downloader:
-                return youtube_downloader.send(update)
+            youtube_downloader = self.youtube_downloader_factory(context, _format)
+            self.telegram_service.edit_message(
+                update,
+                text=f'Please hang on while I am bring to you the video in {_format} format '
+                     f'({youtube_downloader.quality}, {youtube_downloader.file_size / (1024 * 1024):.1f} MB)...🤔'
+            )
+            if not self.media_cache_service:
+                with youtube_downloader:
+                    return youtube_downloader.send(update)
+
+            self.media_cache_service.send(
+                self.media_cache_service.get_key(
+                    context.user_data.get('youtube_video_id'), _format, youtube_downloader.quality
+                ),
+                send_file_id=functools.partial(youtube_downloader.send_file_id, update),
+                download_and_send=functools.partial(self.download_and_send, youtube_downloader, update)
+            )
+            return ConversationHandler.END
+        except YouTubeVideoTooLarge:
+            raise
         except Exception as e:
             raise YouTubeVideoDownloadError(
-                url=context.user_data.get('youtube').watch_url,
+                url=self.youtube_metadata_service.get_watch_url(context.user_data.get('youtube_video_id')),
                 _format=_format,
                 original_exception=e
             )
 
-    def youtube_downloader_factory(self, context: CallbackContext, _type: str) -> YouTubeDownloaderService:
+    @staticmethod
+    def download_and_send(youtube_downloader: YouTubeDownloaderService, update: Update) -> Message:
+        with youtube_downloader:
+            return youtube_downloader.upload(update)
 
-        youtube: YouTube = context.user_data.get('youtube')
+    def youtube_downloader_factory(self, context: CallbackContext, _type: str) -> YouTubeDownloaderService:
 
         if _type not in ('mp3', 'mp4'):
             raise ValueError(f'type {_type} must be mp3/mp4 only.')
 
-        type_to_class = {
-            'mp3': self.youtube_audio_downloader_cls,
-            'mp4': self.youtube_video_downloader_cls
-        }
+        youtube = self.youtube_metadata_service.get(context.user_data.get('youtube_video_id'))
 
-        return type_to_class[_type](youtube, self.telegram_service)
+        if _type == 'mp3':
+            return self.youtube_audio_downloader_cls(
+                youtube, self.telegram_service, self.io_service, self.audio_service, self.max_file_size_bytes
+            )
+        return self.youtube_video_downloader_cls(
+            youtube, self.telegram_service, self.io_service, self.max_file_size_bytes
+        )
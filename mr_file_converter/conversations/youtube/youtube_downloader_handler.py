@@ -5,7 +5,11 @@ from mr_file_converter.conversations.base_handler import \
     BaseConversationHandler
 from mr_file_converter.conversations.youtube.youtube_downloader_conversation import \
     YoutubeDownloaderConversation
+from mr_file_converter.services.admission.admission_service import \
+    AdmissionService
 from mr_file_converter.services.command.command_service import CommandService
+from mr_file_converter.services.event_loop.event_loop_service import \
+    EventLoopService
 
 
 class YoutubeDownloaderHandlers(BaseConversationHandler):
@@ -13,13 +17,15 @@ class YoutubeDownloaderHandlers(BaseConversationHandler):
     def __init__(
         self,
         youtube_downloader_conversation: YoutubeDownloaderConversation,
-        command_service: CommandService
+        command_service: CommandService,
+        event_loop_service: EventLoopService,
+        admission_service: AdmissionService
     ):
-        super().__init__(command_service)
+        super().__init__(command_service, event_loop_service, admission_service)
         self.youtube_downloader_conversation = youtube_downloader_conversation
 
-    def conversation_handlers(self) -> ConversationHandler:
-        return ConversationHandler(
+    def conversation_handlers(self, persistent: bool = False) -> ConversationHandler:
+        return self.run_on_event_loop(ConversationHandler(
             entry_points=[
                 CommandHandler(
                     'youtube',
@@ -34,10 +40,11 @@ class YoutubeDownloaderHandlers(BaseConversationHandler):
                 ],
                 self.youtube_downloader_conversation.download_stage: [
                     CallbackQueryHandler(
-                        callback=self.youtube_downloader_conversation.download_video)
+                        callback=self.admitted(self.youtube_downloader_conversation.download_video))
                 ]
             },
             fallbacks=self.get_fallbacks(),
-            run_async=True,
-            allow_reentry=True
-        )
+            allow_reentry=True,
+            name='youtube',
+            persistent=persistent
+        ))
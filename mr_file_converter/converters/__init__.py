@@ -1,5 +1,6 @@
 from mr_file_converter.converters.json.ujson import \
     UJsonConverter as JsonConverter
+from mr_file_converter.converters.parsed_document import ParsedDocument
 from mr_file_converter.converters.xml.xml_converter import XMLConverter
 from mr_file_converter.converters.yaml.ruamel import \
     RueamelYamlConverter as YamlConverter
@@ -1,9 +1,40 @@
+import io
 from abc import ABC, abstractmethod
-from typing import Any
+from functools import reduce
+from typing import IO, Any, Sequence
+
+
+def wrap_with_keys(data: Any, keys: Sequence[str]) -> Any:
+    """
+    Nests the data under the given keys, e.g. wrap_with_keys(data, ['a', 'b']) returns {'a': {'b': data}}.
+    """
+    return reduce(lambda value, key: {key: value}, reversed(keys), data)
 
 
 class BaseConverter(ABC):
 
+    @abstractmethod
+    def load(self, stream: IO[bytes]) -> Any:
+        """
+        Parses the (utf-8 encoded) content of a binary stream.
+        """
+        pass
+
+    @abstractmethod
+    def dump(self, data: Any, stream: IO[bytes]):
+        """
+        Writes the data into a binary stream, utf-8 encoded.
+        """
+        pass
+
+    def load_bytes(self, data: bytes) -> Any:
+        return self.load(io.BytesIO(data))
+
+    def dump_bytes(self, data: Any) -> bytes:
+        stream = io.BytesIO()
+        self.dump(data, stream)
+        return stream.getvalue()
+
     @abstractmethod
     def read(self, file_path: str):
         pass
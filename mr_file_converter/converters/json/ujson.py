@@ -1,15 +1,104 @@
+import json
 import logging
-from typing import Any
+from typing import IO, Any, Iterable, Iterator, Sequence, Tuple
 
 import ujson  # type: ignore
 
-from mr_file_converter.converters.base_converter import BaseConverter
+from mr_file_converter.converters.base_converter import (BaseConverter,
+                                                         wrap_with_keys)
 
 logger = logging.getLogger(__name__)
 
 
+class JsonItemsReader:
+    """
+    Parses the items of a top level JSON array, or the members of a top level JSON object, one at a time.
+
+    Only a single item is kept in memory, so the memory that is needed is bounded by the biggest item of the document
+    and not by the size of the whole document.
+    """
+
+    delimiters = ',:]} \t\r\n'
+
+    def __init__(self, file: IO[str], chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def read_more(self) -> bool:
+        # reads at least as much as is already buffered, so parsing a huge item does not become quadratic
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer) - self.position))
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def next_char(self) -> str:
+        """
+        Returns the next character that is not a whitespace without consuming it, or an empty string at the end of the
+        file.
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer) or not self.read_more():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, chars: str) -> str:
+        if (char := self.next_char()) not in chars or not char:
+            raise ValueError(f'expected one of {chars!r} but got {char!r}')
+        self.position += 1
+        return char
+
+    def next_value(self) -> Any:
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # a number is complete only once a delimiter follows it, otherwise it might continue in the next chunk
+                if self.eof or end < len(self.buffer) and self.buffer[end] in self.delimiters:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.read_more()
+
+    def container_type(self) -> str:
+        """
+        Returns '[' for a top level array, '{' for a top level object and an empty string for anything else.
+        """
+        char = self.next_char()
+        return char if char in ('[', '{') else ''
+
+    def items(self) -> Iterator[Tuple[str | None, Any]]:
+        """
+        Yields (None, item) for every item of a top level array, or (key, value) for every member of a top level
+        object.
+        """
+        is_object = self.expect('[{') == '{'
+        closing_char = '}' if is_object else ']'
+
+        if self.next_char() == closing_char:
+            return
+        while True:
+            key = None
+            if is_object:
+                if not isinstance(key := self.next_value(), str):
+                    raise ValueError(f'expected an object key but got {key!r}')
+                self.expect(':')
+            yield key, self.next_value()
+            if self.expect(f',{closing_char}') == closing_char:
+                return
+
+
 class UJsonConverter(BaseConverter):
 
+    stream_chunk_size = 64 * 1024
+
     def __init__(self):
         self.json = ujson
 
@@ -19,21 +108,78 @@ class UJsonConverter(BaseConverter):
     def dumps(self, obj: object) -> str:
         return self.json.dumps(obj)
 
+    def load(self, stream: IO[bytes]) -> Any:
+        return self.json.loads(stream.read())
+
+    def dump(self, data: Any, stream: IO[bytes], indent: int = 4):
+        stream.write(self.json.dumps(data, indent=indent).encode())
+
     def read(self, file_path: str):
         try:
-            with open(file_path) as file:
-                return self.json.load(file)
+            with open(file_path, 'rb') as file:
+                return self.load(file)
         except ValueError as e:
             logger.error(f'Failed to load JSON file {file_path}, error: {e}'
                          )
             raise e
 
+    def get_container_type(self, file_path: str) -> str:
+        with open(file_path) as file:
+            return JsonItemsReader(file, self.stream_chunk_size).container_type()
+
+    def iter_items(self, file_path: str) -> Iterator[Tuple[str | None, Any]]:
+        """
+        Reads a JSON file whose top level is an array or an object incrementally.
+
+        Yields (None, item) for every item of an array, or (key, value) for every member of an object.
+        """
+        try:
+            with open(file_path) as file:
+                yield from JsonItemsReader(file, self.stream_chunk_size).items()
+        except ValueError as e:
+            logger.error(f'Failed to stream JSON file {file_path}, error: {e}')
+            raise e
+
     def write(self, data: Any, file_path: str, indent: int = 4):
         try:
-            with open(file_path, 'w') as file:
-                self.json.dump(data, file, indent=indent)
+            with open(file_path, 'wb') as file:
+                self.dump(data, file, indent=indent)
         except ValueError as e:
             logger.error(
                 f'Failed to write {data} into JSON file {file_path}, error: {e}'
             )
             raise e
+
+    def write_items(
+        self,
+        items: Iterable[Tuple[str | None, Any]],
+        is_mapping: bool,
+        file_path: str,
+        keys: Sequence[str] = (),
+        indent: int = 4
+    ):
+        """
+        Writes an array, or an object, one item at a time. The array/object is nested under the given keys.
+        """
+        # the keys are dumped around a placeholder, which is then replaced by the items
+        placeholder = '"__items__"'
+        head, _, tail = self.json.dumps(
+            wrap_with_keys(self.json.loads(placeholder), keys), indent=indent
+        ).rpartition(placeholder)
+        item_indent = ' ' * indent * (len(keys) + 1)
+        try:
+            with open(file_path, 'w') as file:
+                file.write(f"{head}{'{' if is_mapping else '['}")
+                is_empty = True
+                for key, value in items:
+                    item = self.json.dumps(value, indent=indent).replace('\n', f'\n{item_indent}')
+                    if is_mapping:
+                        item = f'{self.json.dumps(key)}: {item}'
+                    file.write(f"{'' if is_empty else ','}\n{item_indent}{item}")
+                    is_empty = False
+                if not is_empty:
+                    file.write(f'\n{item_indent[indent:]}')
+                file.write(f"{'}' if is_mapping else ']'}{tail}")
+        except ValueError as e:
+            logger.error(f'Failed to write items into JSON file {file_path}, error: {e}')
+            raise e
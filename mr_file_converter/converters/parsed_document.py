@@ -0,0 +1,27 @@
+import threading
+from typing import Any, Callable
+
+
+class ParsedDocument:
+    """
+    A structured (json/yml/xml) file that is parsed at most once, no matter how many conversions use it.
+
+    The file is parsed on the first access to its data, so conversions that stream the source file instead of loading
+    it never parse it at all.
+    """
+
+    def __init__(self, source_file_path: str, source_format: str, parse: Callable[[str], Any]):
+        self.source_file_path = source_file_path
+        self.source_format = source_format
+        self._parse = parse
+        self._lock = threading.Lock()
+        self._is_parsed = False
+        self._data: Any = None
+
+    @property
+    def data(self) -> Any:
+        with self._lock:
+            if not self._is_parsed:
+                self._data = self._parse(self.source_file_path)
+                self._is_parsed = True
+            return self._data
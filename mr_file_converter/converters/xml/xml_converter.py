@@ -1,5 +1,6 @@
 import logging
-from typing import Any
+from typing import IO, Any, Iterable, Iterator, Tuple
+from xml.etree import ElementTree
 
 import xmltodict
 from dict2xml import dict2xml
@@ -11,23 +12,114 @@ logger = logging.getLogger(__name__)
 
 class XMLConverter(BaseConverter):
 
+    header = '<?xml version="1.0" encoding="UTF-8" ?>'
+
+    def load(self, stream: IO[bytes]) -> Any:
+        return xmltodict.parse(stream)
+
+    def dump(self, data: Any, stream: IO[bytes]):
+        stream.write(f"{self.header}\n{dict2xml(data, wrap='root')}".encode())
+
     def read(self, file_path: str):
         try:
-            with open(file_path, 'r') as xml_file:
-                xml_input = xml_file.read().strip().replace('\n', '').replace('\r', '')
-                return xmltodict.parse(xml_input=xml_input)
+            with open(file_path, 'rb') as xml_file:
+                return self.load(xml_file)
         except Exception as e:
             logger.error(f'failed to read XML file {file_path}, error:\n{e}'
                          )
             raise e
 
+    @staticmethod
+    def get_record_tags(file_path: str) -> Tuple[str, str] | None:
+        """
+        Returns the tags of the root element and of its child elements if the XML is a feed of repeated records.
+
+        A feed of records is a root element without attributes or text whose child elements, at least two of them,
+        all have the same tag. XML files with namespaces are never considered as feeds, as their prefixes are not kept
+        by ElementTree.
+        """
+        root, last_record, depth, records_count = None, None, 0, 0
+        for event, element in ElementTree.iterparse(file_path, events=('start', 'end', 'start-ns')):
+            if event == 'start-ns':
+                return None
+            if event == 'end':
+                depth -= 1
+                if depth == 1:
+                    records_count += 1
+                continue
+
+            depth += 1
+            if depth == 1:
+                if element.attrib:
+                    return None
+                root = element
+            elif depth == 2:
+                text = root.text if last_record is None else last_record.tail  # type: ignore
+                if (text and text.strip()) or (last_record is not None and element.tag != last_record.tag):
+                    return None
+                if last_record is not None:
+                    root.remove(last_record)  # type: ignore
+                last_record = element
+
+        text = root.text if last_record is None else last_record.tail  # type: ignore
+        if records_count < 2 or (text and text.strip()):
+            return None
+        return root.tag, last_record.tag  # type: ignore
+
+    @staticmethod
+    def iter_records(file_path: str) -> Iterator[Any]:
+        """
+        Parses the child elements of the root element one at a time, every record is parsed exactly as read() would
+        parse it.
+        """
+        root, depth = None, 0
+        for event, element in ElementTree.iterparse(file_path, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if depth == 1:
+                    root = element
+                continue
+
+            depth -= 1
+            if depth == 1:
+                element.tail = None
+                yield xmltodict.parse(ElementTree.tostring(element))[element.tag]
+                root.remove(element)  # type: ignore
+
     def write(self, data: Any, file_path: str):
         try:
-            with open(file_path, 'w') as file:
-                xml = '<?xml version="1.0" encoding="UTF-8" ?>'
-                file.write(f"{xml}\n{dict2xml(data, wrap='root')}")
+            with open(file_path, 'wb') as file:
+                self.dump(data, file)
         except Exception as e:
             logger.error(
                 f'failed to parse {file_path} to XML file, error:\n{e}'
             )
             raise e
+
+    def write_items(self, items: Iterable[Tuple[str | None, Any]], is_mapping: bool, file_path: str):
+        """
+        Writes the items of a top level sequence, or the members of a top level mapping, one at a time.
+
+        The result is the same XML that write() creates for the whole sequence/mapping: every item of a sequence gets a
+        root element of its own, and the members of a mapping are indented inside a single root element.
+        """
+        try:
+            with open(file_path, 'w') as file:
+                file.write(self.header)
+                is_empty = True
+                for key, value in items:
+                    if is_mapping:
+                        if is_empty:
+                            file.write('\n<root>')
+                        xml = '\n'.join(f'  {line}' if line else line for line in dict2xml({key: value}).split('\n'))
+                        file.write(f'\n{xml}')
+                    else:
+                        file.write(f"\n{dict2xml([value], wrap='root')}")
+                    is_empty = False
+                if is_empty:
+                    file.write('\n<root></root>')
+                elif is_mapping:
+                    file.write('\n</root>')
+        except Exception as e:
+            logger.error(f'failed to write items into XML file {file_path}, error:\n{e}')
+            raise e
@@ -1,11 +1,13 @@
 import io
 import logging
+import threading
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Iterable, Sequence, Tuple
 
 from ruamel.yaml import YAML
 
-from mr_file_converter.converters.base_converter import BaseConverter
+from mr_file_converter.converters.base_converter import (BaseConverter,
+                                                         wrap_with_keys)
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +15,15 @@ logger = logging.getLogger(__name__)
 class RueamelYamlConverter(BaseConverter):
 
     def __init__(self):
-        self.yml = YAML()
+        self._local = threading.local()
+
+    @property
+    def yml(self) -> YAML:
+        # a YAML instance keeps the state of the document it loads/dumps, so every thread (e.g. the conversions of a
+        # batch) gets an instance of its own
+        if not hasattr(self._local, 'yml'):
+            self._local.yml = YAML()
+        return self._local.yml
 
     def loads(self, data: str) -> object:
         return self.yml.load(data)
@@ -23,6 +33,12 @@ class RueamelYamlConverter(BaseConverter):
         self.yml.dump(obj, buf)
         return buf.getvalue()
 
+    def load(self, stream: IO[bytes]) -> Any:
+        return self.yml.load(stream)
+
+    def dump(self, data: Any, stream: IO[bytes]):
+        self.yml.dump(data, stream)
+
     def read(self, file_path: str):
         try:
             return self.yml.load(Path(file_path))
@@ -32,10 +48,34 @@ class RueamelYamlConverter(BaseConverter):
 
     def write(self, data: Any, file_path: str):
         try:
-            with open(file_path, 'w') as file:
-                self.yml.dump(data, file)
+            with open(file_path, 'wb') as file:
+                self.dump(data, file)
         except ValueError as e:
             logger.error(
                 f'Failed to write {data} into YAML file {file_path}, error: {e}'
             )
             raise e
+
+    def write_items(
+        self, items: Iterable[Tuple[str | None, Any]], is_mapping: bool, file_path: str, keys: Sequence[str] = ()
+    ):
+        """
+        Writes a top level sequence, or a top level mapping, one item at a time.
+
+        Every item is dumped as a sequence/mapping of its own, which results in the same document as dumping all the
+        items at once, but without holding all of them in memory. The sequence/mapping is nested under the given keys.
+        """
+        header = self.dumps(wrap_with_keys(None, keys)) if keys else ''
+        try:
+            with open(file_path, 'w') as file:
+                is_empty = True
+                for key, value in items:
+                    # the item is dumped under its keys, so it is indented and folded as in the whole document
+                    item = self.dumps(wrap_with_keys({key: value} if is_mapping else [value], keys))
+                    file.write(item if is_empty else item.split('\n', header.count('\n'))[-1])
+                    is_empty = False
+                if is_empty:
+                    self.yml.dump(wrap_with_keys({} if is_mapping else [], keys), file)
+        except ValueError as e:
+            logger.error(f'Failed to write items into YAML file {file_path}, error: {e}')
+            raise e
@@ -29,9 +29,15 @@ def setup_dispatcher(
     dispatcher.add_handler(CommandHandler(
         command='help', callback=command_service.help)
     )
-    dispatcher.add_handler(youtube_downloader_handlers.conversation_handlers())
-    dispatcher.add_handler(file_handlers.conversation_handlers())
-    dispatcher.add_handler(url_handlers.conversation_handlers())
+    persistent = dispatcher.persistence is not None
+    dispatcher.add_handler(
+        youtube_downloader_handlers.conversation_handlers(persistent)
+    )
+    # the files of an album arrive while the conversation still handles the first one, so they are collected in a
+    # group of their own, which handles every update before the conversations do.
+    dispatcher.add_handler(file_handlers.batch_handler(), group=-1)
+    dispatcher.add_handler(file_handlers.conversation_handlers(persistent))
+    dispatcher.add_handler(url_handlers.conversation_handlers(persistent))
     dispatcher.add_error_handler(
         callback=command_service.error_handler, run_async=True
     )
@@ -0,0 +1,113 @@
+import asyncio
+import inspect
+import logging
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Awaitable, Callable, Deque, Tuple
+
+from mr_file_converter.services.admission.errors import QueueFull
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionService:
+    """
+    Admits the jobs of the users (downloads and conversions) to run, up to max_jobs jobs at once and up to
+    max_jobs_per_user jobs of the same user at once.
+
+    Jobs that cannot run yet wait in a queue by the order they arrived in, the position of a job in the queue is
+    reported once it starts waiting. A waiting job is skipped over while its user runs as many jobs as they may, so a
+    heavy user cannot hold back the jobs of everyone else. Jobs wait as coroutines on the event loop, so they hold no
+    threads while they wait, and the service is used only from the event loop.
+    """
+
+    def __init__(self, max_jobs: int, max_jobs_per_user: int, max_queue_size: int):
+        self.max_jobs = max_jobs
+        self.max_jobs_per_user = max_jobs_per_user
+        self.max_queue_size = max_queue_size
+        self._running_jobs = 0
+        self._running_user_jobs: Counter = Counter()
+        self._waiting_jobs: Deque[Tuple[int, asyncio.Future]] = deque()
+
+    @property
+    def waiting_jobs_count(self) -> int:
+        return len(self._waiting_jobs)
+
+    def can_run(self, user_id: int) -> bool:
+        return self._running_jobs < self.max_jobs and self._running_user_jobs[user_id] < self.max_jobs_per_user
+
+    def start(self, user_id: int):
+        self._running_jobs += 1
+        self._running_user_jobs[user_id] += 1
+
+    def finish(self, user_id: int):
+        self._running_jobs -= 1
+        self._running_user_jobs[user_id] -= 1
+        if not self._running_user_jobs[user_id]:
+            del self._running_user_jobs[user_id]
+        self.admit_waiting_jobs()
+
+    def admit_waiting_jobs(self):
+        for waiting_job in list(self._waiting_jobs):
+            user_id, admitted = waiting_job
+            if admitted.cancelled():
+                # the job was cancelled while waiting, it leaves the queue once its coroutine resumes
+                continue
+            if self.can_run(user_id):
+                self._waiting_jobs.remove(waiting_job)
+                self.start(user_id)
+                admitted.set_result(None)
+
+    @staticmethod
+    async def notify_queued(on_queued: Callable[[int], Awaitable | None], position: int):
+        """
+        Reports the position of a job in the queue. The report is only a status message, so if it fails the job keeps
+        waiting rather than being aborted.
+        """
+        try:
+            if inspect.isawaitable(on_queued_result := on_queued(position)):
+                await on_queued_result
+        except Exception as e:
+            logger.error(f'could not report the position {position} of a job in the queue. Error: {e}')
+
+    @asynccontextmanager
+    async def admit(
+        self, user_id: int, on_queued: Callable[[int], Awaitable | None] | None = None
+    ) -> AsyncGenerator[None, None]:
+        """
+        Waits until a job of the user may run, and runs it for as long as the context is entered.
+
+        Args:
+            user_id: the id of the user the job belongs to.
+            on_queued: called with the position of the job in the queue, if the job cannot run right away. Its errors
+                are logged and do not abort the job.
+
+        Raises:
+            QueueFull: if the job cannot run right away and the queue is full.
+        """
+        # the waiting jobs that could run were admitted once a job finished, so a job that can run overtakes no one
+        if self.can_run(user_id):
+            self.start(user_id)
+        else:
+            if len(self._waiting_jobs) >= self.max_queue_size:
+                raise QueueFull()
+            admitted = asyncio.get_running_loop().create_future()
+            self._waiting_jobs.append(waiting_job := (user_id, admitted))
+            position = len(self._waiting_jobs)
+            logger.debug(f'the job of the user {user_id} waits in the queue in position {position}')
+            try:
+                if on_queued:
+                    await self.notify_queued(on_queued, position)
+                await admitted
+            except BaseException:
+                if admitted.done() and not admitted.cancelled():
+                    # the job was admitted, but it is cancelled before it got to run
+                    self.finish(user_id)
+                elif waiting_job in self._waiting_jobs:
+                    self._waiting_jobs.remove(waiting_job)
+                raise
+
+        try:
+            yield
+        finally:
+            self.finish(user_id)
@@ -0,0 +1,19 @@
+from mr_file_converter.base_error import FileConverterException
+
+
+class QueueFull(FileConverterException):
+    """
+    Raised when a job cannot even wait for its turn, as the queue of waiting jobs is full.
+    """
+
+    def __init__(
+        self,
+        next_stage: int | None = None,
+        original_exception: Exception | None = None
+    ):
+        super().__init__(
+            original_exception=original_exception,
+            next_stage=next_stage,
+            error_message='The bot is too busy at the moment, please try again in a few minutes',
+            should_reply_to_message_id=True
+        )
@@ -0,0 +1,105 @@
+import logging
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class TranscodeError(Exception):
+    """
+    Raised when ffmpeg fails to transcode an audio.
+    """
+
+
+class AudioService:
+    """
+    Transcodes audio into mp3 files of a constant bitrate with ffmpeg.
+
+    Audio is transcoded as a stream: the chunks of the source are piped into ffmpeg as they arrive (e.g. while they are
+    downloaded) and the chunks of the mp3 are yielded as soon as ffmpeg encodes them, so the source is never stored as
+    a whole. Up to max_workers audios are transcoded at once, each by an ffmpeg process of its own that is fed by a
+    worker thread.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, ffmpeg_path: str | None, bitrate_kbps: int, max_workers: int):
+        self.ffmpeg_path = ffmpeg_path
+        self.bitrate_kbps = bitrate_kbps
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._feeders = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ffmpeg')
+
+    def get_ffmpeg_path(self) -> str:
+        if not self.ffmpeg_path:
+            self.ffmpeg_path = shutil.which('ffmpeg')
+            if not self.ffmpeg_path:
+                raise TranscodeError('could not find ffmpeg, please set FFMPEG_BIN')
+        return self.ffmpeg_path
+
+    @staticmethod
+    def feed(process: subprocess.Popen, chunks: Iterable[bytes]):
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)  # type: ignore
+                # ffmpeg gets every chunk as soon as it arrives, rather than once the buffer of the pipe is full
+                process.stdin.flush()  # type: ignore
+        except BrokenPipeError:
+            # ffmpeg exited before it read the whole source, its exit code tells why
+            logger.debug('ffmpeg stopped reading its input')
+        finally:
+            try:
+                process.stdin.close()  # type: ignore
+            except BrokenPipeError:
+                pass
+
+    def to_mp3(self, chunks: Iterable[bytes]) -> Generator[bytes, None, None]:
+        """
+        Transcodes an audio (or the audio track of a video) in any format that ffmpeg reads into an mp3.
+
+        Args:
+            chunks: the content of the source.
+
+        Yields:
+            the content of the mp3, chunk by chunk.
+
+        Raises:
+            TranscodeError: if ffmpeg fails, the error of the chunks of the source is raised as is.
+        """
+        with self._slots, tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                [
+                    self.get_ffmpeg_path(),
+                    '-hide_banner',
+                    '-loglevel', 'error',
+                    '-i', 'pipe:0',
+                    '-vn',
+                    '-codec:a', 'libmp3lame',
+                    '-b:a', f'{self.bitrate_kbps}k',
+                    '-f', 'mp3',
+                    'pipe:1'
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=stderr
+            )
+            feeder = self._feeders.submit(self.feed, process, chunks)
+            try:
+                while chunk := process.stdout.read1(self.chunk_size):  # type: ignore
+                    yield chunk
+                # the source may have failed, in which case ffmpeg transcoded only a part of it
+                feeder.result()
+                if return_code := process.wait():
+                    stderr.seek(0)
+                    raise TranscodeError(
+                        f'ffmpeg failed with exit code {return_code}: {stderr.read().decode(errors="replace").strip()}'
+                    )
+            finally:
+                if process.poll() is None:
+                    # the mp3 is not read to its end, e.g. as its upload failed
+                    process.kill()
+                process.wait()
+                process.stdout.close()  # type: ignore
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from telegram import Message
+
+
+class FileBatchService:
+    """
+    Collects the files a user sends together, such as an album (media group) or several documents in a row, so they
+    can be converted as a single batch.
+
+    Telegram delivers every file of an album as a message of its own, so the files of a chat are collected as they
+    arrive and a batch is over once no file arrived for window_seconds, or once it has max_batch_size files. A window of
+    0 disables the batches.
+    """
+
+    # a batch that nobody collected (e.g. files that were sent outside of a conversation) is dropped after its window and
+    # this grace period
+    stale_batch_seconds = 60.0
+
+    def __init__(self, window_seconds: float, max_batch_size: int):
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        # chat id -> (the time the last file arrived, the messages of the files)
+        self._batches: Dict[int, Tuple[float, List[Message]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, message: Message):
+        """
+        Adds the file of a message to the batch of its chat, a file that arrives after the window of the previous file
+        starts a new batch. Files that arrive once the batch is full are not part of any batch.
+        """
+        if self.window_seconds <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self.drop_stale_batches(now)
+            last_added, messages = self._batches.get(message.chat_id, (0.0, []))
+            if now - last_added > self.window_seconds:
+                messages = []
+            if len(messages) < self.max_batch_size:
+                messages.append(message)
+                self._batches[message.chat_id] = (now, messages)
+
+    def drop_stale_batches(self, now: float):
+        for chat_id, (last_added, _) in list(self._batches.items()):
+            if now - last_added > self.window_seconds + self.stale_batch_seconds:
+                del self._batches[chat_id]
+
+    async def collect(self, message: Message) -> List[Message]:
+        """
+        Waits until the batch of the message is over and returns the messages of the batch, starting from the given
+        message which is the first message of the batch.
+        """
+        if self.window_seconds <= 0:
+            return [message]
+
+        while True:
+            with self._lock:
+                last_added, messages = self._batches.get(message.chat_id, (0.0, []))
+                remaining = last_added + self.window_seconds - time.monotonic()
+                if remaining <= 0 or len(messages) >= self.max_batch_size:
+                    self._batches.pop(message.chat_id, None)
+                    break
+            await asyncio.sleep(remaining)
+
+        return [
+            batch_message for batch_message in messages if batch_message.message_id >= message.message_id
+        ] or [message]
@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import (Any, Callable, ContextManager, Dict, Generator, Iterable,
+                    List)
+
+from mr_file_converter.services.io.io_service import IOService
+
+logger = logging.getLogger(__name__)
+
+
+class ConversionCacheService:
+    """
+    This service caches conversion results on the local disk.
+
+    Every result is keyed by the SHA-256 of the source file content, the requested format, the options of the
+    conversion (such as a page range) and the converter version, the least recently used results are evicted once the
+    cache grows over its size limit.
+    """
+
+    def __init__(self, cache_directory: str, max_size_bytes: int, converter_version: str):
+        self.cache_directory = cache_directory
+        self.max_size_bytes = max_size_bytes
+        self.converter_version = converter_version
+        self._lock = threading.Lock()
+        # results that are being sent right now must not be evicted
+        self._in_use: Counter = Counter()
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size_bytes > 0
+
+    def get_key(
+        self,
+        source_file_path: str,
+        requested_format: str,
+        options: Dict[str, Any] | None = None,
+        source_hash: str | None = None
+    ) -> str:
+        """
+        Returns the cache key of a conversion, the source file is hashed unless its hash is given.
+        """
+        if options:
+            requested_format += '[' + ','.join(f'{name}={value}' for name, value in sorted(options.items())) + ']'
+        source_hash = source_hash or IOService.hash_file(source_file_path)
+        return hashlib.sha256(f'{self.converter_version}:{requested_format}:{source_hash}'.encode()).hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.cache_directory, key)
+
+    def get(self, key: str) -> str | None:
+        """
+        Returns the path of the cached result, or None if there is no such result.
+        """
+        path = self.get_path(key)
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+            # the modification time is used as the last access time of the LRU eviction
+            os.utime(path)
+            return path
+
+    def put(self, key: str, file_path: str):
+        if os.path.getsize(file_path) > self.max_size_bytes:
+            logger.debug(f'{file_path} is bigger than the cache size limit, not caching it')
+            return
+
+        path = self.get_path(key)
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            shutil.copyfile(file_path, temp_path)
+            with self._lock:
+                os.replace(temp_path, path)
+                self._evict()
+        finally:
+            # a copy that failed halfway is not left behind in the cache directory
+            IOService.remove_file(temp_path)
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.cache_directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            if self._in_use[os.path.basename(path)]:
+                continue
+            logger.debug(f'evicting {path} from the conversion cache')
+            os.remove(path)
+            total_size -= size
+
+    @contextmanager
+    def in_use(self, keys: Iterable[str]) -> Generator[None, None, None]:
+        """
+        Protects the cached results of the keys from being evicted while they are used.
+        """
+        keys = list(keys)
+        with self._lock:
+            self._in_use.update(keys)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use.subtract(keys)
+                for key in keys:
+                    if not self._in_use[key]:
+                        del self._in_use[key]
+
+    @contextmanager
+    def cached(
+        self,
+        source_file_path: str,
+        requested_format: str,
+        convert: Callable[[], ContextManager[str]],
+        options: Dict[str, Any] | None = None
+    ) -> Generator[str, None, None]:
+        """
+        Yields the cached result of the conversion if there is one, otherwise runs the conversion and caches its result.
+        """
+        if not self.enabled:
+            with convert() as destination_file_path:
+                yield destination_file_path
+            return
+
+        key = self.get_key(source_file_path, requested_format, options)
+        with self.in_use([key]):
+            if cached_file_path := self.get(key):
+                logger.debug(f'conversion of {source_file_path} to {requested_format} was found in the cache')
+                yield cached_file_path
+                return
+
+            with convert() as destination_file_path:
+                try:
+                    self.put(key, destination_file_path)
+                except OSError as e:
+                    logger.error(f'failed to cache {destination_file_path}, error: {e}')
+                yield destination_file_path
+
+    @contextmanager
+    def cached_many(
+        self,
+        source_file_path: str,
+        requested_formats: List[str],
+        convert: Callable[[List[str]], ContextManager[Dict[str, str]]],
+        options: Dict[str, Dict[str, Any]] | None = None
+    ) -> Generator[Dict[str, str], None, None]:
+        """
+        Yields the results of the conversions of a source into several formats, only the formats that are not cached
+        are converted (all together) and cached. The options of the conversions are given per format.
+        """
+        if not self.enabled:
+            with convert(requested_formats) as destination_file_paths:
+                yield destination_file_paths
+            return
+
+        options = options or {}
+        # the source is hashed once for all the formats
+        source_hash = IOService.hash_file(source_file_path)
+        keys = {
+            _format: self.get_key(source_file_path, _format, options.get(_format), source_hash=source_hash)
+            for _format in requested_formats
+        }
+        with self.in_use(keys.values()):
+            cached_file_paths = {
+                _format: cached_file_path for _format, key in keys.items() if (cached_file_path := self.get(key))
+            }
+            missing_formats = [_format for _format in requested_formats if _format not in cached_file_paths]
+            if not missing_formats:
+                logger.debug(f'conversions of {source_file_path} to {requested_formats} were found in the cache')
+                yield cached_file_paths
+                return
+
+            with convert(missing_formats) as destination_file_paths:
+                for _format, destination_file_path in destination_file_paths.items():
+                    try:
+                        self.put(keys[_format], destination_file_path)
+                    except OSError as e:
+                        logger.error(f'failed to cache {destination_file_path}, error: {e}')
+                yield {
+                    _format: cached_file_paths.get(_format) or destination_file_paths[_format]
+                    for _format in requested_formats
+                }
@@ -0,0 +1,83 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+from telegram import Message
+from telegram.error import BadRequest
+
+from mr_file_converter.services.telegram.file_id_service import \
+    TelegramFileIdService
+
+logger = logging.getLogger(__name__)
+
+
+class YouTubeMediaCacheService:
+    """
+    This service deduplicates the downloads of YouTube media.
+
+    Every media that was sent is keyed by its video id, format and quality, and only the file_id that telegram returned
+    for it is kept, so the same media is sent again by its file_id without downloading or uploading it. Concurrent
+    requests for the same media coalesce onto a single download: the first request downloads and sends the media, and
+    the rest wait for its file_id.
+    """
+
+    def __init__(self, file_id_service: TelegramFileIdService):
+        self.file_id_service = file_id_service
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    @staticmethod
+    def get_key(video_id: str, _format: str, quality: str) -> str:
+        return f'youtube:{video_id}:{_format}:{quality}'
+
+    @staticmethod
+    def get_file_id(message: Message | None) -> str | None:
+        if message and (attachment := message.effective_attachment):
+            return attachment.file_id  # type: ignore
+        return None
+
+    def send(
+        self, key: str, send_file_id: Callable[[str], Message], download_and_send: Callable[[], Message]
+    ) -> Message:
+        """
+        Sends the media of the key by the file_id of an earlier upload, and downloads and sends it only if it was never
+        sent.
+
+        Args:
+            key: the key of the media.
+            send_file_id: sends the media by a file_id.
+            download_and_send: downloads the media and sends it.
+        """
+        if file_id := self.file_id_service.get(key):
+            try:
+                return send_file_id(file_id)
+            except BadRequest as e:
+                logger.warning(f'could not send {key} by file_id {file_id}, downloading it again. Error: {e}')
+                self.file_id_service.delete(key)
+
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            is_downloading = in_flight is None
+            if is_downloading:
+                in_flight = self._in_flight[key] = Future()
+
+        if not is_downloading:
+            logger.debug(f'waiting for the download of {key} that is in flight')
+            # the error of the download is raised to the requests that wait for it as well
+            if file_id := in_flight.result():  # type: ignore
+                return send_file_id(file_id)
+            return download_and_send()
+
+        try:
+            message = download_and_send()
+            if file_id := self.get_file_id(message):
+                self.file_id_service.set(key, file_id)
+            in_flight.set_result(file_id)  # type: ignore
+            return message
+        except BaseException as e:
+            in_flight.set_exception(e)  # type: ignore
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
@@ -39,8 +39,11 @@ class CommandService:
         )
 
     def cancel(self, update: Update, context: CallbackContext, next_stage: int = ConversationHandler.END) -> int:
+        source_file_paths = [file_path for file_path, _ in context.user_data.get('source_files') or []]
         if source_file_path := context.user_data.get('source_file_path'):
-            self.io_service.remove_file(source_file_path)
+            source_file_paths.append(source_file_path)
+        for file_path in source_file_paths:
+            self.telegram_service.remove_downloaded_file(file_path)
         if next_stage == ConversationHandler.END:
             self.help(update, context)
         context.user_data.clear()
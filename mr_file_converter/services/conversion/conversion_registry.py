@@ -0,0 +1,187 @@
+import heapq
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import (Any, ContextManager, Dict, Generator, Iterable, List,
+                    Mapping, Sequence, Tuple, TypeVar, Union)
+
+from mr_file_converter.converters import ParsedDocument
+from mr_file_converter.services.conversion.errors import ConversionNotSupported
+
+logger = logging.getLogger(__name__)
+
+Key = TypeVar('Key')
+Value = TypeVar('Value')
+# a conversion method given as (service, method name), or as (service, method name, keyword arguments of the method)
+Conversion = Union[Tuple[Any, str], Tuple[Any, str, Dict[str, Any]]]
+
+
+class ConversionStep:
+    """
+    A single conversion (edge) of the conversion graph, such as json -> yml with JsonService.to_yml, optionally with
+    keyword arguments of the conversion method, such as the page range of PdfService.to_docx.
+    """
+
+    def __init__(
+        self,
+        source_format: str,
+        target_format: str,
+        service: Any,
+        method_name: str,
+        cost: float,
+        kwargs: Dict[str, Any] | None = None
+    ):
+        self.source_format = source_format
+        self.target_format = target_format
+        self.service = service
+        self.method_name = method_name
+        self.cost = cost
+        self.kwargs = kwargs or {}
+
+    def with_kwargs(self, **kwargs) -> 'ConversionStep':
+        """
+        Returns a copy of the step that calls the conversion method with the keyword arguments.
+        """
+        return ConversionStep(
+            self.source_format,
+            self.target_format,
+            service=self.service,
+            method_name=self.method_name,
+            cost=self.cost,
+            kwargs={**self.kwargs, **kwargs}
+        )
+
+    def __repr__(self) -> str:
+        return f'{self.source_format}->{self.target_format} ({type(self.service).__name__}.{self.method_name})'
+
+
+@contextmanager
+def chain_conversions(
+    conversions: Sequence[Conversion],
+    source_file_path: str | ParsedDocument,
+    custom_file_name: str
+) -> Generator[str, None, None]:
+    """
+    Runs conversion methods, given as (service, method name) pairs or as (service, method name, keyword arguments)
+    triples, one after the other. Every conversion converts the
+    result of the previous one.
+
+    All the structured formats are parsed into the same data, so a conversion of a structured service (one that can
+    parse its files into a ParsedDocument) that is followed by another one is not written to a file at all: the source
+    is parsed once and the parsed document is handed to the next conversion. The result of every other intermediate
+    conversion is removed as soon as the next conversion is done with it.
+    """
+    previous_conversion = ExitStack()
+    try:
+        source = source_file_path
+        for (service, method_name, *kwargs), next_conversion in zip(conversions, [*conversions[1:], None]):
+            if hasattr(service, 'parse') and next_conversion and hasattr(next_conversion[0], 'parse'):
+                if not isinstance(source, ParsedDocument):
+                    source = service.parse(source)
+                continue
+            conversion = ExitStack()
+            source = conversion.enter_context(
+                getattr(service, method_name)(source, custom_file_name, **(kwargs[0] if kwargs else {}))
+            )
+            previous_conversion.close()
+            previous_conversion = conversion
+        yield source  # type: ignore
+    finally:
+        previous_conversion.close()
+
+
+@contextmanager
+def enter_concurrently(
+    context_managers: Mapping[Key, ContextManager[Value]]
+) -> Generator[Dict[Key, Value], None, None]:
+    """
+    Enters context managers, such as conversions, in parallel threads and yields the value of every context manager.
+    """
+    with ExitStack() as entered_context_managers:
+        with ThreadPoolExecutor(max_workers=len(context_managers) or 1) as executor:
+            futures = {
+                key: executor.submit(context_manager.__enter__) for key, context_manager in context_managers.items()
+            }
+        # every context manager that was entered is exited, even if another context manager failed
+        for key, future in futures.items():
+            if not future.exception():
+                entered_context_managers.push(context_managers[key].__exit__)
+        yield {key: future.result() for key, future in futures.items()}
+
+
+@contextmanager
+def fan_out_conversions(
+    conversions: Dict[str, Sequence[Conversion]],
+    source_file_path: str,
+    custom_file_name: str
+) -> Generator[Dict[str, str], None, None]:
+    """
+    Converts a source into several formats at once, every format by its own chain of conversions.
+
+    A structured source is parsed only once and its parsed document is shared by all the chains, which run in
+    parallel threads. Yields the converted file of every format.
+    """
+    first_service = next(iter(conversions.values()))[0][0]
+    # all the chains start from the same format, and therefore from conversions of the same service
+    source = first_service.parse(source_file_path) if hasattr(first_service, 'parse') else source_file_path
+    chains = {
+        _format: chain_conversions(format_conversions, source, custom_file_name)
+        for _format, format_conversions in conversions.items()
+    }
+
+    with enter_concurrently(chains) as converted_files:
+        yield converted_files
+
+
+class ConversionRegistry:
+    """
+    The graph of all the conversions the services support.
+
+    Every service registers its conversions (edges) with an estimated cost, and a conversion between two formats that
+    no service supports directly is planned as the cheapest chain of conversions, such as xml -> json -> text.
+    """
+
+    def __init__(self, services: Iterable[Any] = ()):
+        self._steps: Dict[str, List[ConversionStep]] = {}
+        for service in services:
+            service.register_conversions(self)
+
+    def register(self, source_format: str, target_format: str, service: Any, method_name: str, cost: float):
+        self._steps.setdefault(source_format, []).append(
+            ConversionStep(source_format, target_format, service=service, method_name=method_name, cost=cost)
+        )
+
+    def get_cheapest_plans(self, source_format: str) -> Dict[str, List[ConversionStep]]:
+        """
+        Returns the cheapest chain of conversions from the source format to every format it can be converted to,
+        ordered from the cheapest to the most expensive (dijkstra).
+        """
+        plans: Dict[str, List[ConversionStep]] = {}
+        # the counter keeps formats of the same cost in the order they were registered
+        counter = itertools.count()
+        queue: List[Any] = [(0, next(counter), source_format, [])]
+
+        while queue:
+            _, _, _format, plan = heapq.heappop(queue)
+            if _format in plans:
+                continue
+            plans[_format] = plan
+            for step in self._steps.get(_format, []):
+                if step.target_format not in plans:
+                    heapq.heappush(
+                        queue,
+                        (sum(s.cost for s in plan) + step.cost, next(counter), step.target_format, [*plan, step])
+                    )
+
+        plans.pop(source_format)
+        return plans
+
+    def get_reachable_formats(self, source_format: str) -> List[str]:
+        return list(self.get_cheapest_plans(source_format))
+
+    def plan(self, source_format: str, target_format: str) -> List[ConversionStep]:
+        if not (plan := self.get_cheapest_plans(source_format).get(target_format)):
+            raise ConversionNotSupported(source_format=source_format, target_format=target_format)
+        logger.debug(f'planned the conversion from {source_format} to {target_format} as {plan}')
+        return plan
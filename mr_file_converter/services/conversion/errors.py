@@ -0,0 +1,17 @@
+from mr_file_converter.base_error import FileConverterException
+
+
+class ConversionNotSupported(FileConverterException):
+
+    def __init__(
+        self,
+        source_format: str,
+        target_format: str,
+        next_stage: int | None = None,
+        original_exception: Exception | None = None
+    ):
+        super().__init__(
+            original_exception=original_exception,
+            next_stage=next_stage,
+            error_message=f'file of type {source_format} cannot be converted to {target_format}'
+        )
@@ -0,0 +1,11 @@
+class FileTypes:
+    YML = 'yml'
+    JSON = 'json'
+    XML = 'xml'
+    TEXT = 'text'
+    HTML = 'html'
+    PDF = 'pdf'
+    PNG = 'png'
+    JPG = 'jpg'
+    DOCX = 'docx'
+    PHOTO = 'photo'  # any photo file type such as photo,jpg
@@ -37,3 +37,23 @@ class YouTubeVideoDownloadError(FileConverterException):
             next_stage=next_stage,
             error_message=f'Failed to download YouTube video {url} as {_format}',
         )
+
+
+class YouTubeVideoTooLarge(FileConverterException):
+    """
+    Raised when every stream of a YouTube video is larger than the size that can be sent.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_file_size_bytes: int,
+        next_stage: int | None = None,
+        original_exception: Exception | None = None
+    ):
+        super().__init__(
+            original_exception=original_exception,
+            next_stage=next_stage,
+            error_message=f'YouTube video {url} is larger than {max_file_size_bytes // (1024 * 1024)} MB '
+                          f'in every quality, so it cannot be sent',
+        )
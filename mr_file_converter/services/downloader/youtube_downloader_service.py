@@ -1,10 +1,17 @@
 import logging
 import os
+import threading
+from contextlib import ExitStack
+from typing import Iterable, List
 
-from pytube import YouTube
-from telegram import Update
+from pytube import Stream, YouTube, request
+from telegram import Message, Update
 from telegram.ext import ConversationHandler
 
+from mr_file_converter.services.audio.audio_service import AudioService
+from mr_file_converter.services.downloader.errors import YouTubeVideoTooLarge
+from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.io.spool_file import SpoolFile
 from mr_file_converter.services.telegram.telegram_service import \
     TelegramService
 
@@ -12,85 +19,267 @@ logger = logging.getLogger(__name__)
 
 
 class YouTubeDownloaderService:
+    """
+    Downloads a YouTube stream into a temp directory of its own and deletes it once it has been used. Must be used as
+    a context manager.
+
+    When the telegram service can stream files, the stream is downloaded into a spool file in the background and sent
+    to telegram while it is still being downloaded, so the download and the upload overlap. Otherwise, the stream is
+    downloaded as a whole before it is sent.
+
+    The stream is the best one whose size fits max_file_size_bytes, by the sizes in the metadata of the streams, so a
+    stream that cannot be sent is never downloaded.
+    """
+
+    download_timeout_seconds = 60
+    # the bot api does not let bots send files larger than 50 MB
+    default_max_file_size_bytes = 50 * 1024 * 1024
 
-    def __init__(self, youtube: YouTube, telegram_service: TelegramService):
+    def __init__(
+        self,
+        youtube: YouTube,
+        telegram_service: TelegramService,
+        io_service: IOService,
+        max_file_size_bytes: int = default_max_file_size_bytes
+    ):
         self._youtube = youtube
         self._telegram_service = telegram_service
+        self._io_service = io_service
+        self.max_file_size_bytes = max_file_size_bytes
+        self._stream: Stream | None = None
         self._path = None
+        self._directory = None
+        self._spool_file: SpoolFile | None = None
+        self._download_thread: threading.Thread | None = None
+        self._exit_stack = ExitStack()
 
     @property
     def path(self):
         return self._path
 
-    def __enter__(self):
+    def get_streams(self) -> List[Stream]:
+        """
+        Returns the streams that can be downloaded, the best one first.
+        """
         pass
 
-    def send(self, update: Update) -> int:
+    def get_quality(self, stream: Stream) -> str:
         pass
 
-    def download(self):
-        pass
+    def get_file_size(self, stream: Stream) -> int:
+        """
+        Returns the size of the file that is sent for the stream.
+        """
+        # the size is in the metadata of the stream, or else it is requested without downloading the stream
+        return stream.filesize
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if os.path.exists(self._path):
-            os.remove(self._path)
+    def select_stream(self) -> Stream:
+        if not self._stream:
+            if not (streams := self.get_streams()):
+                raise ValueError(f'there are no streams to download for {self._youtube.watch_url}')
+            for stream in streams:
+                if self.get_file_size(stream) <= self.max_file_size_bytes:
+                    self._stream = stream
+                    break
+            else:
+                raise YouTubeVideoTooLarge(url=self._youtube.watch_url, max_file_size_bytes=self.max_file_size_bytes)
+            logger.debug(f'selected the stream {self._stream}')
+        return self._stream
 
+    @property
+    def quality(self) -> str:
+        return self.get_quality(self.select_stream())
 
-class YouTubeVideoDownloaderService(YouTubeDownloaderService):
-    """
-    Downloads a YouTube video and deletes it once it has been used. Must be used as a context manager.
-    """
+    @property
+    def file_size(self) -> int:
+        return self.get_file_size(self.select_stream())
+
+    def get_file_name(self, file_name: str) -> str:
+        return file_name
+
+    def send_file(self, update: Update, file_path: str, reply_to_message_id: int) -> Message:
+        pass
+
+    def stream_file(self, update: Update, spool_file: SpoolFile, reply_to_message_id: int) -> Message:
+        pass
+
+    def send_file_id(self, update: Update, file_id: str) -> Message:
+        """
+        Sends the media by the file_id of an earlier upload, without downloading it.
+        """
+        pass
 
     def __enter__(self):
-        # returns a file object that the video was downloaded into.
         try:
-            self._path = self.download()
+            self._directory = self._exit_stack.enter_context(self._io_service.create_temp_directory())
+            if self._telegram_service.can_stream_files:
+                self.start_download()
+            else:
+                self._path = self.download()
             return self
         except Exception as e:
             logger.error(
-                f'Could not download youtube video {self._youtube.watch_url}. Error:\n{e}'
+                f'Could not download youtube {self._youtube.watch_url}. Error:\n{e}'
             )
+            self._exit_stack.close()
             raise e
 
+    def download(self) -> str:
+        return self.select_stream().download(output_path=self._directory)
+
+    def get_chunks(self, stream: Stream) -> Iterable[bytes]:
+        """
+        Returns the content of the file that is sent for the stream, as the stream is downloaded.
+        """
+        return request.stream(stream.url, timeout=self.download_timeout_seconds)
+
+    def start_download(self):
+        """
+        Starts to download the stream into a spool file in the background.
+        """
+        stream = self.select_stream()
+        self._path = os.path.join(self._directory, self.get_file_name(stream.default_filename))  # type: ignore
+        self._spool_file = SpoolFile(self._path)
+        self._download_thread = threading.Thread(
+            target=self._spool_file.write_chunks,
+            args=(self.get_chunks(stream),),
+            daemon=True
+        )
+        self._download_thread.start()
+
     def send(self, update: Update) -> int:
-        self._telegram_service.send_video(
+        self.upload(update)
+        return ConversationHandler.END
+
+    def upload(self, update: Update) -> Message:
+        reply_to_message_id = self._telegram_service.get_message_id(update)
+        if self._spool_file:
+            try:
+                return self.stream_file(update, self._spool_file, reply_to_message_id)
+            except Exception as e:
+                if self._spool_file.error:
+                    raise self._spool_file.error
+                logger.warning(
+                    f'Could not stream {self._path} to telegram, sending it once it is downloaded. Error:\n{e}'
+                )
+                self._spool_file.wait()
+
+        return self.send_file(update, self._path, reply_to_message_id)  # type: ignore
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._spool_file:
+            self._spool_file.cancel()
+            self._download_thread.join()  # type: ignore
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+        self._exit_stack.close()
+
+
+class YouTubeVideoDownloaderService(YouTubeDownloaderService):
+    """
+    Downloads a YouTube video and deletes it once it has been used. Must be used as a context manager.
+    """
+
+    def get_streams(self) -> List[Stream]:
+        return list(self._youtube.streams.filter(progressive=True).order_by('resolution').desc())
+
+    def get_quality(self, stream: Stream) -> str:
+        return stream.resolution
+
+    def send_file(self, update: Update, file_path: str, reply_to_message_id: int) -> Message:
+        return self._telegram_service.send_video(
             update=update,
-            video_file_path=self._path,  # type: ignore
-            reply_to_message_id=self._telegram_service.get_message_id(update)
+            video_file_path=file_path,
+            reply_to_message_id=reply_to_message_id
+        )
+
+    def stream_file(self, update: Update, spool_file: SpoolFile, reply_to_message_id: int) -> Message:
+        return self._telegram_service.stream_video(
+            update=update,
+            file_name=os.path.basename(spool_file.path),
+            chunks=spool_file.read_chunks(),
+            reply_to_message_id=reply_to_message_id
         )
-        return ConversationHandler.END
 
-    def download(self):
-        return self._youtube.streams.get_highest_resolution().download()
+    def send_file_id(self, update: Update, file_id: str) -> Message:
+        return self._telegram_service.send_video_file_id(
+            update=update,
+            file_id=file_id,
+            reply_to_message_id=self._telegram_service.get_message_id(update)
+        )
 
 
 class YouTubeAudioDownloaderService(YouTubeDownloaderService):
     """
-    Downloads a YouTube audio and deletes it once it has been used. Must be used as a context manager.
+    Downloads a YouTube audio as an mp3 and deletes it once it has been used. Must be used as a context manager.
+
+    The audio stream is transcoded into an mp3 as it is downloaded.
     """
 
-    def __enter__(self):
+    def __init__(
+        self,
+        youtube: YouTube,
+        telegram_service: TelegramService,
+        io_service: IOService,
+        audio_service: AudioService,
+        max_file_size_bytes: int = YouTubeDownloaderService.default_max_file_size_bytes
+    ):
+        super().__init__(youtube, telegram_service, io_service, max_file_size_bytes)
+        self._audio_service = audio_service
+
+    def get_streams(self) -> List[Stream]:
+        return list(self._youtube.streams.filter(only_audio=True, subtype='mp4').order_by('abr').desc())
+
+    def get_quality(self, stream: Stream) -> str:
+        return f'{self._audio_service.bitrate_kbps}kbps'
+
+    def get_file_size(self, stream: Stream) -> int:
+        """
+        Returns the size of the audio stream, by its metadata or else approximated by its own bitrate, so the streams
+        are compared by their real sizes. The size of the mp3 by the length of the video is only the fallback, for a
+        stream whose size cannot be found.
+        """
         try:
-            self._path = self.download()
-            base, _ = os.path.splitext(self._path)
-            new_file = f'{base}.mp3'
-            # due to pytube bug, rename the file to be .mp3 file
-            os.rename(self._path, new_file)
-            self._path = new_file
-            return self
-        except Exception as e:
-            logger.error(
-                f'Could not download youtube audio {self._youtube.watch_url}. Error:\n{e}'
-            )
-            raise e
+            if file_size := stream.filesize or stream.filesize_approx:
+                return file_size
+        except OSError as e:
+            logger.debug(f'could not get the size of the stream {stream}, estimating it by the mp3 bitrate. Error: {e}')
+        # the mp3 is of a constant bitrate, whatever the stream it is transcoded from
+        return self._youtube.length * self._audio_service.bitrate_kbps * 1000 // 8
 
-    def send(self, update: Update) -> int:
-        self._telegram_service.send_audio(
+    def get_file_name(self, file_name: str) -> str:
+        base, _ = os.path.splitext(file_name)
+        return f'{base}.mp3'
+
+    def download(self) -> str:
+        stream = self.select_stream()
+        path = os.path.join(self._directory, self.get_file_name(stream.default_filename))  # type: ignore
+        with open(path, 'wb') as file:
+            for chunk in self.get_chunks(stream):
+                file.write(chunk)
+        return path
+
+    def get_chunks(self, stream: Stream) -> Iterable[bytes]:
+        return self._audio_service.to_mp3(super().get_chunks(stream))
+
+    def send_file(self, update: Update, file_path: str, reply_to_message_id: int) -> Message:
+        return self._telegram_service.send_audio(
             update=update,
-            audio_file_path=self._path,  # type: ignore
-            reply_to_message_id=self._telegram_service.get_message_id(update)
+            audio_file_path=file_path,
+            reply_to_message_id=reply_to_message_id
         )
-        return ConversationHandler.END
 
-    def download(self):
-        return self._youtube.streams.get_audio_only().download()
+    def stream_file(self, update: Update, spool_file: SpoolFile, reply_to_message_id: int) -> Message:
+        return self._telegram_service.stream_audio(
+            update=update,
+            file_name=os.path.basename(spool_file.path),
+            chunks=spool_file.read_chunks(),
+            reply_to_message_id=reply_to_message_id
+        )
+
+    def send_file_id(self, update: Update, file_id: str) -> Message:
+        return self._telegram_service.send_audio_file_id(
+            update=update,
+            file_id=file_id,
+            reply_to_message_id=self._telegram_service.get_message_id(update)
+        )
@@ -0,0 +1,107 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from pytube import YouTube
+
+logger = logging.getLogger(__name__)
+
+
+class YouTubeMetadataService:
+    """
+    Validates YouTube URLs locally, and fetches the metadata of YouTube videos (their details and streams) only once
+    it is needed.
+
+    The metadata of a video is fetched once and memoized for ttl_seconds, concurrent requests for the same video wait
+    for a single fetch. Up to max_entries videos are memoized, the least recently used ones are evicted first.
+    """
+
+    video_id_pattern = re.compile(r'^[0-9A-Za-z_-]{11}$')
+    youtube_hosts = {
+        'youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com',
+        'youtube-nocookie.com', 'www.youtube-nocookie.com'
+    }
+    # the paths of the URLs of a video other than /watch, such as youtube.com/shorts/<video id>
+    video_paths = {'shorts', 'embed', 'live', 'v'}
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[float, YouTube]] = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+
+    @classmethod
+    def parse_video_id(cls, url: str) -> str | None:
+        """
+        Returns the id of the video of a YouTube URL, or None if the URL is not of a YouTube video.
+        """
+        url = url.strip()
+        parsed_url = urlparse(url if '://' in url else f'https://{url}')
+        host = (parsed_url.hostname or '').lower()
+        path_parts = parsed_url.path.split('/')
+
+        video_id = ''
+        if host == 'youtu.be' and len(path_parts) > 1:
+            video_id = path_parts[1]
+        elif host in cls.youtube_hosts:
+            if parsed_url.path == '/watch':
+                video_id = (parse_qs(parsed_url.query).get('v') or [''])[0]
+            elif len(path_parts) > 2 and path_parts[1] in cls.video_paths:
+                video_id = path_parts[2]
+
+        return video_id if video_id and cls.video_id_pattern.match(video_id) else None
+
+    @staticmethod
+    def get_watch_url(video_id: str) -> str:
+        return f'https://youtube.com/watch?v={video_id}'
+
+    def get_memoized(self, video_id: str) -> YouTube | None:
+        with self._lock:
+            if entry := self._entries.get(video_id):
+                expires_at, youtube = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(video_id)
+                    return youtube
+                del self._entries[video_id]
+        return None
+
+    def get(self, video_id: str) -> YouTube:
+        """
+        Returns the video with its metadata, which is fetched only if it is not memoized.
+        """
+        if youtube := self.get_memoized(video_id):
+            return youtube
+
+        with self._lock:
+            in_flight = self._in_flight.get(video_id)
+            is_fetching = in_flight is None
+            if is_fetching:
+                in_flight = self._in_flight[video_id] = Future()
+
+        if not is_fetching:
+            # the error of the fetch is raised to the requests that wait for it as well
+            return in_flight.result()  # type: ignore
+
+        try:
+            youtube = YouTube(self.get_watch_url(video_id))
+            # fetches the details and the streams of the video, which the YouTube object keeps from now on
+            youtube.streams
+            logger.debug(f'fetched the metadata of the YouTube video {video_id}')
+            with self._lock:
+                self._entries[video_id] = (time.monotonic() + self.ttl_seconds, youtube)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            in_flight.set_result(youtube)  # type: ignore
+            return youtube
+        except BaseException as e:
+            in_flight.set_exception(e)  # type: ignore
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[video_id]
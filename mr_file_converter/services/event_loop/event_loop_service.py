@@ -0,0 +1,85 @@
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from telegram import Update
+from telegram.ext import CallbackContext, Dispatcher, DispatcherHandlerStop
+from telegram.ext.utils.promise import Promise
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopService:
+    """
+    Runs the callbacks of the conversations on an asyncio event loop that runs in a thread of its own.
+
+    The dispatcher runs every asynchronous (run_async) callback on one of its worker threads, which is held for as long
+    as the callback waits, such as for the rest of an album. A callback that is a coroutine holds nothing while it
+    awaits, so waiting conversations cost no threads. Callbacks that are plain functions, and the blocking calls of the
+    coroutines (the telegram bot api, the converters), run on the default executor of the event loop, a pool of
+    blocking_workers threads.
+
+    The dispatcher gets a Promise for every callback which is completed once the callback is done, so the callbacks
+    keep the semantics of run_async callbacks: the state they return, the persistence and the error handlers.
+    """
+
+    def __init__(self, blocking_workers: int):
+        self.blocking_workers = blocking_workers
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._loop_lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if not self._loop:
+                self._executor = ThreadPoolExecutor(max_workers=self.blocking_workers, thread_name_prefix='blocking')
+                self._loop = asyncio.new_event_loop()
+                self._loop.set_default_executor(self._executor)
+                threading.Thread(target=self._loop.run_forever, name='event_loop', daemon=True).start()
+            return self._loop
+
+    async def run_callback(self, callback: Callable, update: Update, context: CallbackContext) -> Any:
+        if inspect.iscoroutinefunction(callback):
+            return await callback(update, context)
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(callback, update, context))
+
+    @staticmethod
+    def settle(promise: Promise, dispatcher: Dispatcher):
+        """
+        Completes the promise of a callback that is done, the same way the dispatcher completes the promises of its
+        worker threads.
+        """
+        promise.run()
+        if promise.exception is None:
+            dispatcher.update_persistence(update=promise.update)
+        elif isinstance(promise.exception, DispatcherHandlerStop):
+            logger.warning(f'DispatcherHandlerStop is not supported in {promise.pooled_function}')
+        else:
+            dispatcher.dispatch_error(promise.update, promise.exception, promise=promise)
+
+    def callback(self, callback: Callable) -> Callable[[Update, CallbackContext], Promise]:
+        """
+        Wraps a callback, a coroutine function or a plain function, into a callback that runs it on the event loop.
+        """
+        @functools.wraps(callback)
+        def run_on_event_loop(update: Update, context: CallbackContext) -> Promise:
+            future: Future = asyncio.run_coroutine_threadsafe(self.run_callback(callback, update, context), self.loop)
+            promise = Promise(future.result, (), {}, update=update)
+            # settled on the executor, so the callbacks of the promise (e.g. the persistence) do not block the loop
+            future.add_done_callback(lambda _: self._executor.submit(  # type: ignore
+                self.settle, promise, context.dispatcher
+            ))
+            return promise
+        return run_on_event_loop
+
+    def shutdown(self):
+        with self._loop_lock:
+            if self._loop:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._executor.shutdown()  # type: ignore
+                self._loop = self._executor = None
@@ -0,0 +1,348 @@
+import functools
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import (Any, Callable, ContextManager, Dict, Generator, List,
+                    Sequence, Tuple)
+
+from mr_file_converter.services.conversion.conversion_registry import (
+    Conversion, ConversionStep, chain_conversions, fan_out_conversions)
+from mr_file_converter.services.io.io_service import IOService
+
+logger = logging.getLogger(__name__)
+
+# the services of a conversion worker process, built once when the worker starts.
+_worker_services = None
+# a conversion method of a worker process, given as (service name, method name, keyword arguments of the method)
+WorkerConversion = Tuple[str, str, Dict[str, Any]]
+
+
+class WorkerError(Exception):
+    """
+    Replaces an error of a worker process that cannot be pickled back to the calling process, as such an error breaks
+    the whole pool of workers.
+    """
+
+
+def raises_picklable_errors(function: Callable) -> Callable:
+    """
+    Decorates a function that runs in worker processes, so its errors can always be sent back to the calling process.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        except Exception as e:
+            try:
+                pickle.loads(pickle.dumps(e))
+            except Exception:
+                raise WorkerError(f'{type(e).__name__}: {e}') from None
+            raise
+    return wrapper
+
+
+def get_mp_context() -> multiprocessing.context.BaseContext:
+    """
+    Returns the context that starts the worker processes of the pools. The bot process runs many threads, so the
+    workers are not forked from it.
+    """
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(start_method)
+
+
+def _init_worker():
+    global _worker_services
+    # imported here as the containers module depends on this module
+    from mr_file_converter.containers import Converters, Services
+    _worker_services = Services(converters=Converters())
+    # the worker is a single process of the pool, so its services do not start pools of processes of their own
+    _worker_services.ocr.add_kwargs(max_workers=0)
+    _worker_services.pdf.add_kwargs(max_workers=1)
+    _worker_services.renderer.add_kwargs(pool_size=1)
+
+
+def get_worker_conversions(conversions: List[WorkerConversion]) -> List[Conversion]:
+    """
+    Replaces the service names of (service, method, keyword arguments) triples with the services of the worker
+    process.
+    """
+    if _worker_services is None:
+        _init_worker()
+    return [
+        (getattr(_worker_services, service_name)(), method_name, kwargs)
+        for service_name, method_name, kwargs in conversions
+    ]
+
+
+@raises_picklable_errors
+def run_conversion_job(
+    conversions: List[WorkerConversion], source_file_path: str, custom_file_name: str, output_directory: str
+) -> str:
+    """
+    Runs a chain of conversions inside a worker process, every conversion is a (service, method, keyword arguments)
+    triple.
+
+    The result of the conversion is deleted as soon as the conversion method exits, so it is copied into the
+    output directory of the job which is owned by the calling process.
+    """
+    with chain_conversions(
+        get_worker_conversions(conversions), source_file_path, custom_file_name
+    ) as destination_file_path:
+        return shutil.copy(destination_file_path, output_directory)
+
+
+@raises_picklable_errors
+def run_fan_out_job(
+    conversions: Dict[str, List[WorkerConversion]], source_file_path: str, custom_file_name: str, output_directory: str
+) -> Dict[str, str]:
+    """
+    Converts a source into several formats inside a worker process, every format by its own chain of conversions.
+
+    The result of every format is copied into a directory of its own in the output directory of the job.
+    """
+    with fan_out_conversions(
+        {_format: get_worker_conversions(format_conversions) for _format, format_conversions in conversions.items()},
+        source_file_path,
+        custom_file_name
+    ) as destination_file_paths:
+        copied_file_paths = {}
+        for _format, destination_file_path in destination_file_paths.items():
+            os.makedirs(format_directory := os.path.join(output_directory, _format))
+            copied_file_paths[_format] = shutil.copy(destination_file_path, format_directory)
+        return copied_file_paths
+
+
+class ConversionExecutor(ABC):
+    """
+    Decides where the conversions of the services are executed.
+    """
+
+    @abstractmethod
+    def execute(
+        self,
+        steps: List[ConversionStep],
+        source_file_path: str,
+        custom_file_name: str
+    ) -> ContextManager[str]:
+        """
+        Runs a planned chain of conversion methods of the services, such as XMLService.to_json -> JsonService.to_text.
+
+        Returns:
+            a context manager that yields the path of the converted file.
+        """
+        pass
+
+    @abstractmethod
+    def execute_many(
+        self,
+        plans: Dict[str, List[ConversionStep]],
+        source_file_path: str,
+        custom_file_name: str
+    ) -> ContextManager[Dict[str, str]]:
+        """
+        Converts a source into several formats at once, every format by its planned chain of conversions. A structured
+        source is parsed only once for all the formats.
+
+        Returns:
+            a context manager that yields the path of the converted file of every format.
+        """
+        pass
+
+    def shutdown(self):
+        """
+        Stops the workers of the executor, if it has any.
+        """
+        pass
+
+
+class InlineConversionExecutor(ConversionExecutor):
+    """
+    Executes the conversions in the calling thread.
+    """
+
+    @contextmanager
+    def execute(
+        self,
+        steps: List[ConversionStep],
+        source_file_path: str,
+        custom_file_name: str
+    ) -> Generator[str, None, None]:
+        with chain_conversions(
+            [(step.service, step.method_name, step.kwargs) for step in steps], source_file_path, custom_file_name
+        ) as destination_file_path:
+            yield destination_file_path
+
+    @contextmanager
+    def execute_many(
+        self,
+        plans: Dict[str, List[ConversionStep]],
+        source_file_path: str,
+        custom_file_name: str
+    ) -> Generator[Dict[str, str], None, None]:
+        with fan_out_conversions(
+            {_format: [(step.service, step.method_name, step.kwargs) for step in steps] for _format, steps in plans.items()},
+            source_file_path,
+            custom_file_name
+        ) as destination_file_paths:
+            yield destination_file_paths
+
+
+class ProcessPoolConversionExecutor(ConversionExecutor):
+    """
+    Executes the conversions in a bounded pool of worker processes so CPU bound converters do not hold the GIL of the
+    bot process.
+
+    Every job is shipped as ([(service, method, keyword arguments), ...], source file path, custom file name), where
+    the service is the name of its provider in the Services container, and the whole chain of conversions runs in a
+    single worker, as do all the chains of a conversion into several formats, so their source is parsed only once. The
+    amount of concurrent jobs of a conversion can be limited per target format ('text') or per source and target
+    format ('photo:text'), a chained job holds the limits of all of its conversions.
+
+    Jobs with a conversion of the inline services, services that already run their heavy work in bounded pools of
+    processes of their own (such as the browsers of HTMLService, the page workers of PdfService and the OCR workers of
+    PhotoService), run in the calling thread, so those pools are shared by all the jobs rather than started in every
+    worker.
+    """
+
+    def __init__(
+        self,
+        io_service: IOService,
+        max_workers: int | None,
+        format_limits: Dict[str, int],
+        inline_services: Sequence[str] = ()
+    ):
+        self.io_service = io_service
+        self.max_workers = max_workers
+        self.inline_services = set(inline_services)
+        self.format_limits = {
+            _format: threading.BoundedSemaphore(limit) for _format, limit in format_limits.items()
+        }
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        self._service_names: Dict[type, str] = {}
+
+    @staticmethod
+    def parse_format_limits(format_limits: str) -> Dict[str, int]:
+        """
+        Parses format limits such as 'photo:text=2,docx=1'.
+        """
+        limits = {}
+        for format_limit in filter(None, format_limits.split(',')):
+            _format, limit = format_limit.split('=')
+            limits[_format.strip()] = int(limit)
+        return limits
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if not self._pool:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=get_mp_context(),
+                    initializer=_init_worker
+                )
+            return self._pool
+
+    def get_service_name(self, service: Any) -> str:
+        if not self._service_names:
+            # imported here as the containers module depends on this module
+            from dependency_injector import providers
+
+            from mr_file_converter.containers import Services
+            self._service_names = {
+                provider.provides: name for name, provider in Services.providers.items()
+                if isinstance(provider, (providers.Factory, providers.Singleton))
+            }
+        return self._service_names[type(service)]
+
+    def get_format_limit(self, source_format: str, requested_format: str) -> ContextManager:
+        return self.format_limits.get(
+            f'{source_format}:{requested_format}'
+        ) or self.format_limits.get(requested_format) or nullcontext()
+
+    @contextmanager
+    def acquire_format_limits(self, steps: List[ConversionStep]) -> Generator[None, None, None]:
+        with ExitStack() as format_limits:
+            # the limits are always acquired in the same order, so chained jobs cannot deadlock each other
+            for format_limit in sorted(
+                {self.get_format_limit(step.source_format, step.target_format) for step in steps}, key=id
+            ):
+                format_limits.enter_context(format_limit)
+            yield
+
+    def is_inline(self, steps: List[ConversionStep]) -> bool:
+        return any(self.get_service_name(step.service) in self.inline_services for step in steps)
+
+    @contextmanager
+    def execute(
+        self,
+        steps: List[ConversionStep],
+        source_file_path: str,
+        custom_file_name: str
+    ) -> Generator[str, None, None]:
+        if self.is_inline(steps):
+            with self.acquire_format_limits(steps), chain_conversions(
+                [(step.service, step.method_name, step.kwargs) for step in steps], source_file_path, custom_file_name
+            ) as destination_file_path:
+                yield destination_file_path
+            return
+
+        conversions = [(self.get_service_name(step.service), step.method_name, step.kwargs) for step in steps]
+
+        with self.io_service.create_temp_directory() as output_directory:
+            with self.acquire_format_limits(steps):
+                logger.debug(f'converting {source_file_path} with {conversions} in a worker process')
+                destination_file_path = self.pool.submit(
+                    run_conversion_job,
+                    conversions,
+                    source_file_path,
+                    custom_file_name,
+                    output_directory
+                ).result()
+            yield destination_file_path
+
+    @contextmanager
+    def execute_many(
+        self,
+        plans: Dict[str, List[ConversionStep]],
+        source_file_path: str,
+        custom_file_name: str
+    ) -> Generator[Dict[str, str], None, None]:
+        all_steps = [step for steps in plans.values() for step in steps]
+        if self.is_inline(all_steps):
+            with self.acquire_format_limits(all_steps), fan_out_conversions(
+                {_format: [(step.service, step.method_name, step.kwargs) for step in steps] for _format, steps in plans.items()},
+                source_file_path,
+                custom_file_name
+            ) as destination_file_paths:
+                yield destination_file_paths
+            return
+
+        conversions = {
+            _format: [(self.get_service_name(step.service), step.method_name, step.kwargs) for step in steps]
+            for _format, steps in plans.items()
+        }
+
+        with self.io_service.create_temp_directory() as output_directory:
+            with self.acquire_format_limits(all_steps):
+                logger.debug(f'converting {source_file_path} with {conversions} in a worker process')
+                destination_file_paths = self.pool.submit(
+                    run_fan_out_job,
+                    conversions,
+                    source_file_path,
+                    custom_file_name,
+                    output_directory
+                ).result()
+            yield destination_file_paths
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool:
+                self._pool.shutdown()
+                self._pool = None
@@ -2,46 +2,50 @@ from contextlib import contextmanager
 from typing import Generator
 
 import html2text
-import pdfkit
-from html2image import Html2Image
 
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.conversion.file_types import FileTypes
 from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.renderer.renderer_service import \
+    RendererService
 
 
 class HTMLService:
-    """
-    TODO: https://github.com/JazzCore/python-pdfkit - need to install wkhtmltopdf on the docker
-    """
 
     def __init__(
         self,
-        io_service: IOService
+        io_service: IOService,
+        renderer_service: RendererService
     ):
         self.io_service = io_service
-        self.html_to_image = Html2Image()
+        self.renderer_service = renderer_service
+
+    def register_conversions(self, conversion_registry: ConversionRegistry):
+        conversion_registry.register(FileTypes.HTML, FileTypes.TEXT, self, 'to_text', cost=1)
+        conversion_registry.register(FileTypes.HTML, FileTypes.PDF, self, 'to_pdf', cost=5)
+        conversion_registry.register(FileTypes.HTML, FileTypes.PNG, self, 'to_png', cost=5)
+        conversion_registry.register(FileTypes.HTML, FileTypes.JPG, self, 'to_jpg', cost=5)
 
     @contextmanager
     def to_pdf(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
         with self.io_service.create_temp_pdf_file(
             prefix=custom_file_name
         ) as pdf_file:
-            pdfkit.from_file(source_file_path, pdf_file)
+            self.renderer_service.render_file(source_file_path, file_path=pdf_file, output_format='pdf')
             yield pdf_file
 
     @contextmanager
     def to_png(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
-        yield self.html_to_image.screenshot(
-            html_file=source_file_path,
-            save_as=f'{custom_file_name}.png'
-        )[0]
-        self.io_service.remove_file(f'{custom_file_name}.png')
+        with self.io_service.create_job_file(f'{custom_file_name}.png') as png_file:
+            self.renderer_service.render_file(source_file_path, file_path=png_file, output_format='png')
+            yield png_file
 
     @contextmanager
     def to_jpg(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
-        yield self.html_to_image.screenshot(
-            html_file=source_file_path, save_as=f'{custom_file_name}.jpg'
-        )[0]
-        self.io_service.remove_file(f'{custom_file_name}.jpg')
+        with self.io_service.create_job_file(f'{custom_file_name}.jpg') as jpg_file:
+            self.renderer_service.render_file(source_file_path, file_path=jpg_file, output_format='jpeg')
+            yield jpg_file
 
     @contextmanager
     def to_text(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
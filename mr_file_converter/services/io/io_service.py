@@ -1,8 +1,12 @@
+import hashlib
 import logging
 import os
+import shutil
+import time
+import zipfile
 from contextlib import contextmanager
-from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import Generator
+from tempfile import NamedTemporaryFile, TemporaryDirectory, mkdtemp
+from typing import Dict, Generator
 
 logger = logging.getLogger(__name__)
 
@@ -22,13 +26,65 @@ class IOService:
     def create_temp_directory(self) -> Generator[str, None, None]:
         try:
             temporary_directory = self.temporary_directory()
-            yield temporary_directory.name
         except Exception as e:
             logger.error('failed to create temp directory')
             raise e
 
-        temporary_directory.cleanup()
-        self.remove_file(temporary_directory.name)
+        try:
+            yield temporary_directory.name
+        finally:
+            temporary_directory.cleanup()
+
+    @staticmethod
+    def get_safe_file_name(file_name: str) -> str:
+        """
+        Returns the file name without any directory, as file names come from users and must never point outside of the
+        directory they are created in (e.g. '../../etc/passwd' or '/etc/passwd').
+        """
+        safe_file_name = os.path.basename(file_name)
+        if safe_file_name in ('', '.', '..'):
+            raise ValueError(f'{file_name} is not a valid file name')
+        return safe_file_name
+
+    @contextmanager
+    def create_job_file(self, file_name: str) -> Generator[str, None, None]:
+        """
+        Yields a path with the exact file name inside a scratch directory of its own, so concurrent jobs that use the
+        same file name never write to the same path.
+        """
+        with self.create_temp_directory() as job_directory:
+            job_file = os.path.realpath(os.path.join(job_directory, self.get_safe_file_name(file_name)))
+            if os.path.dirname(job_file) != os.path.realpath(job_directory):
+                raise ValueError(f'{file_name} is not a valid file name')
+            yield job_file
+
+    @staticmethod
+    def make_job_directory(parent_directory: str) -> str:
+        """
+        Creates a scratch directory of its own inside the parent directory, for a job that outlives a single call such
+        as a file that is kept between the stages of a conversation. The job removes it with remove_job_directory.
+        """
+        os.makedirs(parent_directory, exist_ok=True)
+        return mkdtemp(dir=parent_directory)
+
+    @staticmethod
+    def remove_job_directory(job_directory: str):
+        shutil.rmtree(job_directory, ignore_errors=True)
+
+    def remove_stale_job_directories(self, parent_directory: str, max_age_seconds: float) -> int:
+        """
+        Removes the job directories that were left behind, e.g. by a crashed job, and were not modified for
+        max_age_seconds. Returns the amount of removed directories.
+        """
+        if not os.path.isdir(parent_directory):
+            return 0
+
+        removed_count = 0
+        for entry in os.scandir(parent_directory):
+            if entry.is_dir(follow_symlinks=False) and time.time() - entry.stat().st_mtime > max_age_seconds:
+                self.remove_job_directory(entry.path)
+                removed_count += 1
+        return removed_count
 
     @contextmanager
     def create_temp_file(
@@ -36,6 +92,9 @@ class IOService:
     ) -> Generator[str, None, None]:
         if suffix and '.' not in suffix:
             suffix = f'.{suffix}'
+        if prefix:
+            # the prefix is usually a file name of a user, which must not point outside of the temp directory
+            prefix = os.path.basename(prefix)
 
         try:
             with self.named_temporary_file(
@@ -91,6 +150,17 @@ class IOService:
         with self.create_temp_file(prefix=prefix, suffix='.docx') as out_path:
             yield out_path
 
+    @contextmanager
+    def create_zip_file(self, file_name: str, files: Dict[str, str]) -> Generator[str, None, None]:
+        """
+        Yields a zip file with the exact file name, that holds every file under its archive name ({name: path}).
+        """
+        with self.create_job_file(file_name) as zip_file:
+            with zipfile.ZipFile(zip_file, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                for archive_name, file_path in files.items():
+                    archive.write(file_path, arcname=self.get_safe_file_name(archive_name))
+            yield zip_file
+
     @staticmethod
     def write_data_to_file(data: str, file_path: str, mode: str = 'w'):
         with open(file_path, mode) as file:
@@ -100,3 +170,11 @@ class IOService:
     def read_file(file_path: str, mode: str = 'r'):
         with open(file_path, mode) as file:
             return file.read()
+
+    @staticmethod
+    def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            while chunk := file.read(chunk_size):
+                sha256.update(chunk)
+        return sha256.hexdigest()
@@ -0,0 +1,90 @@
+import logging
+import threading
+from typing import Generator, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class SpoolFile:
+    """
+    A file that is read while it is still being written.
+
+    A single writer appends chunks to the file, and every reader gets the chunks as soon as they are written, until the
+    writer is done. The content is spooled to the disk rather than kept in memory, so a slow reader never holds back
+    the writer, and the whole file is there once the writer is done.
+    """
+
+    chunk_size = 1024 * 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self._size = 0
+        self._done = False
+        self._cancelled = False
+        self._error: Exception | None = None
+        self._condition = threading.Condition()
+        # created up front, so readers can open the file before the first chunk is written
+        open(path, 'wb').close()
+
+    @property
+    def error(self) -> Exception | None:
+        with self._condition:
+            return self._error
+
+    def write_chunks(self, chunks: Iterable[bytes]):
+        """
+        Writes all the chunks into the file, any error of the chunks is raised to the readers instead.
+        """
+        try:
+            with open(self.path, 'ab') as file:
+                for chunk in chunks:
+                    if self._cancelled:
+                        # the readers must not mistake the part that was written for the whole file
+                        raise InterruptedError(f'writing {self.path} was cancelled')
+                    file.write(chunk)
+                    file.flush()
+                    with self._condition:
+                        self._size += len(chunk)
+                        self._condition.notify_all()
+        except Exception as e:
+            logger.error(f'failed to write {self.path}. Error:\n{e}')
+            with self._condition:
+                self._error = e
+        finally:
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
+
+    def cancel(self):
+        """
+        Stops the writer once it is done with the chunk it writes.
+        """
+        self._cancelled = True
+
+    def wait(self):
+        """
+        Waits until the writer is done, and raises its error if it failed.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._done)
+            if self._error:
+                raise self._error
+
+    def read_chunks(self) -> Generator[bytes, None, None]:
+        """
+        Yields the content of the file in chunks as it is written, and raises the error of the writer if it failed.
+        """
+        position = 0
+        with open(self.path, 'rb') as file:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._size > position or self._done)
+                    size, done, error = self._size, self._done, self._error
+                if done and position == size:
+                    if error:
+                        raise error
+                    return
+                while position < size:
+                    chunk = file.read(min(self.chunk_size, size - position))
+                    position += len(chunk)
+                    yield chunk
@@ -1,41 +1,78 @@
+import os
 from contextlib import contextmanager
 from typing import Generator
 
-from mr_file_converter.converters import (JsonConverter, XMLConverter,
-                                          YamlConverter)
+from mr_file_converter.converters import (JsonConverter, ParsedDocument,
+                                          XMLConverter, YamlConverter)
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.conversion.file_types import FileTypes
 from mr_file_converter.services.io.io_service import IOService
 
 
 class JsonService:
 
+    default_streaming_threshold_bytes = 50 * 1024 * 1024
+
     def __init__(
         self,
         io_service: IOService,
         json_converter: JsonConverter,
         yml_converter: YamlConverter,
-        xml_converter: XMLConverter
+        xml_converter: XMLConverter,
+        streaming_threshold_bytes: int = default_streaming_threshold_bytes
     ):
         self.io_service = io_service
         self.json_converter = json_converter
         self.yml_converter = yml_converter
         self.xml_converter = xml_converter
+        self.streaming_threshold_bytes = streaming_threshold_bytes
+
+    def register_conversions(self, conversion_registry: ConversionRegistry):
+        conversion_registry.register(FileTypes.JSON, FileTypes.YML, self, 'to_yml', cost=1)
+        conversion_registry.register(FileTypes.JSON, FileTypes.TEXT, self, 'to_text', cost=1)
+        conversion_registry.register(FileTypes.JSON, FileTypes.XML, self, 'to_xml', cost=1)
+
+    def should_stream(self, source_file_path: str) -> bool:
+        """
+        Large json files whose top level is an array or an object are converted item by item instead of being loaded
+        into memory at once.
+        """
+        return os.path.getsize(source_file_path) > self.streaming_threshold_bytes and bool(
+            self.json_converter.get_container_type(source_file_path)
+        )
+
+    def parse(self, source_file_path: str) -> ParsedDocument:
+        return ParsedDocument(source_file_path, FileTypes.JSON, parse=self.json_converter.read)
+
+    def get_document(self, source_file_path: str | ParsedDocument) -> ParsedDocument:
+        if isinstance(source_file_path, ParsedDocument):
+            return source_file_path
+        return self.parse(source_file_path)
+
+    def write_converted(self, document: ParsedDocument, file_path: str, converter: YamlConverter | XMLConverter):
+        if document.source_format == FileTypes.JSON and self.should_stream(document.source_file_path):
+            converter.write_items(
+                items=self.json_converter.iter_items(document.source_file_path),
+                is_mapping=self.json_converter.get_container_type(document.source_file_path) == '{',
+                file_path=file_path
+            )
+        else:
+            converter.write(data=document.data, file_path=file_path)
 
     @contextmanager
-    def to_yml(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
+    def to_yml(self, source_file_path: str | ParsedDocument, custom_file_name: str) -> Generator[str, None, None]:
         """
         Converts json to yml file.
         """
         with self.io_service.create_temp_yml_file(
             prefix=custom_file_name
         ) as yml_file:
-            self.yml_converter.write(
-                data=self.json_converter.read(source_file_path),
-                file_path=yml_file
-            )
+            self.write_converted(self.get_document(source_file_path), file_path=yml_file, converter=self.yml_converter)
             yield yml_file
 
     @contextmanager
-    def to_text(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
+    def to_text(self, source_file_path: str | ParsedDocument, custom_file_name: str) -> Generator[str, None, None]:
         """
         Converts json to a file that is a string representation of the json.
         """
@@ -44,19 +81,16 @@ class JsonService:
         ) as text_file:
             self.io_service.write_data_to_file(
                 data=self.json_converter.dumps(
-                    self.json_converter.read(source_file_path)
+                    self.get_document(source_file_path).data
                 ),
                 file_path=text_file
             )
             yield text_file
 
     @contextmanager
-    def to_xml(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
+    def to_xml(self, source_file_path: str | ParsedDocument, custom_file_name: str) -> Generator[str, None, None]:
         with self.io_service.create_temp_xml_file(
             prefix=custom_file_name
         ) as xml_file:
-            self.xml_converter.write(
-                data=self.json_converter.read(source_file_path),
-                file_path=xml_file
-            )
+            self.write_converted(self.get_document(source_file_path), file_path=xml_file, converter=self.xml_converter)
             yield xml_file
@@ -0,0 +1,176 @@
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import pytesseract
+from PIL import Image, ImageOps
+
+from mr_file_converter.services.executor.conversion_executor import (
+    get_mp_context, raises_picklable_errors)
+
+try:
+    # keeps the language data of tesseract loaded in the process, instead of starting tesseract for every image. It is
+    # installed with the ocr extra (poetry install -E ocr), without it every image is recognized by a tesseract process.
+    import tesserocr  # type: ignore
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+# the tesseract engines of the process, created on first use. An engine is not thread safe, so every thread has one of
+# its own, an OCR worker process runs a single thread.
+_engines = threading.local()
+
+
+def get_engine(language: str):
+    """
+    Returns the warm tesseract engine of the current thread for the language, or None if tesserocr is not installed.
+    """
+    if tesserocr is None:
+        return None
+    if getattr(_engines, 'language', None) != language:
+        if engine := getattr(_engines, 'engine', None):
+            engine.End()
+        _engines.engine = tesserocr.PyTessBaseAPI(lang=language)
+        _engines.language = language
+    return _engines.engine
+
+
+def _init_worker(language: str):
+    # loads the language data once when the worker starts, so the first image does not wait for it
+    get_engine(language)
+
+
+@raises_picklable_errors
+def recognize_text(image: Image.Image, language: str) -> str:
+    """
+    Runs OCR on a single (preprocessed) image, runs in the worker processes.
+    """
+    if (engine := get_engine(language)) is not None:
+        engine.SetImage(image)
+        return engine.GetUTF8Text()
+    return pytesseract.image_to_string(image, lang=language)
+
+
+class OCRService:
+    """
+    Extracts the text of images with a pool of warm OCR worker processes.
+
+    Before the OCR, images are converted to grayscale, downscaled to the target DPI and binarized. The DPI of an image
+    without DPI metadata, such as a photo of a page, is estimated as if its short side was page_width_inches wide.
+    Images that are bigger than max_tile_pixels are split into tiles at blank rows, so lines of text are not cut, and
+    the tiles are recognized in parallel by the workers. When max_workers is 0 the OCR runs in the calling process.
+    """
+
+    # the width of a letter page
+    page_width_inches = 8.5
+
+    def __init__(
+        self,
+        max_workers: int,
+        language: str = 'eng',
+        target_dpi: int = 300,
+        binarize: bool = True,
+        max_tile_pixels: int = 4000 * 1000
+    ):
+        self.max_workers = max_workers
+        self.language = language
+        self.target_dpi = target_dpi
+        self.binarize = binarize
+        self.max_tile_pixels = max_tile_pixels
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if not self._pool:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=get_mp_context(),
+                    initializer=_init_worker,
+                    initargs=(self.language,)
+                )
+                # starts all the workers right away, so the first images do not wait for the workers to start
+                for _ in range(self.max_workers):
+                    self._pool.submit(int)
+            return self._pool
+
+    @staticmethod
+    def get_binarization_threshold(histogram: List[int]) -> int:
+        """
+        Returns the gray level that best separates the text from the background (Otsu's method).
+        """
+        pixels_count = sum(histogram)
+        total_intensity = sum(level * count for level, count in enumerate(histogram))
+        threshold, best_variance = 0, 0.0
+        background_pixels, background_intensity = 0, 0
+
+        for level, count in enumerate(histogram):
+            background_pixels += count
+            foreground_pixels = pixels_count - background_pixels
+            if not background_pixels or not foreground_pixels:
+                continue
+            background_intensity += level * count
+            background_mean = background_intensity / background_pixels
+            foreground_mean = (total_intensity - background_intensity) / foreground_pixels
+            variance = background_pixels * foreground_pixels * (background_mean - foreground_mean) ** 2
+            if variance > best_variance:
+                threshold, best_variance = level, variance
+        return threshold
+
+    def preprocess(self, image: Image.Image) -> Image.Image:
+        dpi = image.info.get('dpi', (0, 0))[0] or min(image.size) / self.page_width_inches
+        image = ImageOps.exif_transpose(image).convert('L')
+
+        if dpi > self.target_dpi:
+            scale = self.target_dpi / dpi
+            image = image.resize(
+                (max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.Resampling.LANCZOS
+            )
+        if self.binarize:
+            threshold = self.get_binarization_threshold(image.histogram())
+            image = image.point([0 if level <= threshold else 255 for level in range(256)], '1')
+        return image
+
+    def split_into_tiles(self, image: Image.Image) -> List[Image.Image]:
+        """
+        Splits an image into horizontal tiles of up to max_tile_pixels pixels.
+
+        Every tile is cut at the brightest row of its lower half, which is a blank row between lines of text whenever
+        there is one.
+        """
+        if image.width * image.height <= self.max_tile_pixels:
+            return [image]
+
+        tile_height = max(2, self.max_tile_pixels // image.width)
+        # the mean brightness of every row
+        rows_brightness = image.convert('L').resize((1, image.height), Image.Resampling.BOX).tobytes()
+
+        cuts = [0]
+        while cuts[-1] + tile_height < image.height:
+            cuts.append(
+                max(
+                    range(cuts[-1] + tile_height // 2, cuts[-1] + tile_height),
+                    key=lambda row: (rows_brightness[row], row)
+                )
+            )
+        cuts.append(image.height)
+
+        return [image.crop((0, top, image.width, bottom)) for top, bottom in zip(cuts, cuts[1:])]
+
+    def image_to_text(self, image_file_path: str) -> str:
+        with Image.open(image_file_path) as image:
+            tiles = self.split_into_tiles(self.preprocess(image))
+
+        logger.debug(f'recognizing the text of {image_file_path} in {len(tiles)} tiles')
+        if self.max_workers:
+            return '\n'.join(self.pool.map(recognize_text, tiles, [self.language] * len(tiles)))
+        return '\n'.join(recognize_text(tile, self.language) for tile in tiles)
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool:
+                self._pool.shutdown()
+                self._pool = None
@@ -1,39 +1,160 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, Iterator, List, Tuple
 
 import pdf2docx
 import PyPDF2
 
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.conversion.file_types import FileTypes
+from mr_file_converter.services.executor.conversion_executor import (
+    get_mp_context, raises_picklable_errors)
 from mr_file_converter.services.io.io_service import IOService
 
 
+@raises_picklable_errors
+def extract_pages_text(source_file_path: str, start_page: int, end_page: int) -> List[str]:
+    """
+    Extracts the text of the pages in the range [start_page, end_page), runs in the worker processes.
+    """
+    with open(source_file_path, 'rb') as pdf_file:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        return [pdf_reader.pages[page_number].extract_text() for page_number in range(start_page, end_page)]
+
+
+@raises_picklable_errors
+def parse_docx_pages(source_file_path: str, start_page: int, end_page: int, parsed_pages_file_path: str):
+    """
+    Parses the pages in the range [start_page, end_page) into docx layout and stores it in a json file, runs in the
+    worker processes.
+    """
+    converter = pdf2docx.Converter(source_file_path)
+    try:
+        converter.parse(start_page, end_page, **converter.default_settings).serialize(parsed_pages_file_path)
+    finally:
+        converter.close()
+
+
 class PdfService:
+    """
+    Converts pdf files, big files are split into chunks of pages that are converted in parallel by a pool of worker
+    processes, which is shared by all the conversions so the amount of processes is bounded by max_workers.
+    """
+
+    # starting the worker processes is only worth it for shards of several pages
+    min_docx_pages_per_shard = 10
 
     def __init__(
         self,
-        io_service: IOService
+        io_service: IOService,
+        max_workers: int = 1,
+        pages_per_chunk: int = 25
     ):
         self.io_service = io_service
+        self.max_workers = max_workers
+        self.pages_per_chunk = pages_per_chunk
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if not self._pool:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_mp_context())
+            return self._pool
+
+    def register_conversions(self, conversion_registry: ConversionRegistry):
+        conversion_registry.register(FileTypes.PDF, FileTypes.TEXT, self, 'to_txt', cost=3)
+        conversion_registry.register(FileTypes.PDF, FileTypes.DOCX, self, 'to_docx', cost=10)
 
     @contextmanager
-    def to_docx(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
+    def to_docx(
+        self, source_file_path: str, custom_file_name: str, page_range: Tuple[int, int] | None = None
+    ) -> Generator[str, None, None]:
+        """
+        Converts pdf to docx file, optionally only the pages in the range [start_page, end_page).
+
+        The pages are split into a shard per worker process, every shard is parsed in parallel and the parsed shards
+        are merged into a single docx file.
+        """
         with self.io_service.create_temp_docx_file(
             prefix=custom_file_name
         ) as docx_file:
-            pdf2docx.parse(source_file_path, docx_file)
+            converter = pdf2docx.Converter(source_file_path)
+            try:
+                pages_count = len(converter.fitz_doc)
+                start_page, end_page = page_range or (0, pages_count)
+                end_page = min(end_page, pages_count)
+                shards_count = min(self.max_workers, (end_page - start_page) // self.min_docx_pages_per_shard)
+
+                if shards_count <= 1:
+                    converter.convert(docx_file, start=start_page, end=end_page)
+                else:
+                    shards = [
+                        (
+                            start_page + (end_page - start_page) * shard // shards_count,
+                            start_page + (end_page - start_page) * (shard + 1) // shards_count
+                        ) for shard in range(shards_count)
+                    ]
+                    with self.io_service.create_temp_directory() as parsed_pages_directory:
+                        parsed_pages_files = [
+                            f'{parsed_pages_directory}/pages-{shard}.json' for shard in range(shards_count)
+                        ]
+                        list(self.pool.map(
+                            parse_docx_pages,
+                            [source_file_path] * shards_count,
+                            [shard_start_page for shard_start_page, _ in shards],
+                            [shard_end_page for _, shard_end_page in shards],
+                            parsed_pages_files
+                        ))
+                        for parsed_pages_file in parsed_pages_files:
+                            converter.deserialize(parsed_pages_file)
+                    converter.make_docx(docx_file, **converter.default_settings)
+            finally:
+                converter.close()
             yield docx_file
 
+    def iter_pages_text(self, source_file_path: str) -> Iterator[str]:
+        """
+        Yields the text of the pages in order.
+
+        Big PDFs are split into chunks of pages that are extracted in parallel by worker processes, the chunks are
+        yielded in order as soon as they are done.
+        """
+        with open(source_file_path, 'rb') as pdf_file:
+            pages_count = len(PyPDF2.PdfReader(pdf_file).pages)
+
+        chunks = [
+            (start_page, min(start_page + self.pages_per_chunk, pages_count))
+            for start_page in range(0, pages_count, self.pages_per_chunk)
+        ]
+        if self.max_workers <= 1 or len(chunks) <= 1:
+            for start_page, end_page in chunks:
+                yield from extract_pages_text(source_file_path, start_page, end_page)
+            return
+
+        for pages_text in self.pool.map(
+            extract_pages_text,
+            [source_file_path] * len(chunks),
+            [start_page for start_page, _ in chunks],
+            [end_page for _, end_page in chunks]
+        ):
+            yield from pages_text
+
     @contextmanager
     def to_txt(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
         with self.io_service.create_temp_txt_file(
             prefix=custom_file_name
         ) as txt_file:
-            with open(source_file_path, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                pdf_text_content = '\n'.join(
-                    page.extract_text() for page in pdf_reader.pages
-                )
-                self.io_service.write_data_to_file(
-                    data=pdf_text_content, file_path=txt_file
-                )
-                yield txt_file
+            with open(txt_file, 'w') as file:
+                for page_number, page_text in enumerate(self.iter_pages_text(source_file_path)):
+                    file.write(f'\n{page_text}' if page_number else page_text)
+            yield txt_file
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool:
+                self._pool.shutdown()
+                self._pool = None
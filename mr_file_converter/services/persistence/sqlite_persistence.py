@@ -0,0 +1,206 @@
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import closing
+from typing import (Any, DefaultDict, Dict, Iterator, MutableMapping, Optional,
+                    Tuple)
+
+from telegram.ext import BasePersistence, ConversationHandler
+from telegram.ext.utils.promise import Promise
+from telegram.ext.utils.types import ConversationDict
+
+logger = logging.getLogger(__name__)
+
+
+def is_pending_state(state: Any) -> bool:
+    return isinstance(state, tuple) and len(state) == 2 and isinstance(state[1], Promise)
+
+
+def get_settled_state(state: Any) -> Any:
+    """
+    Returns the last state that is not pending for the result of an asynchronous stage.
+    """
+    while is_pending_state(state):
+        state = state[0]
+    return state
+
+
+class SQLitePersistence(BasePersistence):
+    """
+    Stores the conversations states and the user data in SQLite, so they survive restarts of the bot and can be shared
+    between several bot processes that use the same database file.
+
+    The conversations are read from the database on every update and the user data is refreshed before every update,
+    so a conversation can move from one bot process to another between its stages.
+    """
+
+    def __init__(self, database_path: str):
+        super().__init__(store_user_data=True, store_chat_data=True, store_bot_data=True)
+        self.database_path = database_path
+        with closing(self._connect()) as connection, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS data ('
+                'scope TEXT NOT NULL, id INTEGER NOT NULL, value BLOB NOT NULL, PRIMARY KEY (scope, id))'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS conversations ('
+                'name TEXT NOT NULL, key TEXT NOT NULL, state BLOB NOT NULL, PRIMARY KEY (name, key))'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection per operation, as the persistence is shared between the dispatcher threads
+        return sqlite3.connect(self.database_path, timeout=30)
+
+    def _get_data(self, scope: str) -> Dict[int, Any]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute('SELECT id, value FROM data WHERE scope = ?', (scope,)).fetchall()
+        return {_id: pickle.loads(value) for _id, value in rows}
+
+    def _get_data_of(self, scope: str, _id: int) -> Any:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                'SELECT value FROM data WHERE scope = ? AND id = ?', (scope, _id)
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def _update_data(self, scope: str, _id: int, data: Any):
+        try:
+            value = pickle.dumps(data)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            logger.warning(f'could not persist the {scope} data of {_id}, error: {e}')
+            return
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO data (scope, id, value) VALUES (?, ?, ?)', (scope, _id, value)
+            )
+
+    @staticmethod
+    def _refresh(data: dict, stored_data: dict | None):
+        if stored_data is not None:
+            data.clear()
+            data.update(stored_data)
+
+    def get_user_data(self) -> DefaultDict[int, dict]:
+        return defaultdict(dict, self._get_data('user'))
+
+    def get_chat_data(self) -> DefaultDict[int, dict]:
+        return defaultdict(dict, self._get_data('chat'))
+
+    def get_bot_data(self) -> dict:
+        return self._get_data_of('bot', 0) or {}
+
+    def update_user_data(self, user_id: int, data: dict):
+        self._update_data('user', user_id, data)
+
+    def update_chat_data(self, chat_id: int, data: dict):
+        self._update_data('chat', chat_id, data)
+
+    def update_bot_data(self, data: dict):
+        self._update_data('bot', 0, data)
+
+    def refresh_user_data(self, user_id: int, user_data: dict):
+        self._refresh(user_data, self._get_data_of('user', user_id))
+
+    def refresh_chat_data(self, chat_id: int, chat_data: dict):
+        self._refresh(chat_data, self._get_data_of('chat', chat_id))
+
+    def refresh_bot_data(self, bot_data: dict):
+        self._refresh(bot_data, self._get_data_of('bot', 0))
+
+    def get_conversations(self, name: str) -> ConversationDict:
+        return SQLiteConversations(self, name)  # type: ignore
+
+    def get_conversation_state(self, name: str, key: Tuple[int, ...]) -> Optional[object]:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                'SELECT state FROM conversations WHERE name = ? AND key = ?', (name, json.dumps(key))
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def get_conversation_keys(self, name: str) -> list:
+        with closing(self._connect()) as connection:
+            rows = connection.execute('SELECT key FROM conversations WHERE name = ?', (name,)).fetchall()
+        return [tuple(json.loads(key)) for key, in rows]
+
+    def store_conversation_state(self, name: str, key: Tuple[int, ...], state: Optional[object]):
+        with closing(self._connect()) as connection, connection:
+            if state is None or state == ConversationHandler.END:
+                connection.execute(
+                    'DELETE FROM conversations WHERE name = ? AND key = ?', (name, json.dumps(key))
+                )
+            else:
+                connection.execute(
+                    'INSERT OR REPLACE INTO conversations (name, key, state) VALUES (?, ?, ?)',
+                    (name, json.dumps(key), pickle.dumps(state))
+                )
+
+    def update_conversation(self, name: str, key: Tuple[int, ...], new_state: Optional[object]):
+        # a stage that is still running asynchronously keeps its previous state, SQLiteConversations stores its
+        # resulting state once it is done.
+        self.store_conversation_state(name, key, get_settled_state(new_state))
+
+    def flush(self):
+        pass
+
+
+class SQLiteConversations(MutableMapping):
+    """
+    The conversations of a single ConversationHandler, read through from the database on every access.
+
+    States of stages that are still running asynchronously hold a Promise which only exists in this process, so they
+    are kept in memory until the result of the promise is stored.
+    """
+
+    def __init__(self, persistence: SQLitePersistence, name: str):
+        self.persistence = persistence
+        self.name = name
+        self._pending: Dict[Tuple[int, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: Tuple[int, ...]) -> Any:
+        with self._lock:
+            if pending_state := self._pending.get(key):
+                if pending_state[1].exception is None:
+                    return pending_state
+                # a failed stage keeps the previous state, which is already stored
+                del self._pending[key]
+
+        if (state := self.persistence.get_conversation_state(self.name, key)) is None:
+            raise KeyError(key)
+        return state
+
+    def __setitem__(self, key: Tuple[int, ...], state: Any):
+        # the state itself is stored in the database by SQLitePersistence.update_conversation
+        with self._lock:
+            if is_pending_state(state):
+                self._pending[key] = state
+            else:
+                self._pending.pop(key, None)
+
+        if is_pending_state(state):
+            old_state, promise = get_settled_state(state[0]), state[1]
+            promise.add_done_callback(
+                lambda result: self._store_result(key, state, old_state if result is None else result)
+            )
+
+    def _store_result(self, key: Tuple[int, ...], pending_state: tuple, new_state: Any):
+        self.persistence.store_conversation_state(self.name, key, new_state)
+        with self._lock:
+            if self._pending.get(key) is pending_state:
+                del self._pending[key]
+
+    def __delitem__(self, key: Tuple[int, ...]):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def __iter__(self) -> Iterator[Tuple[int, ...]]:
+        with self._lock:
+            pending_keys = set(self._pending)
+        return iter(pending_keys | set(self.persistence.get_conversation_keys(self.name)))
+
+    def __len__(self) -> int:
+        return len(list(iter(self)))
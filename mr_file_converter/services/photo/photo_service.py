@@ -1,20 +1,28 @@
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, List
 
 import img2pdf
-import pytesseract
-from PIL import Image
 
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.conversion.file_types import FileTypes
 from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.ocr.ocr_service import OCRService
 
 
 class PhotoService:
 
     def __init__(
         self,
-        io_service: IOService
+        io_service: IOService,
+        ocr_service: OCRService
     ):
         self.io_service = io_service
+        self.ocr_service = ocr_service
+
+    def register_conversions(self, conversion_registry: ConversionRegistry):
+        conversion_registry.register(FileTypes.PHOTO, FileTypes.PDF, self, 'to_pdf', cost=3)
+        conversion_registry.register(FileTypes.PHOTO, FileTypes.TEXT, self, 'to_text', cost=5)
 
     @contextmanager
     def to_pdf(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
@@ -27,14 +35,26 @@ class PhotoService:
             )
             yield pdf_file
 
+    @contextmanager
+    def merge_to_pdf(self, source_file_paths: List[str], custom_file_name: str) -> Generator[str, None, None]:
+        """
+        Merges several photos into a single pdf file, a page for every photo.
+        """
+        with self.io_service.create_temp_pdf_file(
+            prefix=custom_file_name
+        ) as pdf_file:
+            pdf_bytes = img2pdf.convert(source_file_paths)
+            self.io_service.write_data_to_file(
+                data=pdf_bytes, file_path=pdf_file, mode='wb'
+            )
+            yield pdf_file
+
     @contextmanager
     def to_text(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
         with self.io_service.create_temp_txt_file(
             prefix=custom_file_name
         ) as text_file:
-            photo_string = pytesseract.image_to_string(
-                Image.open(source_file_path)
-            )
+            photo_string = self.ocr_service.image_to_text(source_file_path)
             self.io_service.write_data_to_file(
                 data=photo_string, file_path=text_file
             )
@@ -0,0 +1,252 @@
+import base64
+import fcntl
+import json
+import logging
+import os
+import queue
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Generator, List
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class RenderError(Exception):
+    """
+    Raised when the browser fails to render a page.
+    """
+
+
+class ChromeRenderer:
+    """
+    A long-lived headless chrome process that is controlled through the chrome DevTools protocol over pipes.
+
+    The renderer attaches to a single page (tab) once and reuses it for all of its renders, every render navigates the
+    page to the url and captures a screenshot or prints it to PDF.
+    """
+
+    window_size = (1920, 1080)
+    # screenshots of longer pages are cut, as a screenshot of the whole of an endless page never finishes
+    max_capture_height = 16384
+    # moves the pipes to the fds of --remote-debugging-pipe and replaces itself with chrome
+    launcher = (
+        'import os, sys; '
+        'os.dup2(int(sys.argv[1]), 3); os.dup2(int(sys.argv[2]), 4); '
+        'os.close(int(sys.argv[1])); os.close(int(sys.argv[2])); '
+        'os.execv(sys.argv[3], sys.argv[3:])'
+    )
+
+    def __init__(self, chrome_path: str, timeout: float):
+        self.timeout = timeout
+        self.renders_count = 0
+        self.user_data_directory = tempfile.mkdtemp(prefix='renderer')
+        self._message_id = 0
+        self._buffer = bytearray()
+        self._events: List[Dict[str, Any]] = []
+        self._session_id: str | None = None
+        self._deadline = time.monotonic() + timeout
+
+        # chrome reads the commands from fd 3 and writes the responses to fd 4, its ends of the pipes are moved above
+        # fd 10 first, so moving them to fds 3 and 4 in the launched process cannot override one of them.
+        pipe_read_fd, self._write_fd = os.pipe()
+        self._read_fd, pipe_write_fd = os.pipe()
+        browser_read_fd = fcntl.fcntl(pipe_read_fd, fcntl.F_DUPFD, 10)
+        browser_write_fd = fcntl.fcntl(pipe_write_fd, fcntl.F_DUPFD, 10)
+        os.close(pipe_read_fd)
+        os.close(pipe_write_fd)
+        try:
+            self.process = subprocess.Popen(
+                [
+                    sys.executable, '-c', self.launcher, str(browser_read_fd), str(browser_write_fd),
+                    chrome_path,
+                    '--headless=new',
+                    '--remote-debugging-pipe',
+                    '--no-sandbox',
+                    '--disable-gpu',
+                    '--disable-dev-shm-usage',
+                    '--hide-scrollbars',
+                    '--no-first-run',
+                    f'--window-size={self.window_size[0]},{self.window_size[1]}',
+                    f'--user-data-dir={self.user_data_directory}'
+                ],
+                pass_fds=(browser_read_fd, browser_write_fd),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        finally:
+            os.close(browser_read_fd)
+            os.close(browser_write_fd)
+
+        try:
+            target_id = self.send('Target.createTarget', {'url': 'about:blank'})['targetId']
+            self._session_id = self.send('Target.attachToTarget', {'targetId': target_id, 'flatten': True})['sessionId']
+            self.send('Page.enable')
+        except Exception:
+            self.close()
+            raise
+
+    def receive(self) -> Dict[str, Any]:
+        while (end := self._buffer.find(b'\0')) == -1:
+            remaining = self._deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self._read_fd], [], [], remaining)[0]:
+                raise TimeoutError(f'the browser did not respond within {self.timeout} seconds')
+            if not (chunk := os.read(self._read_fd, 1024 * 1024)):
+                raise RenderError('the browser has exited')
+            self._buffer += chunk
+        message = json.loads(self._buffer[:end])
+        del self._buffer[:end + 1]
+        return message
+
+    def send(self, method: str, params: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        """
+        Sends a command to the page (or to the browser before a page is attached) and returns its result.
+        """
+        self._message_id += 1
+        message: Dict[str, Any] = {'id': self._message_id, 'method': method, 'params': params or {}}
+        if self._session_id:
+            message['sessionId'] = self._session_id
+
+        data = json.dumps(message).encode() + b'\0'
+        while data:
+            data = data[os.write(self._write_fd, data):]
+
+        while (response := self.receive()).get('id') != self._message_id:
+            if 'method' in response:
+                self._events.append(response)
+        if 'error' in response:
+            raise RenderError(f"{method} failed, error: {response['error'].get('message')}")
+        return response['result']
+
+    def wait_for_event(self, method: str) -> Dict[str, Any]:
+        while True:
+            for event in self._events:
+                if event['method'] == method and event.get('sessionId') == self._session_id:
+                    self._events.remove(event)
+                    return event
+            self._events.append(self.receive())
+
+    def render(self, url: str, file_path: str, output_format: str):
+        """
+        Renders the url into a png/jpeg screenshot of the whole page, or into a pdf.
+        """
+        self._deadline = time.monotonic() + self.timeout
+        self._events.clear()
+        self.renders_count += 1
+
+        if error := self.send('Page.navigate', {'url': url}).get('errorText'):
+            raise RenderError(f'failed to load {url}, error: {error}')
+        self.wait_for_event('Page.loadEventFired')
+
+        if output_format == 'pdf':
+            data = self.send('Page.printToPDF', {'printBackground': True})['data']
+        else:
+            content_size = self.send('Page.getLayoutMetrics')['cssContentSize']
+            data = self.send(
+                'Page.captureScreenshot',
+                {
+                    'format': output_format,
+                    'captureBeyondViewport': True,
+                    'clip': {
+                        'x': 0,
+                        'y': 0,
+                        'width': max(content_size['width'], self.window_size[0]),
+                        'height': min(max(content_size['height'], 1), self.max_capture_height),
+                        'scale': 1
+                    }
+                }
+            )['data']
+
+        with open(file_path, 'wb') as file:
+            file.write(base64.b64decode(data))
+
+    def close(self):
+        try:
+            self._session_id = None
+            self._deadline = time.monotonic() + 1
+            self.send('Browser.close')
+        except Exception as e:
+            logger.debug(f'failed to close the browser gracefully, error: {e}')
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        finally:
+            os.close(self._read_fd)
+            os.close(self._write_fd)
+            shutil.rmtree(self.user_data_directory, ignore_errors=True)
+
+
+class RendererService:
+    """
+    Renders html files and urls into images and pdf files with a bounded pool of long-lived headless browsers.
+
+    Browsers are started on demand up to pool_size and are reused between renders. A browser is recycled (closed and
+    replaced by a new one on demand) after max_renders renders, or as soon as a render fails or times out.
+    """
+
+    chrome_names = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+    url_schemes = ('http', 'https')
+
+    def __init__(self, chrome_path: str | None, pool_size: int, max_renders: int, render_timeout: float):
+        self.chrome_path = chrome_path
+        self.max_renders = max_renders
+        self.render_timeout = render_timeout
+        self._idle_renderers: queue.LifoQueue[ChromeRenderer] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def get_chrome_path(self) -> str:
+        if not self.chrome_path:
+            self.chrome_path = next(filter(None, map(shutil.which, self.chrome_names)), None)
+            if not self.chrome_path:
+                raise RenderError('could not find chrome, please set CHROME_BIN')
+        return self.chrome_path
+
+    @contextmanager
+    def renderer(self) -> Generator[ChromeRenderer, None, None]:
+        with self._slots:
+            try:
+                renderer = self._idle_renderers.get_nowait()
+            except queue.Empty:
+                renderer = ChromeRenderer(self.get_chrome_path(), timeout=self.render_timeout)
+
+            try:
+                yield renderer
+            except Exception:
+                renderer.close()
+                raise
+            if renderer.renders_count >= self.max_renders:
+                renderer.close()
+            else:
+                self._idle_renderers.put(renderer)
+
+    def _render(self, url: str, file_path: str, output_format: str):
+        with self.renderer() as renderer:
+            renderer.render(url, file_path=file_path, output_format=output_format)
+
+    def render(self, url: str, file_path: str, output_format: str):
+        """
+        Renders a web page, only http/https urls are rendered so that no local file can be read through the browser.
+        """
+        if urlparse(url).scheme.lower() not in self.url_schemes:
+            raise RenderError(f'only http/https urls can be rendered, got {url}')
+        self._render(url, file_path=file_path, output_format=output_format)
+
+    def render_file(self, source_file_path: str, file_path: str, output_format: str):
+        self._render(Path(source_file_path).resolve().as_uri(), file_path=file_path, output_format=output_format)
+
+    def shutdown(self):
+        while True:
+            try:
+                self._idle_renderers.get_nowait().close()
+            except queue.Empty:
+                return
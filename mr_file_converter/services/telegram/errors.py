@@ -0,0 +1,17 @@
+from mr_file_converter.base_error import FileConverterException
+
+
+class FileTooLarge(FileConverterException):
+
+    def __init__(
+        self,
+        max_file_size_bytes: int,
+        next_stage: int | None = None,
+        original_exception: Exception | None = None
+    ):
+        super().__init__(
+            original_exception=original_exception,
+            next_stage=next_stage,
+            error_message=f'The file is too large, files of up to {max_file_size_bytes / (1024 * 1024):g} MB '
+                          f'can be converted'
+        )
@@ -0,0 +1,125 @@
+import logging
+import os
+import threading
+import time
+
+import certifi
+from telegram import Bot
+from telegram.error import NetworkError
+from telegram.ext import Updater
+
+from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.telegram.errors import FileTooLarge
+
+try:
+    # the urllib3 that python-telegram-bot vendors for its own requests
+    import telegram.vendor.ptb_urllib3.urllib3 as urllib3
+except ImportError:
+    import urllib3  # type: ignore[no-redef]
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramFileDownloadService:
+    """
+    Downloads files from telegram in chunks, every file into a job directory of its own under the downloads directory.
+
+    All the downloads share a pool of HTTP connections, so up to max_concurrent_downloads files are downloaded
+    concurrently. Files that are larger than max_file_size_bytes are rejected before they are downloaded, and job
+    directories that were left behind (e.g. by a crash) are removed once they are older than orphan_max_age_seconds.
+    """
+
+    chunk_size = 1024 * 1024
+    sweep_interval_seconds = 60 * 60
+
+    def __init__(
+        self,
+        io_service: IOService,
+        downloads_directory: str,
+        max_file_size_bytes: int,
+        max_concurrent_downloads: int,
+        orphan_max_age_seconds: float,
+        updater: Updater | None = None,
+        bot: Bot | None = None
+    ):
+        self.bot = bot or updater.bot  # type: ignore
+        self.io_service = io_service
+        self.downloads_directory = os.path.abspath(downloads_directory)
+        self.max_file_size_bytes = max_file_size_bytes
+        self.orphan_max_age_seconds = orphan_max_age_seconds
+        self.http = urllib3.PoolManager(
+            maxsize=max_concurrent_downloads,
+            # downloads wait for a free connection instead of opening connections outside of the pool
+            block=True,
+            cert_reqs='CERT_REQUIRED',
+            ca_certs=certifi.where(),
+            timeout=urllib3.Timeout(connect=10, read=60)
+        )
+        self._next_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+        self.remove_orphans()
+
+    def check_file_size(self, file_size: int | None):
+        if file_size and file_size > self.max_file_size_bytes:
+            raise FileTooLarge(max_file_size_bytes=self.max_file_size_bytes)
+
+    def remove_orphans(self):
+        with self._sweep_lock:
+            if time.monotonic() < self._next_sweep:
+                return
+            self._next_sweep = time.monotonic() + self.sweep_interval_seconds
+        if removed_count := self.io_service.remove_stale_job_directories(
+            self.downloads_directory, max_age_seconds=self.orphan_max_age_seconds
+        ):
+            logger.info(f'removed {removed_count} orphaned downloads from {self.downloads_directory}')
+
+    def download(self, file_id: str, file_size: int | None = None) -> str:
+        """
+        Downloads a file by its file_id and returns its path, the file keeps the name telegram stores it under.
+
+        Args:
+            file_id: the file_id of the file to download.
+            file_size: the size of the file as telegram reported it in the message, if known.
+        """
+        self.check_file_size(file_size)
+        self.remove_orphans()
+
+        telegram_file = self.bot.get_file(file_id=file_id)
+        self.check_file_size(telegram_file.file_size)
+
+        job_directory = self.io_service.make_job_directory(self.downloads_directory)
+        file_path = os.path.join(job_directory, os.path.basename(telegram_file.file_path))
+        try:
+            response = self.http.request('GET', telegram_file.file_path, preload_content=False)
+            try:
+                if response.status != 200:
+                    raise NetworkError(f'failed to download the file {file_id}, status code: {response.status}')
+                downloaded_size = 0
+                with open(file_path, 'wb') as file:
+                    for chunk in response.stream(self.chunk_size):
+                        downloaded_size += len(chunk)
+                        # the reported size is not always known, so the size limit is enforced while downloading too
+                        self.check_file_size(downloaded_size)
+                        file.write(chunk)
+            except Exception:
+                # the rest of the response is not read, so the connection cannot be reused as is
+                response.close()
+                raise
+            finally:
+                response.release_conn()
+        except Exception:
+            self.io_service.remove_job_directory(job_directory)
+            raise
+
+        logger.debug(f'downloaded the file {file_id} into {file_path}')
+        return file_path
+
+    def remove(self, file_path: str):
+        """
+        Removes a downloaded file along with its job directory.
+        """
+        job_directory = os.path.dirname(os.path.abspath(file_path))
+        if os.path.dirname(job_directory) == self.downloads_directory:
+            self.io_service.remove_job_directory(job_directory)
+        else:
+            self.io_service.remove_file(file_path)
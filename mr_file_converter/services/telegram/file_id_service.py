@@ -0,0 +1,46 @@
+import logging
+import sqlite3
+from contextlib import closing
+
+from mr_file_converter.services.io.io_service import IOService
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramFileIdService:
+    """
+    This service keeps a persistent mapping between the content of files that were already uploaded to telegram and
+    the file_id that telegram returned for them, so identical files can be sent again without uploading them.
+    """
+
+    def __init__(self, database_path: str):
+        self.database_path = database_path
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS file_ids (key TEXT PRIMARY KEY, file_id TEXT NOT NULL)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection per operation, as the service is shared between the dispatcher threads
+        return sqlite3.connect(self.database_path, timeout=30)
+
+    @staticmethod
+    def get_key(file_path: str, *qualifiers: str) -> str:
+        return ':'.join((IOService.hash_file(file_path), *qualifiers))
+
+    def get(self, key: str) -> str | None:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                'SELECT file_id FROM file_ids WHERE key = ?', (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, file_id: str):
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO file_ids (key, file_id) VALUES (?, ?)', (key, file_id)
+            )
+
+    def delete(self, key: str):
+        with closing(self._connect()) as connection, connection:
+            connection.execute('DELETE FROM file_ids WHERE key = ?', (key,))
@@ -0,0 +1,98 @@
+import json
+import logging
+import uuid
+from typing import Any, Generator, Iterable
+
+import certifi
+from telegram import Bot, Message
+from telegram.error import BadRequest, NetworkError
+from telegram.ext import Updater
+
+try:
+    # the urllib3 that python-telegram-bot vendors for its own requests
+    import telegram.vendor.ptb_urllib3.urllib3 as urllib3
+    from telegram.vendor.ptb_urllib3.urllib3.fields import format_header_param
+except ImportError:
+    import urllib3  # type: ignore[no-redef]
+    from urllib3.fields import format_header_param  # type: ignore[no-redef]
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramFileUploadService:
+    """
+    Uploads files to telegram from a stream of chunks, so a file can be uploaded while it is still being produced
+    (e.g. downloaded).
+
+    The bot api client of python-telegram-bot reads a whole file into memory before it uploads it, so the multipart
+    request is sent here with chunked transfer encoding instead, chunk by chunk as the chunks arrive. All the uploads
+    share a pool of HTTP connections, so up to max_concurrent_uploads files are uploaded concurrently.
+    """
+
+    def __init__(self, max_concurrent_uploads: int, updater: Updater | None = None, bot: Bot | None = None):
+        self.bot = bot or updater.bot  # type: ignore
+        self.http = urllib3.PoolManager(
+            maxsize=max_concurrent_uploads,
+            block=True,
+            cert_reqs='CERT_REQUIRED',
+            ca_certs=certifi.where(),
+            # the socket is idle whenever the chunks arrive slower than they are sent
+            timeout=urllib3.Timeout(connect=10, read=300)
+        )
+
+    @staticmethod
+    def get_multipart_body(
+        boundary: str, field: str, file_name: str, chunks: Iterable[bytes], params: dict
+    ) -> Generator[bytes, None, None]:
+        for name, value in params.items():
+            if isinstance(value, bool):
+                value = json.dumps(value)
+            yield (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            ).encode()
+        yield (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+            f'{format_header_param("filename", file_name)}\r\nContent-Type: application/octet-stream\r\n\r\n'
+        ).encode()
+        yield from chunks
+        yield f'\r\n--{boundary}--\r\n'.encode()
+
+    def upload(self, method: str, field: str, file_name: str, chunks: Iterable[bytes], **params: Any) -> Message:
+        """
+        Sends a file by a method of the bot api such as sendVideo, and returns the message that was sent.
+
+        Args:
+            method: the method of the bot api that sends the file.
+            field: the field of the method that holds the file, such as video.
+            file_name: the name of the file in telegram.
+            chunks: the content of the file.
+            params: the rest of the params of the method, params that are None are not sent.
+        """
+        boundary = uuid.uuid4().hex
+        response = self.http.urlopen(
+            'POST',
+            f'{self.bot.base_url}/{method}',
+            body=self.get_multipart_body(
+                boundary,
+                field,
+                file_name,
+                chunks,
+                params={name: value for name, value in params.items() if value is not None}
+            ),
+            headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+            chunked=True,
+            # the chunks cannot be sent twice
+            retries=False
+        )
+
+        try:
+            data = json.loads(response.data.decode('utf-8'))
+        except ValueError as e:
+            raise NetworkError(f'invalid response of {method}, status code: {response.status}') from e
+
+        if not data.get('ok'):
+            description = data.get('description') or f'{method} failed with status code {response.status}'
+            raise BadRequest(description) if response.status == 400 else NetworkError(description)
+
+        logger.debug(f'uploaded {file_name} with {method}')
+        return Message.de_json(data['result'], self.bot)  # type: ignore
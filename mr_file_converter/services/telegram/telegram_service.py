@@ -1,19 +1,51 @@
-from typing import IO, List, Tuple, Union
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import IO, Any, Callable, Dict, Iterable, List, Tuple, Union
 
 from telegram import (Bot, CallbackQuery, InlineKeyboardButton,
-                      InlineKeyboardMarkup, Message, ReplyMarkup, Update)
+                      InlineKeyboardMarkup, InputMediaDocument, Message,
+                      PhotoSize, ReplyMarkup, Update)
+from telegram.error import BadRequest
 from telegram.ext import Updater
 from telegram.utils.types import ODVInput
 
+from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.telegram.file_download_service import \
+    TelegramFileDownloadService
+from mr_file_converter.services.telegram.file_id_service import \
+    TelegramFileIdService
+from mr_file_converter.services.telegram.file_upload_service import \
+    TelegramFileUploadService
+
+logger = logging.getLogger(__name__)
+
 
 class TelegramService:
     """
     This service is responsible for the communication with the telegram bot api as well as to provide any telegram
     object that can be utilized in other services.
     """
+    # the minimum length of the shorter side of a photo that a target format needs (such as a preview), formats that
+    # are not listed need every pixel of the photo (OCR, pdf) and get its largest size.
+    photo_min_sides: Dict[str, int] = {}
 
-    def __init__(self, updater: Updater | None = None, bot: Bot | None = None):
+    def __init__(
+        self,
+        updater: Updater | None = None,
+        bot: Bot | None = None,
+        file_id_service: TelegramFileIdService | None = None,
+        download_service: TelegramFileDownloadService | None = None,
+        upload_service: TelegramFileUploadService | None = None
+    ):
         self.bot = bot or updater.bot  # type: ignore
+        self.file_id_service = file_id_service
+        self.download_service = download_service
+        self.upload_service = upload_service
+
+    @property
+    def can_stream_files(self) -> bool:
+        return self.upload_service is not None
 
     @staticmethod
     def get_callback_query(update: Update) -> CallbackQuery | None:
@@ -34,6 +66,11 @@ class TelegramService:
     def get_chat_id(self, update: Update, reply_to_message_id: bool = False) -> int:
         return self.get_message(update, reply_to_message_id).chat_id
 
+    @staticmethod
+    def get_user_id(update: Update) -> int:
+        # the message of a callback query is the message of the bot, so the user is taken from the update itself
+        return update.effective_user.id
+
     def get_user_first_and_last_name(self, update: Update) -> Tuple[str, str]:
         message = self.get_message(update)
         return message.from_user.first_name, message.from_user.last_name
@@ -48,6 +85,25 @@ class TelegramService:
             ]
         )
 
+    @staticmethod
+    def get_multi_select_keyboard(buttons: List[str], selected: List[str], done_button: str) -> InlineKeyboardMarkup:
+        """
+        Returns a keyboard whose buttons can be toggled, the selected buttons are marked, and a button to finish the
+        selection.
+        """
+        return InlineKeyboardMarkup(
+            [
+                [
+                    InlineKeyboardButton(
+                        text=f'✅ {button}' if button in selected else button, callback_data=button
+                    ) for button in buttons
+                ],
+                [
+                    InlineKeyboardButton(text=done_button, callback_data=done_button)
+                ]
+            ]
+        )
+
     def send_message(
         self, update: Update, text: str, parse_mode: ODVInput[str] = None, reply_markup: ReplyMarkup = None
     ) -> Message:
@@ -72,36 +128,221 @@ class TelegramService:
             message_id=self.get_message_id(update)
         )
 
+    def edit_message_reply_markup(self, update: Update, reply_markup: InlineKeyboardMarkup) -> Union[Message, bool]:
+        return self.bot.edit_message_reply_markup(
+            chat_id=self.get_chat_id(update),
+            message_id=self.get_message_id(update),
+            reply_markup=reply_markup
+        )
+
     def get_message_data(self, update: Update) -> str:
         if callback_query := self.get_callback_query(update):
             return callback_query.data
         return self.get_message(update).text
 
-    def get_file(self, update: Update) -> Union[str, IO]:
-        message = self.get_message(update)
-        file_id = message.document.file_id if message.document else message.photo[0].file_id
-        return self.bot.get_file(file_id=file_id).download()
+    @classmethod
+    def select_photo_size(
+        cls, photo_sizes: List[PhotoSize], target_format: str | None = None, max_file_size: int | None = None
+    ) -> PhotoSize:
+        """
+        Selects the size of a photo to download for the target format, by the metadata of the sizes that telegram sends
+        along with the photo: the smallest size that is large enough for the format, or else the largest size. Sizes
+        larger than max_file_size are not selected, unless no size is small enough.
+        """
+        def get_area(photo_size: PhotoSize) -> int:
+            return photo_size.width * photo_size.height
+
+        if max_file_size:
+            photo_sizes = [
+                photo_size for photo_size in photo_sizes if (photo_size.file_size or 0) <= max_file_size
+            ] or photo_sizes
+
+        largest_size = max(photo_sizes, key=get_area)
+        if not (min_side := cls.photo_min_sides.get(target_format)):  # type: ignore
+            return largest_size
+        return min(
+            (photo_size for photo_size in photo_sizes if min(photo_size.width, photo_size.height) >= min_side),
+            key=get_area,
+            default=largest_size
+        )
+
+    def download_file(self, message: Message, target_format: str | None = None) -> str:
+        """
+        Downloads the document or the photo of a message, a photo in the size that suits the target format, and returns
+        the path of the downloaded file.
+        """
+        attachment = message.document or self.select_photo_size(
+            message.photo,
+            target_format=target_format,
+            max_file_size=self.download_service.max_file_size_bytes if self.download_service else None
+        )
+        if self.download_service:
+            return self.download_service.download(attachment.file_id, file_size=attachment.file_size)
+        # without an out file object, telegram writes the file to disk and returns its path
+        return str(self.bot.get_file(file_id=attachment.file_id).download())
+
+    def get_file(self, update: Update) -> str:
+        return self.download_file(self.get_message(update))
+
+    def get_files(self, messages: List[Message]) -> List[str]:
+        """
+        Downloads the files of several messages concurrently.
+        """
+        with ThreadPoolExecutor(max_workers=len(messages) or 1) as executor:
+            return list(executor.map(self.download_file, messages))
+
+    def remove_downloaded_file(self, file_path: str):
+        if self.download_service:
+            self.download_service.remove(file_path)
+        else:
+            IOService.remove_file(file_path)
+
+    def send_uploaded_file(self, file_path: str, send: Callable[[Any], Message], *key_qualifiers: str) -> Message:
+        """
+        Sends a file by the file_id of a previous upload of the same content, and uploads it only if it was never sent.
+
+        Args:
+            file_path: the path of the file to send.
+            send: sends the given file object / file_id to telegram.
+            key_qualifiers: anything besides the content that a previous upload must match, such as the file name.
+        """
+        if not self.file_id_service:
+            with open(file_path, 'rb') as file:
+                return send(file)
+
+        key = self.file_id_service.get_key(file_path, *key_qualifiers)
+        if file_id := self.file_id_service.get(key):
+            try:
+                return send(file_id)
+            except BadRequest as e:
+                logger.warning(f'could not send {file_path} by file_id {file_id}, uploading it again. Error: {e}')
+                self.file_id_service.delete(key)
+
+        with open(file_path, 'rb') as file:
+            message = send(file)
+        if attachment := message.effective_attachment:
+            self.file_id_service.set(key, attachment.file_id)  # type: ignore
+        return message
 
     def send_file(self, update: Update, document_path: str, file_name: str) -> Message:
-        with open(document_path, 'rb') as document:
-            return self.bot.send_document(
+        return self.send_uploaded_file(
+            document_path,
+            lambda document: self.bot.send_document(
                 chat_id=self.get_chat_id(update),
                 document=document,
                 filename=file_name
-            )
+            ),
+            'document',
+            file_name
+        )
+
+    def send_files(self, update: Update, files: Dict[str, str]) -> List[Message]:
+        """
+        Sends several files ({file name: path}) together as a single album of documents. As in send_file, every file
+        is sent by the file_id of a previous upload of the same content and name, and uploaded only if it was never
+        sent.
+        """
+        def send(file_ids: Dict[str, str]) -> List[Message]:
+            with ExitStack() as opened_files:
+                messages = self.bot.send_media_group(
+                    chat_id=self.get_chat_id(update),
+                    media=[
+                        InputMediaDocument(
+                            media=file_ids.get(file_name) or opened_files.enter_context(open(file_path, 'rb')),
+                            filename=file_name
+                        )
+                        for file_name, file_path in files.items()
+                    ]
+                )
+            return messages
+
+        if not self.file_id_service:
+            return send({})
+
+        keys = {
+            file_name: self.file_id_service.get_key(file_path, 'document', file_name)
+            for file_name, file_path in files.items()
+        }
+        file_ids = {file_name: file_id for file_name, key in keys.items() if (file_id := self.file_id_service.get(key))}
+        try:
+            messages = send(file_ids)
+        except BadRequest as e:
+            if not file_ids:
+                raise
+            logger.warning(f'could not send {list(file_ids)} by their file_ids, uploading them again. Error: {e}')
+            for file_name in file_ids:
+                self.file_id_service.delete(keys[file_name])
+            file_ids = {}
+            messages = send(file_ids)
+
+        for (file_name, key), message in zip(keys.items(), messages):
+            if file_name not in file_ids and (attachment := message.effective_attachment):
+                self.file_id_service.set(key, attachment.file_id)  # type: ignore
+        return messages
 
     def send_audio(self, update: Update, audio_file_path: str, reply_to_message_id: int | None = None) -> Message:
-        with open(audio_file_path, 'rb') as audio:
-            return self.bot.send_audio(
+        return self.send_uploaded_file(
+            audio_file_path,
+            lambda audio: self.bot.send_audio(
                 chat_id=self.get_chat_id(update),
-                audio=audio,  # type: ignore
+                audio=audio,
                 reply_to_message_id=reply_to_message_id
-            )
+            ),
+            'audio'
+        )
+
+    def send_audio_file_id(self, update: Update, file_id: str, reply_to_message_id: int | None = None) -> Message:
+        return self.bot.send_audio(
+            chat_id=self.get_chat_id(update),
+            audio=file_id,
+            reply_to_message_id=reply_to_message_id
+        )
 
     def send_video(self, update: Update, video_file_path: str, reply_to_message_id: int | None = None) -> Message:
-        with open(video_file_path, 'rb') as video:
-            return self.bot.send_video(
+        return self.send_uploaded_file(
+            video_file_path,
+            lambda video: self.bot.send_video(
                 chat_id=self.get_chat_id(update),
-                video=video,  # type: ignore
+                video=video,
                 reply_to_message_id=reply_to_message_id
-            )
+            ),
+            'video'
+        )
+
+    def send_video_file_id(self, update: Update, file_id: str, reply_to_message_id: int | None = None) -> Message:
+        return self.bot.send_video(
+            chat_id=self.get_chat_id(update),
+            video=file_id,
+            reply_to_message_id=reply_to_message_id
+        )
+
+    def stream_audio(
+        self, update: Update, file_name: str, chunks: Iterable[bytes], reply_to_message_id: int | None = None
+    ) -> Message:
+        """
+        Sends an audio while its content is still being produced, chunk by chunk.
+        """
+        return self.upload_service.upload(  # type: ignore
+            'sendAudio',
+            'audio',
+            file_name,
+            chunks,
+            chat_id=self.get_chat_id(update),
+            reply_to_message_id=reply_to_message_id
+        )
+
+    def stream_video(
+        self, update: Update, file_name: str, chunks: Iterable[bytes], reply_to_message_id: int | None = None
+    ) -> Message:
+        """
+        Sends a video while its content is still being produced, chunk by chunk.
+        """
+        return self.upload_service.upload(  # type: ignore
+            'sendVideo',
+            'video',
+            file_name,
+            chunks,
+            chat_id=self.get_chat_id(update),
+            reply_to_message_id=reply_to_message_id,
+            supports_streaming=True
+        )
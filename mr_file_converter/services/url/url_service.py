@@ -1,30 +1,46 @@
 from contextlib import contextmanager
 from typing import Generator
+from urllib.parse import urlparse
 from urllib.request import urlopen
 
-import imgkit
-import pdfkit
 from bs4 import BeautifulSoup
 
 from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.renderer.renderer_service import \
+    RendererService
 
 
 class URLService:
 
+    url_schemes = ('http', 'https')
+
     def __init__(
         self,
         io_service: IOService,
+        renderer_service: RendererService
     ):
         self.io_service = io_service
+        self.renderer_service = renderer_service
+
+    @classmethod
+    def validate_url(cls, url: str):
+        """
+        Validates that the url is a web url, so that no local file (e.g. file:///proc/self/environ) can be read.
+        """
+        parsed_url = urlparse(url)
+        if parsed_url.scheme.lower() not in cls.url_schemes or not parsed_url.hostname:
+            raise ValueError(f'the url {url} must be an http/https url')
 
     @contextmanager
     def to_pdf(self, url: str, custom_file_name: str) -> Generator[str, None, None]:
+        self.validate_url(url)
         with self.io_service.create_temp_pdf_file(prefix=custom_file_name) as pdf_file:
-            pdfkit.from_url(url, pdf_file)
+            self.renderer_service.render(url, file_path=pdf_file, output_format='pdf')
             yield pdf_file
 
     @contextmanager
     def to_html(self, url: str, custom_file_name: str) -> Generator[str, None, None]:
+        self.validate_url(url)
         with self.io_service.create_temp_html_file(
             prefix=custom_file_name
         ) as html_file:
@@ -35,16 +51,18 @@ class URLService:
 
     @contextmanager
     def to_png(self, url: str, custom_file_name: str) -> Generator[str, None, None]:
+        self.validate_url(url)
         with self.io_service.create_temp_png_file(
             prefix=custom_file_name
         ) as png_file:
-            imgkit.from_url(url, png_file)
+            self.renderer_service.render(url, file_path=png_file, output_format='png')
             yield png_file
 
     @contextmanager
     def to_jpg(self, url: str, custom_file_name: str) -> Generator[str, None, None]:
+        self.validate_url(url)
         with self.io_service.create_temp_jpg_file(
             prefix=custom_file_name
         ) as jpg_file:
-            imgkit.from_url(url, jpg_file)
+            self.renderer_service.render(url, file_path=jpg_file, output_format='jpeg')
             yield jpg_file
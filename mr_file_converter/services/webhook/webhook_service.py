@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from threading import Thread
+from typing import Dict, List
+
+from telegram import Update
+from telegram.ext import Updater
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookService:
+    """
+    This service receives the telegram updates through an HTTP endpoint (webhook mode) instead of polling for them.
+
+    The HTTP front end runs on an asyncio event loop and puts every update into a bounded queue, a configurable amount of
+    workers take the updates from the queue and process them with the dispatcher. When the queue is full the update is
+    rejected with 503, so telegram retries to deliver it later.
+
+    PTB's own Updater.start_webhook is not used as it neither checks the secret token of telegram nor pushes back on
+    telegram once the bot falls behind.
+    """
+
+    max_body_size = 1024 * 1024
+    retry_after_seconds = 1
+    # a client has to send its whole request within this time, so slow clients cannot hold connections forever
+    request_timeout_seconds = 10.0
+    # the most simultaneous connections telegram accepts for a webhook
+    max_telegram_connections = 100
+
+    def __init__(
+        self,
+        updater: Updater,
+        webhook_url: str | None,
+        listen: str,
+        port: int,
+        url_path: str,
+        workers: int,
+        max_queue_size: int,
+        max_connections: int = 40,
+        secret_token: str | None = None
+    ):
+        self.updater = updater
+        self.webhook_url = webhook_url
+        self.listen = listen
+        self.port = port
+        self.url_path = url_path if url_path.startswith('/') else f'/{url_path}'
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.max_connections = min(max_connections, self.max_telegram_connections)
+        self.secret_token = secret_token
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='webhook')
+        # created inside the event loop of the server
+        self.queue: asyncio.Queue | None = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def validate(self):
+        if not self.webhook_url:
+            raise ValueError('WEBHOOK_URL must be set to run the bot in webhook mode')
+        if not self.webhook_url.startswith('https://'):
+            raise ValueError(f'WEBHOOK_URL {self.webhook_url} must be an https url')
+        if self.max_connections < 1:
+            raise ValueError(f'the max connections of the webhook must be 1-{self.max_telegram_connections}')
+        if self.max_queue_size < 1:
+            raise ValueError('the max queue size of the webhook must be at least 1')
+
+    def run(self):
+        """
+        Registers the webhook in telegram and serves the HTTP endpoint until the process is interrupted.
+        """
+        self.validate()
+        self.updater.bot.set_webhook(
+            url=self.webhook_url,
+            max_connections=self.max_connections,
+            secret_token=self.secret_token
+        )
+        # the dispatcher thread runs the asynchronous handlers of the conversations
+        Thread(target=self.updater.dispatcher.start, name='dispatcher', daemon=True).start()
+        self.updater.job_queue.start()
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            logger.info('stopping the webhook server')
+        finally:
+            self.updater.job_queue.stop()
+            self.updater.dispatcher.stop()
+            self.executor.shutdown()
+
+    async def serve(self):
+        server = await self.start_server()
+        async with server:
+            await server.serve_forever()
+
+    async def start_server(self) -> asyncio.AbstractServer:
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._worker_tasks = [
+            asyncio.create_task(self.process_updates()) for _ in range(self.workers)
+        ]
+        server = await asyncio.start_server(self.handle_request, self.listen, self.port)
+        logger.info(f'listening for telegram updates on {self.listen}:{self.port}{self.url_path}')
+        return server
+
+    async def stop_workers(self):
+        for worker_task in self._worker_tasks:
+            worker_task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def process_updates(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            update = await self.queue.get()  # type: ignore
+            try:
+                await loop.run_in_executor(self.executor, self.updater.dispatcher.process_update, update)
+            except Exception as e:
+                logger.error(f'failed to process update {update.update_id}, error: {e}')
+            finally:
+                self.queue.task_done()  # type: ignore
+
+    async def handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            status = await asyncio.wait_for(self.receive_update(reader), timeout=self.request_timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.debug('a webhook request was not received in time')
+            status = HTTPStatus.REQUEST_TIMEOUT
+        except (asyncio.IncompleteReadError, ValueError, UnicodeDecodeError) as e:
+            logger.debug(f'received an invalid webhook request, error: {e}')
+            status = HTTPStatus.BAD_REQUEST
+
+        headers = f'HTTP/1.1 {status.value} {status.phrase}\r\nContent-Length: 0\r\nConnection: close\r\n'
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            headers += f'Retry-After: {self.retry_after_seconds}\r\n'
+        writer.write(f'{headers}\r\n'.encode())
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return headers
+
+    async def receive_update(self, reader: asyncio.StreamReader) -> HTTPStatus:
+        method, path, _ = (await reader.readline()).decode('latin-1').split(' ', 2)
+        headers = await self.read_headers(reader)
+
+        if path != self.url_path:
+            return HTTPStatus.NOT_FOUND
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED
+        if self.secret_token and headers.get('x-telegram-bot-api-secret-token') != self.secret_token:
+            return HTTPStatus.FORBIDDEN
+        if 'content-length' not in headers:
+            return HTTPStatus.LENGTH_REQUIRED
+        if (content_length := int(headers['content-length'])) > self.max_body_size:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        if content_length < 0:
+            return HTTPStatus.BAD_REQUEST
+
+        if not isinstance(data := json.loads(await reader.readexactly(content_length)), dict):
+            return HTTPStatus.BAD_REQUEST
+        try:
+            update = Update.de_json(data, self.updater.bot)
+        except (TypeError, KeyError, AttributeError) as e:
+            logger.debug(f'received an invalid telegram update, error: {e}')
+            return HTTPStatus.BAD_REQUEST
+        if not update:
+            return HTTPStatus.BAD_REQUEST
+
+        try:
+            self.queue.put_nowait(update)  # type: ignore
+        except asyncio.QueueFull:
+            logger.warning(f'the update queue is full, rejecting update {update.update_id}')
+            return HTTPStatus.SERVICE_UNAVAILABLE
+        return HTTPStatus.OK
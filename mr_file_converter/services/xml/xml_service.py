@@ -1,24 +1,36 @@
+import os
 from contextlib import contextmanager
 from typing import Generator
 
-from mr_file_converter.converters import (JsonConverter, XMLConverter,
-                                          YamlConverter)
+from mr_file_converter.converters import (JsonConverter, ParsedDocument,
+                                          XMLConverter, YamlConverter)
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.conversion.file_types import FileTypes
 from mr_file_converter.services.io.io_service import IOService
 
 
 class XMLService:
 
+    default_streaming_threshold_bytes = 50 * 1024 * 1024
+
     def __init__(
         self,
         io_service: IOService,
         json_converter: JsonConverter,
         yml_converter: YamlConverter,
-        xml_converter: XMLConverter
+        xml_converter: XMLConverter,
+        streaming_threshold_bytes: int = default_streaming_threshold_bytes
     ):
         self.io_service = io_service
         self.json_converter = json_converter
         self.yml_converter = yml_converter
         self.xml_converter = xml_converter
+        self.streaming_threshold_bytes = streaming_threshold_bytes
+
+    def register_conversions(self, conversion_registry: ConversionRegistry):
+        conversion_registry.register(FileTypes.XML, FileTypes.JSON, self, 'to_json', cost=1)
+        conversion_registry.register(FileTypes.XML, FileTypes.YML, self, 'to_yml', cost=1)
 
     def get_xml_file_content(self, source_file_path: str):
         xml_file_as_dict: dict = self.xml_converter.read(source_file_path)
@@ -26,30 +38,52 @@ class XMLService:
             xml_file_as_dict = xml_file_as_dict.pop('root')
         return xml_file_as_dict
 
+    def parse(self, source_file_path: str) -> ParsedDocument:
+        return ParsedDocument(source_file_path, FileTypes.XML, parse=self.get_xml_file_content)
+
+    def get_document(self, source_file_path: str | ParsedDocument) -> ParsedDocument:
+        if isinstance(source_file_path, ParsedDocument):
+            return source_file_path
+        return self.parse(source_file_path)
+
+    def write_converted(self, document: ParsedDocument, file_path: str, converter: JsonConverter | YamlConverter):
+        """
+        Large XML feeds of repeated records are converted one record at a time instead of being loaded into memory at
+        once.
+        """
+        source_file_path = document.source_file_path
+        is_large_xml = document.source_format == FileTypes.XML and (
+            os.path.getsize(source_file_path) > self.streaming_threshold_bytes
+        )
+        if is_large_xml and (record_tags := self.xml_converter.get_record_tags(source_file_path)):
+            root_tag, record_tag = record_tags
+            converter.write_items(
+                items=((None, record) for record in self.xml_converter.iter_records(source_file_path)),
+                is_mapping=False,
+                file_path=file_path,
+                keys=[record_tag] if root_tag == 'root' else [root_tag, record_tag]
+            )
+        else:
+            converter.write(data=document.data, file_path=file_path)
+
     @contextmanager
-    def to_json(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
+    def to_json(self, source_file_path: str | ParsedDocument, custom_file_name: str) -> Generator[str, None, None]:
         """
         Converts xml to json file.
         """
         with self.io_service.create_temp_json_file(
             prefix=custom_file_name
         ) as json_file:
-            self.json_converter.write(
-                data=self.get_xml_file_content(source_file_path),
-                file_path=json_file
-            )
+            self.write_converted(self.get_document(source_file_path), file_path=json_file, converter=self.json_converter)
             yield json_file
 
     @contextmanager
-    def to_yml(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
+    def to_yml(self, source_file_path: str | ParsedDocument, custom_file_name: str) -> Generator[str, None, None]:
         """
         Converts xml to yml file.
         """
         with self.io_service.create_temp_yml_file(
             prefix=custom_file_name
         ) as yml_file:
-            self.yml_converter.write(
-                data=self.get_xml_file_content(source_file_path),
-                file_path=yml_file
-            )
+            self.write_converted(self.get_document(source_file_path), file_path=yml_file, converter=self.yml_converter)
             yield yml_file
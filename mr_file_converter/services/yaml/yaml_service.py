@@ -1,8 +1,11 @@
 from contextlib import contextmanager
 from typing import Generator
 
-from mr_file_converter.converters import (JsonConverter, XMLConverter,
-                                          YamlConverter)
+from mr_file_converter.converters import (JsonConverter, ParsedDocument,
+                                          XMLConverter, YamlConverter)
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.conversion.file_types import FileTypes
 from mr_file_converter.services.io.io_service import IOService
 
 
@@ -20,8 +23,21 @@ class YamlService:
         self.yml_converter = yml_converter
         self.xml_converter = xml_converter
 
+    def register_conversions(self, conversion_registry: ConversionRegistry):
+        conversion_registry.register(FileTypes.YML, FileTypes.JSON, self, 'to_json', cost=1)
+        conversion_registry.register(FileTypes.YML, FileTypes.TEXT, self, 'to_text', cost=1)
+        conversion_registry.register(FileTypes.YML, FileTypes.XML, self, 'to_xml', cost=1)
+
+    def parse(self, source_file_path: str) -> ParsedDocument:
+        return ParsedDocument(source_file_path, FileTypes.YML, parse=self.yml_converter.read)
+
+    def get_document(self, source_file_path: str | ParsedDocument) -> ParsedDocument:
+        if isinstance(source_file_path, ParsedDocument):
+            return source_file_path
+        return self.parse(source_file_path)
+
     @contextmanager
-    def to_json(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
+    def to_json(self, source_file_path: str | ParsedDocument, custom_file_name: str) -> Generator[str, None, None]:
         """
         Converts json to yml file.
         """
@@ -29,13 +45,13 @@ class YamlService:
             prefix=custom_file_name
         ) as json_file:
             self.json_converter.write(
-                data=self.yml_converter.read(source_file_path),
+                data=self.get_document(source_file_path).data,
                 file_path=json_file
             )
             yield json_file
 
     @contextmanager
-    def to_text(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
+    def to_text(self, source_file_path: str | ParsedDocument, custom_file_name: str) -> Generator[str, None, None]:
         """
         Converts yml to a file that is a string representation of the yml.
         """
@@ -44,19 +60,19 @@ class YamlService:
         ) as text_file:
             self.io_service.write_data_to_file(
                 data=self.yml_converter.dumps(
-                    self.yml_converter.read(source_file_path)
+                    self.get_document(source_file_path).data
                 ),
                 file_path=text_file
             )
             yield text_file
 
     @contextmanager
-    def to_xml(self, source_file_path: str, custom_file_name: str) -> Generator[str, None, None]:
+    def to_xml(self, source_file_path: str | ParsedDocument, custom_file_name: str) -> Generator[str, None, None]:
         with self.io_service.create_temp_xml_file(
             prefix=custom_file_name
         ) as xml_file:
             self.xml_converter.write(
-                data=self.yml_converter.read(source_file_path),
+                data=self.get_document(source_file_path).data,
                 file_path=xml_file
             )
             yield xml_file
@@ -1,18 +1,30 @@
+import os
 from typing import cast
 from unittest.mock import MagicMock
 
+import PyPDF2
 import pytest
 from telegram import Update
 from telegram.ext import CallbackContext, Updater
 
 from mr_file_converter.converters import (JsonConverter, XMLConverter,
                                           YamlConverter)
+from mr_file_converter.services.batch.batch_service import FileBatchService
+from mr_file_converter.services.cache.cache_service import \
+    ConversionCacheService
 from mr_file_converter.services.command.command_service import CommandService
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.executor.conversion_executor import \
+    InlineConversionExecutor
 from mr_file_converter.services.html.html_service import HTMLService
 from mr_file_converter.services.io.io_service import IOService
 from mr_file_converter.services.json.json_service import JsonService
+from mr_file_converter.services.ocr.ocr_service import OCRService
 from mr_file_converter.services.pdf.pdf_service import PdfService
 from mr_file_converter.services.photo.photo_service import PhotoService
+from mr_file_converter.services.renderer.renderer_service import \
+    RendererService
 from mr_file_converter.services.telegram.telegram_service import \
     TelegramService
 from mr_file_converter.services.url.url_service import URLService
@@ -69,11 +81,21 @@ def telegram_update() -> Update:
     return update
 
 
+@pytest.fixture()
+def renderer_service():
+    renderer_service = RendererService(
+        chrome_path=os.getenv('CHROME_BIN'), pool_size=1, max_renders=100, render_timeout=30
+    )
+    yield renderer_service
+    renderer_service.shutdown()
+
+
 @pytest.fixture()
 def html_service(
-    io_service: IOService
+    io_service: IOService,
+    renderer_service: RendererService
 ) -> HTMLService:
-    return HTMLService(io_service=io_service)
+    return HTMLService(io_service=io_service, renderer_service=renderer_service)
 
 
 @pytest.fixture()
@@ -130,20 +152,77 @@ def telegram_context() -> CallbackContext:
 
 @pytest.fixture()
 def url_service(
-    io_service: IOService
+    io_service: IOService,
+    renderer_service: RendererService
 ) -> URLService:
-    return URLService(io_service=io_service)
+    return URLService(io_service=io_service, renderer_service=renderer_service)
 
 
 @pytest.fixture()
 def pdf_service(
     io_service: IOService
-) -> PdfService:
-    return PdfService(io_service=io_service)
+):
+    pdf_service = PdfService(io_service=io_service)
+    yield pdf_service
+    pdf_service.shutdown()
+
+
+@pytest.fixture()
+def multi_page_pdf_file_path(base_file_path: str, tmp_path) -> str:
+    """
+    A pdf file with 6 pages - the test pdf file 3 times.
+    """
+    pdf_writer = PyPDF2.PdfWriter()
+    for _ in range(3):
+        for page in PyPDF2.PdfReader(f'{base_file_path}/services/pdf/test_data/test.pdf').pages:
+            pdf_writer.add_page(page)
+    source_file_path = str(tmp_path / 'multi_page.pdf')
+    with open(source_file_path, 'wb') as pdf_file:
+        pdf_writer.write(pdf_file)
+    return source_file_path
+
+
+@pytest.fixture()
+def ocr_service() -> OCRService:
+    return OCRService(max_workers=0)
 
 
 @pytest.fixture()
 def photo_service(
-    io_service: IOService
+    io_service: IOService,
+    ocr_service: OCRService
 ) -> PhotoService:
-    return PhotoService(io_service=io_service)
+    return PhotoService(io_service=io_service, ocr_service=ocr_service)
+
+
+@pytest.fixture()
+def conversion_registry(
+    json_service: JsonService,
+    yml_service: YamlService,
+    xml_service: XMLService,
+    html_service: HTMLService,
+    pdf_service: PdfService,
+    photo_service: PhotoService
+) -> ConversionRegistry:
+    return ConversionRegistry(
+        services=[json_service, yml_service, xml_service, html_service, pdf_service, photo_service]
+    )
+
+
+@pytest.fixture()
+def cache_service(tmp_path) -> ConversionCacheService:
+    return ConversionCacheService(
+        cache_directory=str(tmp_path / 'cache'),
+        max_size_bytes=1024 * 1024,
+        converter_version='test'
+    )
+
+
+@pytest.fixture()
+def conversion_executor() -> InlineConversionExecutor:
+    return InlineConversionExecutor()
+
+
+@pytest.fixture()
+def batch_service() -> FileBatchService:
+    return FileBatchService(window_seconds=0, max_batch_size=50)
@@ -1,3 +1,4 @@
+import asyncio
 import os.path
 
 import pytest
@@ -8,37 +9,39 @@ from telegram.ext import CallbackContext, ConversationHandler
 from mr_file_converter.conversations.file.errors import FileTypeNotSupported
 from mr_file_converter.conversations.file.file_conversation import \
     FileConversation
-from mr_file_converter.services.html.html_service import HTMLService
+from mr_file_converter.services.batch.batch_service import FileBatchService
+from mr_file_converter.services.cache.cache_service import \
+    ConversionCacheService
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.executor.conversion_executor import \
+    ConversionExecutor
 from mr_file_converter.services.io.io_service import IOService
 from mr_file_converter.services.json.json_service import JsonService
 from mr_file_converter.services.pdf.pdf_service import PdfService
 from mr_file_converter.services.photo.photo_service import PhotoService
 from mr_file_converter.services.telegram.telegram_service import \
     TelegramService
-from mr_file_converter.services.xml.xml_service import XMLService
-from mr_file_converter.services.yaml.yaml_service import YamlService
 
 
 @pytest.fixture()
 def file_conversation(
     telegram_service: TelegramService,
     io_service: IOService,
-    json_service: JsonService,
-    yml_service: YamlService,
-    xml_service: XMLService,
-    html_service: HTMLService,
-    pdf_service: PdfService,
-    photo_service: PhotoService
+    conversion_registry: ConversionRegistry,
+    cache_service: ConversionCacheService,
+    conversion_executor: ConversionExecutor,
+    photo_service: PhotoService,
+    batch_service: FileBatchService
 ) -> FileConversation:
     return FileConversation(
         telegram_service=telegram_service,
         io_service=io_service,
-        json_service=json_service,
-        yaml_service=yml_service,
-        xml_service=xml_service,
-        html_service=html_service,
-        pdf_service=pdf_service,
-        photo_service=photo_service
+        conversion_registry=conversion_registry,
+        cache_service=cache_service,
+        conversion_executor=conversion_executor,
+        photo_service=photo_service,
+        batch_service=batch_service
     )
 
 
@@ -90,9 +93,9 @@ def test_check_file_supported_file_type(
         'reply_to_message'
     )
 
-    next_stage = file_conversation.check_file_type(
+    next_stage = asyncio.run(file_conversation.check_file_type(
         telegram_update, telegram_context
-    )
+    ))
 
     assert reply_to_message_mocker.called
     assert telegram_context.user_data['source_file_path'] == file_path
@@ -132,9 +135,9 @@ def test_check_file_type_unsupported_file(
     )
 
     with pytest.raises(FileTypeNotSupported):
-        file_conversation.check_file_type(
+        asyncio.run(file_conversation.check_file_type(
             telegram_update, telegram_context
-        )
+        ))
 
 
 def test_convert_additional_file_yes_option(
@@ -203,6 +206,210 @@ def test_convert_additional_file_no_option(
     assert next_stage == ConversationHandler.END
 
 
+def test_ask_custom_file_name_toggles_formats(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext
+):
+    """
+    Given:
+     - a json file whose type was checked
+
+    When:
+     - choosing yml, xml and yml again, and then pressing the convert button
+
+    Then:
+     - make sure choosing a format again removes it from the requested formats
+     - make sure the keyboard is updated after every choice
+     - make sure the next stage is the 'convert_file_stage' once the convert button is pressed
+    """
+    telegram_context.user_data['source_file_type'] = 'json'
+    telegram_context.user_data['available_formats'] = ['yml', 'text', 'xml']
+    telegram_context.user_data['requested_formats'] = []
+    mocker.patch.object(
+        file_conversation.telegram_service,
+        'get_message_data',
+        side_effect=['yml', 'xml', 'yml', file_conversation.done_button]
+    )
+    edit_message_reply_markup_mocker = mocker.patch.object(
+        file_conversation.telegram_service, 'edit_message_reply_markup'
+    )
+    mocker.patch.object(file_conversation.telegram_service, 'send_message')
+
+    stages = [file_conversation.ask_custom_file_name(telegram_update, telegram_context) for _ in range(4)]
+
+    assert stages == [file_conversation.ask_custom_file_name_stage] * 3 + [file_conversation.convert_file_stage]
+    assert telegram_context.user_data['requested_formats'] == ['xml']
+    assert edit_message_reply_markup_mocker.call_count == 3
+
+
+def test_ask_custom_file_name_without_formats(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext
+):
+    """
+    Given:
+     - a json file whose type was checked
+
+    When:
+     - pressing the convert button without choosing any format
+
+    Then:
+     - make sure the user is asked to choose a format and the stage does not change
+    """
+    telegram_context.user_data['source_file_type'] = 'json'
+    telegram_context.user_data['available_formats'] = ['yml', 'text', 'xml']
+    telegram_context.user_data['requested_formats'] = []
+    mocker.patch.object(
+        file_conversation.telegram_service, 'get_message_data', return_value=file_conversation.done_button
+    )
+    send_message_mocker = mocker.patch.object(file_conversation.telegram_service, 'send_message')
+
+    assert file_conversation.ask_custom_file_name(
+        telegram_update, telegram_context
+    ) == file_conversation.ask_custom_file_name_stage
+    assert send_message_mocker.called
+
+
+def test_ask_custom_file_name_of_pdf_to_docx(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext
+):
+    """
+    Given:
+     - a pdf file whose type was checked, and docx was chosen
+
+    When:
+     - pressing the convert button
+
+    Then:
+     - make sure the next stage is the 'ask_page_range_stage'
+    """
+    telegram_context.user_data['source_file_type'] = 'pdf'
+    telegram_context.user_data['available_formats'] = ['text', 'docx']
+    telegram_context.user_data['requested_formats'] = ['docx']
+    mocker.patch.object(
+        file_conversation.telegram_service, 'get_message_data', return_value=file_conversation.done_button
+    )
+    mocker.patch.object(file_conversation.telegram_service, 'send_message')
+
+    assert file_conversation.ask_custom_file_name(
+        telegram_update, telegram_context
+    ) == file_conversation.ask_page_range_stage
+
+
+@pytest.mark.parametrize(
+    'text, page_range',
+    [
+        ('2-5', (1, 5)),
+        (' 3 ', (2, 3)),
+        ('1 - 1', (0, 1)),
+        ('5-2', None),
+        ('0-2', None),
+        ('a-b', None),
+        ('-3', None),
+        ('', None)
+    ]
+)
+def test_parse_page_range(text: str, page_range):
+    """
+    Given:
+     - Case 1: a range of pages
+     - Case 2: a single page
+     - Case 3: a range of a single page with spaces
+     - Case 4: a range that ends before it starts
+     - Case 5: a range that starts before the first page
+     - Case 6: a range that is not made of numbers
+     - Case 7: a range without a first page
+     - Case 8: an empty text
+
+    When:
+     - parsing the page range
+
+    Then:
+     - make sure the pages are parsed into the range [start_page, end_page) of the pages, or None if they are invalid
+    """
+    assert FileConversation.parse_page_range(text) == page_range
+
+
+@pytest.mark.parametrize(
+    'answer, next_stage, page_range',
+    [
+        ('2-3', FileConversation.convert_file_stage, (1, 3)),
+        ('all', FileConversation.convert_file_stage, None),
+        ('three', FileConversation.ask_page_range_stage, None)
+    ]
+)
+def test_ask_page_range(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext,
+    answer: str,
+    next_stage: int,
+    page_range
+):
+    """
+    Given:
+     - Case 1: a range of pages
+     - Case 2: all the pages
+     - Case 3: an invalid range of pages
+
+    When:
+     - answering which pages of the pdf to convert into docx
+
+    Then:
+     - make sure the page range is kept for the conversion
+     - make sure the user is asked for the file name, or asked again for the pages if they are invalid
+    """
+    mocker.patch.object(file_conversation.telegram_service, 'get_message_data', return_value=answer)
+    mocker.patch.object(file_conversation.telegram_service, 'send_message')
+
+    assert file_conversation.ask_page_range(telegram_update, telegram_context) == next_stage
+    assert telegram_context.user_data.get('page_range') == page_range
+
+
+def test_convert_pdf_page_range_into_docx(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    pdf_service: PdfService,
+    telegram_update: Update,
+    telegram_context: CallbackContext,
+    file_test_data_base_path: str
+):
+    """
+    Given:
+     - a pdf file of 2 pages
+
+    When:
+     - converting only the second page into docx, and then all the pages
+
+    Then:
+     - make sure only the second page is converted the first time
+     - make sure the conversion of all the pages is not taken from the cached conversion of the second page
+    """
+    telegram_context.user_data['requested_formats'] = ['docx']
+    telegram_context.user_data['source_file_type'] = 'pdf'
+    telegram_context.user_data['source_file_path'] = f'{file_test_data_base_path}/test.pdf'
+    telegram_context.user_data['page_range'] = (1, 2)
+    send_file_mocker = mocker.patch.object(file_conversation.telegram_service, 'send_file')
+    mocker.patch.object(file_conversation.telegram_service, 'get_message_data', return_value='file_name')
+    to_docx_spy = mocker.spy(pdf_service, 'to_docx')
+
+    file_conversation.convert_file(telegram_update, telegram_context, should_delete_source_file=False)
+    del telegram_context.user_data['page_range']
+    file_conversation.convert_file(telegram_update, telegram_context, should_delete_source_file=False)
+
+    assert to_docx_spy.call_args_list[0].kwargs['page_range'] == (1, 2)
+    assert to_docx_spy.call_count == 2
+    assert send_file_mocker.call_count == 2
+
+
 @pytest.mark.parametrize(
     'file_name, file_type, requested_format',
     [
@@ -214,6 +421,7 @@ def test_convert_additional_file_no_option(
         ('test.yml', 'yml', 'text'),
         ('test.xml', 'xml', 'json'),
         ('test.xml', 'xml', 'yml'),
+        ('test.xml', 'xml', 'text'),
         ('test.pdf', 'pdf', 'docx'),
         ('test.pdf', 'pdf', 'text'),
         ('test.html', 'html', 'text'),
@@ -222,6 +430,7 @@ def test_convert_additional_file_no_option(
         ('test.html', 'html', 'pdf'),
         ('test.jpg', 'photo', 'text'),
         ('test.png', 'photo', 'pdf'),
+        ('test.png', 'photo', 'docx'),
     ]
 )
 def test_convert_file(
@@ -244,14 +453,16 @@ def test_convert_file(
      - Case 6: yml file to text file
      - Case 7: xml file to json file
      - Case 8: xml file to yml file
-     - Case 9: pdf file to docx file
-     - Case 10: pdf file to text file
-     - Case 11: html file to text file
-     - Case 12: html file to jpg file
-     - Case 13: html file to png file
-     - Case 14: html file to pdf file
-     - Case 15: jpg file to text file
-     - Case 16: png file to pdf
+     - Case 9: xml file to text file (through json)
+     - Case 10: pdf file to docx file
+     - Case 11: pdf file to text file
+     - Case 12: html file to text file
+     - Case 13: html file to jpg file
+     - Case 14: html file to png file
+     - Case 15: html file to pdf file
+     - Case 16: jpg file to text file
+     - Case 17: png file to pdf
+     - Case 18: png file to docx (through pdf)
 
     When:
      - running 'convert file' method
@@ -261,7 +472,7 @@ def test_convert_file(
      - make sure the file conversion succeeds
      - make sure the next stage is the 'convert_additional_file_answer_stage'
     """
-    telegram_context.user_data['requested_format'] = requested_format
+    telegram_context.user_data['requested_formats'] = [requested_format]
     telegram_context.user_data['source_file_type'] = file_type
     telegram_context.user_data['source_file_path'] = f'{file_test_data_base_path}/{file_name}'
 
@@ -279,3 +490,221 @@ def test_convert_file(
     file_name = send_file_mocker.call_args.kwargs['file_name']
     assert file_name == f'file_name.{requested_format}'
     assert next_stage == file_conversation.convert_additional_file_answer_stage
+
+
+def test_convert_same_file_twice_uses_cache(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    json_service: JsonService,
+    telegram_update: Update,
+    telegram_context: CallbackContext,
+    file_test_data_base_path: str
+):
+    """
+    Given:
+     - a json file that is converted into yml twice
+
+    When:
+     - running 'convert file' method twice
+
+    Then:
+     - make sure the json to yml conversion runs only once
+     - make sure the file was sent both times
+    """
+    telegram_context.user_data['requested_formats'] = ['yml']
+    telegram_context.user_data['source_file_type'] = 'json'
+    telegram_context.user_data['source_file_path'] = f'{file_test_data_base_path}/test.json'
+
+    send_file_mocker = mocker.patch.object(
+        file_conversation.telegram_service, 'send_file')
+    mocker.patch.object(
+        file_conversation.telegram_service,
+        'get_message_data',
+        return_value='file_name'
+    )
+    to_yml_spy = mocker.spy(json_service, 'to_yml')
+
+    for _ in range(2):
+        file_conversation.convert_file(
+            telegram_update, telegram_context, should_delete_source_file=False
+        )
+
+    assert to_yml_spy.call_count == 1
+    assert send_file_mocker.call_count == 2
+
+
+def test_convert_file_into_several_formats(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    json_service: JsonService,
+    telegram_update: Update,
+    telegram_context: CallbackContext,
+    file_test_data_base_path: str
+):
+    """
+    Given:
+     - a json file that is converted into yml, xml and text at once
+
+    When:
+     - running 'convert file' method
+
+    Then:
+     - make sure the json file is parsed only once
+     - make sure all the converted files are sent together with the names the user requested
+    """
+    telegram_context.user_data['requested_formats'] = ['yml', 'xml', 'text']
+    telegram_context.user_data['source_file_type'] = 'json'
+    telegram_context.user_data['source_file_path'] = f'{file_test_data_base_path}/test.json'
+
+    send_files_mocker = mocker.patch.object(file_conversation.telegram_service, 'send_files')
+    mocker.patch.object(
+        file_conversation.telegram_service,
+        'get_message_data',
+        return_value='file_name'
+    )
+    read_spy = mocker.spy(json_service.json_converter, 'read')
+
+    next_stage = file_conversation.convert_file(
+        telegram_update, telegram_context, should_delete_source_file=False
+    )
+
+    assert read_spy.call_count == 1
+    assert list(send_files_mocker.call_args.kwargs['files']) == ['file_name.yml', 'file_name.xml', 'file_name.text']
+    assert next_stage == file_conversation.convert_additional_file_answer_stage
+
+
+def test_check_batch_file_types(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext,
+    file_test_data_base_path: str
+):
+    """
+    Given:
+     - a batch of a json file and a yml file that were sent together
+
+    When:
+     - running the 'check_file_type' method
+
+    Then:
+     - make sure the files of the batch are saved in the context along with their types
+     - make sure only the types that both files can be converted to are offered
+     - make sure the next stage is the 'ask_custom_file_name_stage'
+    """
+    file_paths = [f'{file_test_data_base_path}/test.json', f'{file_test_data_base_path}/test.yml']
+    mocker.patch.object(file_conversation.batch_service, 'collect', return_value=[mocker.Mock(), mocker.Mock()])
+    mocker.patch.object(file_conversation.telegram_service, 'get_files', return_value=file_paths)
+    reply_to_message_mocker = mocker.patch.object(file_conversation.telegram_service, 'reply_to_message')
+
+    next_stage = asyncio.run(file_conversation.check_file_type(telegram_update, telegram_context))
+
+    assert reply_to_message_mocker.called
+    assert telegram_context.user_data['source_files'] == [[file_paths[0], 'json'], [file_paths[1], 'yml']]
+    assert telegram_context.user_data['available_formats'] == ['text', 'xml']
+    assert next_stage == file_conversation.ask_custom_file_name_stage
+
+
+def test_check_file_type_of_collected_batch(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext,
+    file_test_data_base_path: str
+):
+    """
+    Given:
+     - a batch of a json file and a yml file that was already collected (before the check was admitted)
+
+    When:
+     - running the 'check_file_type' method with the batch
+
+    Then:
+     - make sure the batch is not collected again
+     - make sure the files of the batch are saved in the context
+    """
+    file_paths = [f'{file_test_data_base_path}/test.json', f'{file_test_data_base_path}/test.yml']
+    collect_mocker = mocker.patch.object(file_conversation.batch_service, 'collect')
+    mocker.patch.object(file_conversation.telegram_service, 'get_files', return_value=file_paths)
+    mocker.patch.object(file_conversation.telegram_service, 'reply_to_message')
+
+    next_stage = asyncio.run(file_conversation.check_file_type(
+        telegram_update, telegram_context, batch=[mocker.Mock(), mocker.Mock()]
+    ))
+
+    assert not collect_mocker.called
+    assert telegram_context.user_data['source_files'] == [[file_paths[0], 'json'], [file_paths[1], 'yml']]
+    assert next_stage == file_conversation.ask_custom_file_name_stage
+
+
+def test_convert_batch_of_photos_into_pdf(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext,
+    file_test_data_base_path: str
+):
+    """
+    Given:
+     - a batch of a png photo and a jpg photo that is converted into pdf
+
+    When:
+     - running 'convert file' method
+
+    Then:
+     - make sure the photos are merged into a single pdf file with the name the user requested
+    """
+    telegram_context.user_data['requested_formats'] = ['pdf']
+    telegram_context.user_data['source_files'] = [
+        [f'{file_test_data_base_path}/test.png', 'photo'], [f'{file_test_data_base_path}/test.jpg', 'photo']
+    ]
+    send_file_mocker = mocker.patch.object(file_conversation.telegram_service, 'send_file')
+    mocker.patch.object(file_conversation.telegram_service, 'get_message_data', return_value='file_name')
+    merge_to_pdf_spy = mocker.spy(file_conversation.photo_service, 'merge_to_pdf')
+
+    next_stage = file_conversation.convert_file(telegram_update, telegram_context, should_delete_source_file=False)
+
+    assert merge_to_pdf_spy.call_count == 1
+    assert send_file_mocker.call_args.kwargs['file_name'] == 'file_name.pdf'
+    assert next_stage == file_conversation.convert_additional_file_answer_stage
+
+
+def test_convert_batch(
+    mocker: MockerFixture,
+    file_conversation: FileConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext,
+    file_test_data_base_path: str
+):
+    """
+    Given:
+     - a batch of a json file and a yml file that is converted into xml and text
+
+    When:
+     - running 'convert file' method
+
+    Then:
+     - make sure every file is converted into every requested format
+     - make sure all the converted files are sent together, numbered in the order of the batch
+    """
+    telegram_context.user_data['requested_formats'] = ['xml', 'text']
+    telegram_context.user_data['source_files'] = [
+        [f'{file_test_data_base_path}/test.json', 'json'], [f'{file_test_data_base_path}/test.yml', 'yml']
+    ]
+    sent_files = {}
+    mocker.patch.object(
+        file_conversation.telegram_service,
+        'send_files',
+        side_effect=lambda update, files: sent_files.update(
+            {file_name: os.path.exists(file_path) for file_name, file_path in files.items()}
+        )
+    )
+    mocker.patch.object(file_conversation.telegram_service, 'get_message_data', return_value='file_name')
+
+    next_stage = file_conversation.convert_file(telegram_update, telegram_context, should_delete_source_file=False)
+
+    assert sent_files == {
+        'file_name_1.xml': True, 'file_name_2.xml': True, 'file_name_1.text': True, 'file_name_2.text': True
+    }
+    assert list(sent_files) == ['file_name_1.xml', 'file_name_2.xml', 'file_name_1.text', 'file_name_2.text']
+    assert next_stage == file_conversation.convert_additional_file_answer_stage
@@ -67,6 +67,8 @@ def test_check_url_validity_with_valid_url(
         'test',
         'httpss://google.com',
         'bla.com',
+        'file:///proc/self/environ',
+        'ftp://google.com/file.txt',
     ]
 )
 def test_check_url_validity_with_random_strings(
@@ -128,7 +130,7 @@ def test_check_url_validity_with_http_error(
     mocker.patch.object(
         url_conversation.telegram_service,
         'get_message_data',
-        return_value='a real url'
+        return_value='https://a-real-url.com'
     )
 
     mocker.patch.object(
@@ -142,7 +144,7 @@ def test_check_url_validity_with_http_error(
 
     assert 'url' not in telegram_context.user_data
     assert exc_info.value.next_stage == url_conversation.check_url_validity_stage
-    assert exc_info.value.args[0] == f'Unable to read a real url, please try a different url'
+    assert exc_info.value.args[0] == 'Unable to read https://a-real-url.com, please try a different url'
 
 
 @pytest.mark.parametrize(
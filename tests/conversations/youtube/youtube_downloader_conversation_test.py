@@ -2,23 +2,43 @@ import os.path
 
 import pytest
 from pytest_mock import MockerFixture
-from pytube import YouTube
 from telegram import Update
 from telegram.ext import CallbackContext, ConversationHandler
 
 from mr_file_converter.conversations.youtube.youtube_downloader_conversation import \
     YoutubeDownloaderConversation
+from mr_file_converter.services.audio.audio_service import AudioService
+from mr_file_converter.services.cache.youtube_media_cache_service import \
+    YouTubeMediaCacheService
 from mr_file_converter.services.downloader.errors import (
-    InvalidYouTubeURL, YouTubeVideoDownloadError)
+    InvalidYouTubeURL, YouTubeVideoDownloadError, YouTubeVideoTooLarge)
+from mr_file_converter.services.downloader.youtube_metadata_service import \
+    YouTubeMetadataService
+from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.io.spool_file import SpoolFile
+from mr_file_converter.services.telegram.file_id_service import \
+    TelegramFileIdService
 from mr_file_converter.services.telegram.telegram_service import \
     TelegramService
 
 
 @pytest.fixture()
 def youtube_downloader_conversation(
+    mocker: MockerFixture,
     telegram_service: TelegramService,
+    io_service: IOService
 ) -> YoutubeDownloaderConversation:
-    return YoutubeDownloaderConversation(telegram_service=telegram_service)
+    youtube_metadata_service = YouTubeMetadataService(ttl_seconds=60, max_entries=10)
+    # the metadata of the videos is never fetched from YouTube
+    mocker.patch.object(
+        youtube_metadata_service, 'get', side_effect=lambda video_id: mocker.MagicMock(video_id=video_id, length=60)
+    )
+    return YoutubeDownloaderConversation(
+        telegram_service=telegram_service,
+        io_service=io_service,
+        audio_service=AudioService(ffmpeg_path=None, bitrate_kbps=128, max_workers=1),
+        youtube_metadata_service=youtube_metadata_service
+    )
 
 
 def test_check_url_stage_valid_url(
@@ -35,7 +55,7 @@ def test_check_url_stage_valid_url(
      - executing the 'check_youtube_url' stage
 
     Then:
-     - make sure the YouTube object is saved in context
+     - make sure only the id of the video is saved in context
      - make sure the next stage should be download stage.
      - make sure a message was sent with an inline keyboard was sent with 'mp3' and 'mp4'
     """
@@ -55,7 +75,7 @@ def test_check_url_stage_valid_url(
     assert send_message_mock.called
     assert send_message_mock.call_args.kwargs['reply_markup'].inline_keyboard[0][0].text == 'mp3'
     assert send_message_mock.call_args.kwargs['reply_markup'].inline_keyboard[0][1].text == 'mp4'
-    assert 'youtube' in telegram_context.user_data
+    assert telegram_context.user_data['youtube_video_id'] == 'xcMRjfT10h0'
 
 
 def test_check_invalid_youtube_url(
@@ -115,7 +135,7 @@ def test_invalid_youtube_url_flow(
 
     Then:
      - make sure the InvalidYouTubeURL exception is as long as the YouTube URL is invalid.
-     - make sure the YouTube object is saved in context only when the YouTube URL is valid
+     - make sure the id of the video is saved in context only when the YouTube URL is valid
      - make sure the next stage should be download stage when the YouTube URL is valid.
      - make sure a message was sent with an inline keyboard was sent with 'mp3' and 'mp4' when the YouTube URL is valid.
     """
@@ -143,7 +163,7 @@ def test_invalid_youtube_url_flow(
     assert send_message_mock.called
     assert send_message_mock.call_args.kwargs['reply_markup'].inline_keyboard[0][0].text == 'mp3'
     assert send_message_mock.call_args.kwargs['reply_markup'].inline_keyboard[0][1].text == 'mp4'
-    assert 'youtube' in telegram_context.user_data
+    assert telegram_context.user_data['youtube_video_id'] == 'rn9AQoI7mYU'
 
 
 def test_download_video_as_mp3(
@@ -173,16 +193,20 @@ def test_download_video_as_mp3(
         youtube_downloader_conversation.telegram_service, 'edit_message')
     mocker.patch.object(
         youtube_downloader_conversation.telegram_service, 'get_message_id')
+    mocker.patch.object(
+        youtube_downloader_conversation.youtube_audio_downloader_cls,
+        'get_streams',
+        return_value=[mocker.MagicMock(filesize=1024)]
+    )
     mocker.patch.object(
         youtube_downloader_conversation.youtube_audio_downloader_cls,
         'download',
-        # pytube creates audio files with mp4
-        return_value=open('test.mp4', 'w').name
+        return_value=open('test.mp3', 'w').name
     )
+    telegram_context.user_data['youtube_video_id'] = 'rn9AQoI7mYU'
     next_stage = youtube_downloader_conversation.download_video(
         telegram_update, telegram_context)
     assert not os.path.exists('test.mp3')
-    assert not os.path.exists('test.mp4')
     assert next_stage == ConversationHandler.END
     assert send_audio_mocker.called
     assert send_audio_mocker.call_args.kwargs['audio_file_path'] == 'test.mp3'
@@ -225,9 +249,7 @@ def test_download_mp3_failure(
         side_effect=throw_exception
     )
 
-    telegram_context.user_data['youtube'] = YouTube(
-        'https://www.youtube.com/watch?v=rn9AQoI7mYU&list=RD7pKrVB5f2W0&index=5'
-    )
+    telegram_context.user_data['youtube_video_id'] = 'rn9AQoI7mYU'
 
     with pytest.raises(YouTubeVideoDownloadError) as excinfo:
         youtube_downloader_conversation.download_video(
@@ -264,6 +286,11 @@ def test_download_video_as_mp4(
         youtube_downloader_conversation.telegram_service, 'edit_message')
     mocker.patch.object(
         youtube_downloader_conversation.telegram_service, 'get_message_id')
+    mocker.patch.object(
+        youtube_downloader_conversation.youtube_video_downloader_cls,
+        'get_streams',
+        return_value=[mocker.MagicMock(filesize=1024)]
+    )
     mocker.patch.object(
         youtube_downloader_conversation.youtube_video_downloader_cls,
         'download',
@@ -309,9 +336,7 @@ def test_download_mp4_failure(
         side_effect=throw_exception
     )
 
-    telegram_context.user_data['youtube'] = YouTube(
-        'https://www.youtube.com/watch?v=rn9AQoI7mYU&list=RD7pKrVB5f2W0&index=5'
-    )
+    telegram_context.user_data['youtube_video_id'] = 'rn9AQoI7mYU'
 
     with pytest.raises(YouTubeVideoDownloadError) as excinfo:
         youtube_downloader_conversation.download_video(
@@ -319,3 +344,208 @@ def test_download_mp4_failure(
         )
 
     assert excinfo.value.args[0] == 'Failed to download YouTube video https://youtube.com/watch?v=rn9AQoI7mYU as mp4'
+
+
+def test_stream_video_as_mp4_while_downloading(
+    mocker: MockerFixture,
+    youtube_downloader_conversation: YoutubeDownloaderConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext
+):
+    """
+    Given:
+     - mp4 requested format
+     - a telegram service that can stream files.
+
+    When:
+     - executing the 'download_video' stage
+
+    Then:
+     - make sure the video is streamed to telegram from its temp directory as it is downloaded.
+     - make sure the temp directory of the video is deleted after it has been used.
+     - make sure that the next stage is the end of the conversation.
+    """
+    video_chunks = [b'a' * 10, b'b' * 10]
+    streamed_videos = []
+
+    def stream_video(update, file_name, chunks, reply_to_message_id):
+        streamed_videos.append((file_name, b''.join(chunks)))
+
+    youtube_downloader_conversation.telegram_service.upload_service = mocker.MagicMock()
+    mocker.patch.object(youtube_downloader_conversation.telegram_service,
+                        'get_message_data', return_value='mp4')
+    mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'edit_message')
+    mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'get_message_id')
+    stream_video_mocker = mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'stream_video', side_effect=stream_video)
+    send_video_mocker = mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'send_video')
+    mocker.patch.object(
+        youtube_downloader_conversation.youtube_video_downloader_cls,
+        'get_streams',
+        return_value=[mocker.MagicMock(default_filename='video.mp4', filesize=1024)]
+    )
+    mocker.patch(
+        'mr_file_converter.services.downloader.youtube_downloader_service.request.stream',
+        return_value=iter(video_chunks)
+    )
+
+    spool_file_spy = mocker.spy(SpoolFile, '__init__')
+
+    next_stage = youtube_downloader_conversation.download_video(
+        telegram_update, telegram_context)
+
+    assert next_stage == ConversationHandler.END
+    assert streamed_videos == [('video.mp4', b''.join(video_chunks))]
+    assert not send_video_mocker.called
+    assert stream_video_mocker.called
+    assert not os.path.exists(os.path.dirname(spool_file_spy.call_args.args[1]))
+
+
+@pytest.mark.parametrize(
+    'stream_sizes, expected_resolution',
+    [
+        ({'720p': 10, '360p': 5, '144p': 1}, '720p'),
+        ({'720p': 100, '360p': 50, '144p': 10}, '144p'),
+        ({'720p': 100, '360p': 20, '144p': 10}, '360p')
+    ]
+)
+def test_select_the_best_stream_that_fits(
+    mocker: MockerFixture,
+    youtube_downloader_conversation: YoutubeDownloaderConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext,
+    stream_sizes,
+    expected_resolution
+):
+    """
+    Given:
+     - mp4 requested format
+     - streams of a video in several resolutions, some of them larger than the size limit of 20 bytes.
+
+    When:
+     - executing the 'download_video' stage
+
+    Then:
+     - make sure the highest resolution that fits the size limit is downloaded.
+     - make sure the user is told which resolution was chosen.
+    """
+    streams = {
+        resolution: mocker.MagicMock(resolution=resolution, filesize=filesize)
+        for resolution, filesize in stream_sizes.items()
+    }
+    for stream in streams.values():
+        stream.download.return_value = open('test.mp4', 'w').name
+
+    youtube_downloader_conversation.max_file_size_bytes = 20
+    mocker.patch.object(youtube_downloader_conversation.telegram_service,
+                        'get_message_data', return_value='mp4')
+    edit_message_mocker = mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'edit_message')
+    mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'get_message_id')
+    mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'send_video')
+    mocker.patch.object(
+        youtube_downloader_conversation.youtube_video_downloader_cls,
+        'get_streams',
+        return_value=list(streams.values())
+    )
+
+    youtube_downloader_conversation.download_video(telegram_update, telegram_context)
+
+    assert [resolution for resolution, stream in streams.items() if stream.download.called] == [expected_resolution]
+    assert expected_resolution in edit_message_mocker.call_args.kwargs['text']
+
+
+def test_download_video_too_large(
+    mocker: MockerFixture,
+    youtube_downloader_conversation: YoutubeDownloaderConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext
+):
+    """
+    Given:
+     - mp4 requested format
+     - streams of a video that are all larger than the size limit.
+
+    When:
+     - executing the 'download_video' stage
+
+    Then:
+     - make sure YouTubeVideoTooLarge is raised without downloading anything.
+    """
+    stream = mocker.MagicMock(resolution='144p', filesize=100)
+    telegram_context.user_data['youtube_video_id'] = 'rn9AQoI7mYU'
+
+    youtube_downloader_conversation.max_file_size_bytes = 20
+    mocker.patch.object(youtube_downloader_conversation.telegram_service,
+                        'get_message_data', return_value='mp4')
+    mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'edit_message')
+    mocker.patch.object(
+        youtube_downloader_conversation.youtube_video_downloader_cls,
+        'get_streams',
+        return_value=[stream]
+    )
+
+    with pytest.raises(YouTubeVideoTooLarge):
+        youtube_downloader_conversation.download_video(telegram_update, telegram_context)
+
+    assert not stream.download.called
+
+
+def test_download_video_through_media_cache(
+    mocker: MockerFixture,
+    tmp_path,
+    youtube_downloader_conversation: YoutubeDownloaderConversation,
+    telegram_update: Update,
+    telegram_context: CallbackContext
+):
+    """
+    Given:
+     - mp4 requested format
+     - a media cache of the YouTube videos that were sent.
+
+    When:
+     - executing the 'download_video' stage twice for the same video.
+
+    Then:
+     - make sure the video is downloaded and uploaded only the first time.
+     - make sure the video is sent by the file_id of the upload the second time.
+    """
+    youtube_downloader_conversation.media_cache_service = YouTubeMediaCacheService(
+        file_id_service=TelegramFileIdService(database_path=str(tmp_path / 'file_ids.db'))
+    )
+    telegram_context.user_data['youtube_video_id'] = 'rn9AQoI7mYU'
+    mocker.patch.object(youtube_downloader_conversation.telegram_service,
+                        'get_message_data', return_value='mp4')
+    mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'edit_message')
+    mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'get_message_id')
+    send_video_mocker = mocker.patch.object(youtube_downloader_conversation.telegram_service, 'send_video')
+    send_video_mocker.return_value.effective_attachment.file_id = 'video_123'
+    send_video_file_id_mocker = mocker.patch.object(
+        youtube_downloader_conversation.telegram_service, 'send_video_file_id')
+    download_mocker = mocker.patch.object(
+        youtube_downloader_conversation.youtube_video_downloader_cls,
+        'download',
+        side_effect=lambda: open('test.mp4', 'w').name
+    )
+    mocker.patch.object(
+        youtube_downloader_conversation.youtube_video_downloader_cls,
+        'get_streams',
+        return_value=[mocker.MagicMock(resolution='720p', filesize=1024)]
+    )
+
+    for _ in range(2):
+        next_stage = youtube_downloader_conversation.download_video(telegram_update, telegram_context)
+        assert next_stage == ConversationHandler.END
+
+    assert download_mocker.call_count == 1
+    assert send_video_mocker.call_count == 1
+    assert send_video_file_id_mocker.call_args.kwargs['file_id'] == 'video_123'
+    assert not os.path.exists('test.mp4')
@@ -0,0 +1,189 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from mr_file_converter.services.admission.admission_service import \
+    AdmissionService
+from mr_file_converter.services.admission.errors import QueueFull
+
+
+async def run_job(
+    admission_service: AdmissionService, user_id: int, started: List[int], done: asyncio.Event, positions: List[int]
+):
+    async with admission_service.admit(user_id, on_queued=positions.append):
+        started.append(user_id)
+        await done.wait()
+
+
+def test_admit_up_to_max_jobs():
+    """
+    Given:
+     - an admission service that runs up to 2 jobs at once.
+
+    When:
+     - 3 users start a job each at once.
+
+    Then:
+     - make sure only the first 2 jobs run, and the third waits in the first position of the queue.
+     - make sure the third job runs once one of the other jobs is done.
+    """
+    async def test():
+        admission_service = AdmissionService(max_jobs=2, max_jobs_per_user=1, max_queue_size=10)
+        started, positions = [], []
+        first_done, rest_done = asyncio.Event(), asyncio.Event()
+
+        jobs = [
+            asyncio.create_task(run_job(admission_service, 1, started, first_done, positions)),
+            asyncio.create_task(run_job(admission_service, 2, started, rest_done, positions)),
+            asyncio.create_task(run_job(admission_service, 3, started, rest_done, positions))
+        ]
+        await asyncio.sleep(0.01)
+        assert started == [1, 2]
+        assert positions == [1]
+
+        first_done.set()
+        await asyncio.sleep(0.01)
+        assert started == [1, 2, 3]
+
+        rest_done.set()
+        await asyncio.gather(*jobs)
+        assert admission_service.can_run(1)
+
+    asyncio.run(test())
+
+
+def test_heavy_user_does_not_hold_back_other_users():
+    """
+    Given:
+     - an admission service that runs up to 2 jobs at once and a single job per user at once.
+
+    When:
+     - a user starts 3 jobs, and another user starts a job afterwards.
+
+    Then:
+     - make sure the job of the other user runs right away, while the other jobs of the first user wait.
+     - make sure the waiting jobs of the first user run one after the other.
+    """
+    async def test():
+        admission_service = AdmissionService(max_jobs=2, max_jobs_per_user=1, max_queue_size=10)
+        started, positions = [], []
+        done = asyncio.Event()
+
+        heavy_user_jobs = [
+            asyncio.create_task(run_job(admission_service, 1, started, done, positions)) for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        other_user_job = asyncio.create_task(run_job(admission_service, 2, started, done, positions))
+        await asyncio.sleep(0.01)
+        assert started == [1, 2]
+        assert positions == [1, 2]
+        assert admission_service.waiting_jobs_count == 2
+
+        done.set()
+        await asyncio.gather(*heavy_user_jobs, other_user_job)
+        assert started == [1, 2, 1, 1]
+
+    asyncio.run(test())
+
+
+def test_queue_full():
+    """
+    Given:
+     - an admission service that runs a single job at once, whose queue holds a single job.
+
+    When:
+     - starting 3 jobs at once.
+
+    Then:
+     - make sure the third job is rejected with QueueFull.
+    """
+    async def test():
+        admission_service = AdmissionService(max_jobs=1, max_jobs_per_user=1, max_queue_size=1)
+        started, positions = [], []
+        done = asyncio.Event()
+
+        jobs = [asyncio.create_task(run_job(admission_service, user_id, started, done, positions)) for user_id in (1, 2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(QueueFull):
+            await run_job(admission_service, 3, started, done, positions)
+
+        done.set()
+        await asyncio.gather(*jobs)
+        assert started == [1, 2]
+
+    asyncio.run(test())
+
+
+def test_cancel_waiting_job():
+    """
+    Given:
+     - an admission service that runs a single job at once.
+
+    When:
+     - cancelling a job that waits in the queue.
+
+    Then:
+     - make sure the cancelled job leaves the queue and never runs.
+     - make sure the job that waits after it runs once the running job is done.
+    """
+    async def test():
+        admission_service = AdmissionService(max_jobs=1, max_jobs_per_user=1, max_queue_size=10)
+        started, positions = [], []
+        done = asyncio.Event()
+
+        running_job = asyncio.create_task(run_job(admission_service, 1, started, done, positions))
+        cancelled_job = asyncio.create_task(run_job(admission_service, 2, started, done, positions))
+        waiting_job = asyncio.create_task(run_job(admission_service, 3, started, done, positions))
+        await asyncio.sleep(0.01)
+
+        cancelled_job.cancel()
+        done.set()
+        await asyncio.gather(running_job, waiting_job)
+        assert cancelled_job.cancelled()
+        assert started == [1, 3]
+        assert admission_service.waiting_jobs_count == 0
+
+    asyncio.run(test())
+
+
+def test_failed_queued_notification_does_not_abort_the_job():
+    """
+    Given:
+     - an admission service that runs a single job at once, which already runs a job.
+     - a report of the position in the queue that fails, such as a status message that telegram does not accept.
+
+    When:
+     - another user starts a job, and the running job is done.
+
+    Then:
+     - make sure the job waits in the queue despite the failed report, and runs once the running job is done.
+    """
+    async def fail_to_report(position: int):
+        raise ConnectionError('telegram is not reachable')
+
+    async def test():
+        admission_service = AdmissionService(max_jobs=1, max_jobs_per_user=1, max_queue_size=10)
+        started = []
+        first_done, second_done = asyncio.Event(), asyncio.Event()
+
+        async def run_second_job():
+            async with admission_service.admit(2, on_queued=fail_to_report):
+                started.append(2)
+                await second_done.wait()
+
+        first_job = asyncio.create_task(run_job(admission_service, 1, started, first_done, []))
+        await asyncio.sleep(0.01)
+        second_job = asyncio.create_task(run_second_job())
+        await asyncio.sleep(0.01)
+        assert started == [1]
+        assert admission_service.waiting_jobs_count == 1
+
+        first_done.set()
+        await asyncio.sleep(0.01)
+        assert started == [1, 2]
+
+        second_done.set()
+        await asyncio.gather(first_job, second_job)
+
+    asyncio.run(test())
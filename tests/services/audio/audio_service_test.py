@@ -0,0 +1,79 @@
+import os
+import stat
+import sys
+import threading
+from typing import Generator
+
+import pytest
+
+from mr_file_converter.services.audio.audio_service import (AudioService,
+                                                            TranscodeError)
+
+# stands in for ffmpeg: echoes its input back as it arrives, or fails with its arguments when the input says so
+FAKE_FFMPEG = f'''#!{sys.executable}
+import sys
+while data := sys.stdin.buffer.read1(65536):
+    if data.startswith(b'fail'):
+        sys.stderr.write(' '.join(sys.argv[1:]))
+        sys.exit(1)
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+'''
+
+
+@pytest.fixture()
+def audio_service(tmp_path) -> AudioService:
+    ffmpeg_path = tmp_path / 'ffmpeg'
+    ffmpeg_path.write_text(FAKE_FFMPEG)
+    os.chmod(ffmpeg_path, os.stat(ffmpeg_path).st_mode | stat.S_IEXEC)
+    return AudioService(ffmpeg_path=str(ffmpeg_path), bitrate_kbps=128, max_workers=2)
+
+
+def test_transcode_while_the_source_arrives(audio_service: AudioService):
+    """
+    Given:
+     - a source whose second chunk arrives only once the first chunk was transcoded.
+
+    When:
+     - transcoding the source.
+
+    Then:
+     - make sure the transcoded chunks are yielded while the source still arrives.
+    """
+    first_chunk_transcoded = threading.Event()
+
+    def chunks() -> Generator[bytes, None, None]:
+        yield b'a' * 10
+        assert first_chunk_transcoded.wait(timeout=5)
+        yield b'b' * 10
+
+    transcoded = b''
+    for chunk in audio_service.to_mp3(chunks()):
+        transcoded += chunk
+        first_chunk_transcoded.set()
+
+    assert transcoded == b'a' * 10 + b'b' * 10
+
+
+def test_transcode_failure(audio_service: AudioService):
+    """
+    Given:
+     - Case 1: a source that ffmpeg fails to transcode.
+     - Case 2: a source that fails while it arrives.
+
+    When:
+     - transcoding the source.
+
+    Then:
+     - Case 1: make sure TranscodeError is raised with the error of ffmpeg, which is asked for the configured bitrate.
+     - Case 2: make sure the error of the source is raised.
+    """
+    with pytest.raises(TranscodeError, match='-b:a 128k'):
+        b''.join(audio_service.to_mp3(iter([b'fail'])))
+
+    def chunks() -> Generator[bytes, None, None]:
+        yield b'a' * 10
+        raise ConnectionError('download failed')
+
+    with pytest.raises(ConnectionError):
+        b''.join(audio_service.to_mp3(chunks()))
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from typing import cast
+from unittest.mock import MagicMock
+
+from pytest_mock import MockerFixture
+from telegram import Message
+
+from mr_file_converter.services.batch.batch_service import FileBatchService
+
+
+def create_message(message_id: int, chat_id: int = 1) -> Message:
+    return cast(Message, MagicMock(message_id=message_id, chat_id=chat_id))
+
+
+def test_collect_album():
+    """
+    Given:
+     - a batch service with a window of 0.3 seconds.
+     - an album of 3 files that arrive one after the other.
+
+    When:
+     - collecting the batch of the first file while the other files are still arriving.
+
+    Then:
+     - make sure all the files of the album are collected in the order they arrived.
+    """
+    batch_service = FileBatchService(window_seconds=0.3, max_batch_size=50)
+    messages = [create_message(message_id) for message_id in range(1, 4)]
+    batch_service.add(messages[0])
+
+    def add_files():
+        for message in messages[1:]:
+            time.sleep(0.05)
+            batch_service.add(message)
+
+    thread = threading.Thread(target=add_files)
+    thread.start()
+    batch = asyncio.run(batch_service.collect(messages[0]))
+    thread.join()
+
+    assert batch == messages
+
+
+def test_collect_after_window():
+    """
+    Given:
+     - a batch service with a window of 0.1 seconds.
+     - a file that arrived after the window of a previous file, in the same chat.
+     - a file that arrived at the same time in another chat.
+
+    When:
+     - collecting the batch of the last file.
+
+    Then:
+     - make sure the previous file and the file of the other chat are not part of the batch.
+    """
+    batch_service = FileBatchService(window_seconds=0.1, max_batch_size=50)
+    batch_service.add(create_message(1))
+    time.sleep(0.2)
+    message = create_message(2)
+    batch_service.add(message)
+    batch_service.add(create_message(3, chat_id=2))
+
+    assert asyncio.run(batch_service.collect(message)) == [message]
+
+
+def test_collect_max_batch_size():
+    """
+    Given:
+     - a batch service that collects up to 2 files, with a long window.
+     - 3 files that arrived together.
+
+    When:
+     - collecting the batch of the first file.
+
+    Then:
+     - make sure the batch is returned without waiting for the window.
+     - make sure only the first 2 files are part of the batch.
+    """
+    batch_service = FileBatchService(window_seconds=30, max_batch_size=2)
+    messages = [create_message(message_id) for message_id in range(1, 4)]
+    for message in messages:
+        batch_service.add(message)
+
+    start = time.monotonic()
+    assert asyncio.run(batch_service.collect(messages[0])) == messages[:2]
+    assert time.monotonic() - start < 1
+
+
+def test_collect_without_window():
+    """
+    Given:
+     - a batch service whose window is 0 (batches are disabled).
+
+    When:
+     - collecting the batch of a file.
+
+    Then:
+     - make sure the batch is only the file itself.
+    """
+    batch_service = FileBatchService(window_seconds=0, max_batch_size=50)
+    message = create_message(1)
+    batch_service.add(message)
+
+    assert asyncio.run(batch_service.collect(message)) == [message]
+
+
+def test_add_beyond_max_batch_size():
+    """
+    Given:
+     - a batch service that collects up to 2 files.
+
+    When:
+     - adding 5 files of the same chat within the window.
+
+    Then:
+     - make sure only the first 2 files are kept in the batch of the chat.
+    """
+    batch_service = FileBatchService(window_seconds=30, max_batch_size=2)
+    messages = [create_message(message_id) for message_id in range(1, 6)]
+    for message in messages:
+        batch_service.add(message)
+
+    assert batch_service._batches[1][1] == messages[:2]
+
+
+def test_stale_batches_are_dropped(mocker: MockerFixture):
+    """
+    Given:
+     - batches of 2 chats that nobody collected.
+
+    When:
+     - adding a file of a third chat once the window and the grace period of the batches are over.
+
+    Then:
+     - make sure the batches that nobody collected are dropped, and only the batch of the third chat is kept.
+    """
+    batch_service = FileBatchService(window_seconds=1, max_batch_size=50)
+    monotonic_mock = mocker.patch.object(time, 'monotonic', return_value=100.0)
+    batch_service.add(create_message(1, chat_id=1))
+    batch_service.add(create_message(2, chat_id=2))
+
+    monotonic_mock.return_value = 100.0 + 1 + batch_service.stale_batch_seconds + 1
+    batch_service.add(create_message(3, chat_id=3))
+
+    assert list(batch_service._batches) == [3]
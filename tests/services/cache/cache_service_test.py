@@ -0,0 +1,226 @@
+import os
+from contextlib import contextmanager
+from typing import Generator
+
+import pytest
+
+from mr_file_converter.services.cache.cache_service import \
+    ConversionCacheService
+from mr_file_converter.services.io.io_service import IOService
+
+
+@pytest.fixture()
+def source_file(tmp_path) -> str:
+    source_file_path = tmp_path / 'source.json'
+    source_file_path.write_text('{"a": 1}')
+    return str(source_file_path)
+
+
+class Converter:
+
+    def __init__(self, tmp_path, content: str = 'converted'):
+        self.tmp_path = tmp_path
+        self.content = content
+        self.calls = 0
+
+    @contextmanager
+    def convert(self) -> Generator[str, None, None]:
+        self.calls += 1
+        destination_file_path = self.tmp_path / f'destination_{self.calls}'
+        destination_file_path.write_text(self.content)
+        yield str(destination_file_path)
+        os.remove(destination_file_path)
+
+
+def test_cached_conversion_is_not_converted_again(
+    tmp_path, cache_service: ConversionCacheService, source_file: str
+):
+    """
+    Given:
+     - a source file that was already converted into yml
+
+    When:
+     - converting the same source file into yml again
+
+    Then:
+     - make sure the converter runs only once
+     - make sure the cached result has the content of the first conversion
+    """
+    converter = Converter(tmp_path)
+
+    for _ in range(2):
+        with cache_service.cached(source_file, 'yml', converter.convert) as destination_file_path:
+            with open(destination_file_path) as file:
+                assert file.read() == 'converted'
+
+    assert converter.calls == 1
+
+
+def test_cache_key_depends_on_format_options_and_version(
+    tmp_path, cache_service: ConversionCacheService, source_file: str
+):
+    """
+    Given:
+     - a source file
+
+    When:
+     - getting the cache keys for different requested formats, conversion options and converter versions
+
+    Then:
+     - make sure every combination gets its own key
+     - make sure a copy of the source file with the same content gets the same key
+    """
+    copy_file = tmp_path / 'copy.json'
+    copy_file.write_text('{"a": 1}')
+
+    yml_key = cache_service.get_key(source_file, 'yml')
+    assert yml_key == cache_service.get_key(str(copy_file), 'yml')
+    assert yml_key != cache_service.get_key(source_file, 'xml')
+    assert yml_key == cache_service.get_key(source_file, 'yml', options={})
+    assert cache_service.get_key(source_file, 'yml', options={'page_range': (0, 2)}) not in (
+        yml_key, cache_service.get_key(source_file, 'yml', options={'page_range': (1, 2)})
+    )
+
+    cache_service.converter_version = 'other'
+    assert yml_key != cache_service.get_key(source_file, 'yml')
+
+
+def test_least_recently_used_result_is_evicted(
+    tmp_path, cache_service: ConversionCacheService, source_file: str
+):
+    """
+    Given:
+     - a cache that is limited to 2 results
+
+    When:
+     - caching 3 different results, while the first one is accessed again after the second one is cached
+
+    Then:
+     - make sure the second result (least recently used) is evicted
+     - make sure the first and third results are still cached
+    """
+    cache_service.max_size_bytes = 2 * len('converted')
+    converter = Converter(tmp_path)
+
+    keys = []
+    for requested_format in ('yml', 'xml', 'text'):
+        with cache_service.cached(source_file, requested_format, converter.convert):
+            pass
+        keys.append(cache_service.get_key(source_file, requested_format))
+        if requested_format == 'xml':
+            os.utime(cache_service.get_path(keys[0]), (0, 0))
+            os.utime(cache_service.get_path(keys[1]), (0, 0))
+            cache_service.get(keys[0])
+
+    assert cache_service.get(keys[0])
+    assert not cache_service.get(keys[1])
+    assert cache_service.get(keys[2])
+
+
+def test_disabled_cache(tmp_path, cache_service: ConversionCacheService, source_file: str):
+    """
+    Given:
+     - a cache with a size limit of 0
+
+    When:
+     - converting the same source file twice
+
+    Then:
+     - make sure the converter runs every time and nothing is stored in the cache directory
+    """
+    cache_service.max_size_bytes = 0
+    converter = Converter(tmp_path)
+
+    for _ in range(2):
+        with cache_service.cached(source_file, 'yml', converter.convert):
+            pass
+
+    assert converter.calls == 2
+    assert not os.listdir(cache_service.cache_directory)
+
+
+def test_cached_many_converts_only_missing_formats(
+    tmp_path, cache_service: ConversionCacheService, source_file: str
+):
+    """
+    Given:
+     - a source file that was already converted into yml
+
+    When:
+     - converting the same source file into yml and xml at once
+
+    Then:
+     - make sure only the xml conversion runs
+     - make sure the results of both formats are yielded in the requested order
+    """
+    converter = Converter(tmp_path, content='yml')
+    with cache_service.cached(source_file, 'yml', converter.convert):
+        pass
+
+    converted_formats = []
+
+    @contextmanager
+    def convert_many(requested_formats):
+        converted_formats.extend(requested_formats)
+        with Converter(tmp_path, content='xml').convert() as destination_file_path:
+            yield {'xml': destination_file_path}
+
+    with cache_service.cached_many(source_file, ['yml', 'xml'], convert_many) as destination_file_paths:
+        assert list(destination_file_paths) == ['yml', 'xml']
+        assert [open(path).read() for path in destination_file_paths.values()] == ['yml', 'xml']
+
+    assert converted_formats == ['xml']
+
+
+def test_cached_many_hashes_the_source_once(
+    mocker, tmp_path, cache_service: ConversionCacheService, source_file: str
+):
+    """
+    Given:
+     - a source file
+
+    When:
+     - converting the source file into yml, xml and text at once
+
+    Then:
+     - make sure the source file is hashed only once for all the formats
+    """
+    hash_file_spy = mocker.spy(IOService, 'hash_file')
+
+    @contextmanager
+    def convert_many(requested_formats):
+        with Converter(tmp_path).convert() as destination_file_path:
+            yield {_format: destination_file_path for _format in requested_formats}
+
+    with cache_service.cached_many(source_file, ['yml', 'xml', 'text'], convert_many):
+        pass
+
+    assert hash_file_spy.call_count == 1
+
+
+def test_failed_put_leaves_no_temp_file(
+    mocker, tmp_path, cache_service: ConversionCacheService, source_file: str
+):
+    """
+    Given:
+     - a converted file whose copy into the cache fails halfway, such as when the disk is full
+
+    When:
+     - caching the converted file
+
+    Then:
+     - make sure the error is raised
+     - make sure the partial copy is removed from the cache directory
+    """
+    def copy_halfway(source_path: str, destination_path: str):
+        with open(destination_path, 'w') as file:
+            file.write('conv')
+        raise OSError('no space left on device')
+
+    mocker.patch('mr_file_converter.services.cache.cache_service.shutil.copyfile', side_effect=copy_halfway)
+
+    with Converter(tmp_path).convert() as destination_file_path:
+        with pytest.raises(OSError):
+            cache_service.put(cache_service.get_key(source_file, 'yml'), destination_file_path)
+
+    assert not os.listdir(cache_service.cache_directory)
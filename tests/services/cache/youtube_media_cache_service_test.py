@@ -0,0 +1,145 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+from telegram.error import BadRequest
+
+from mr_file_converter.services.cache.youtube_media_cache_service import \
+    YouTubeMediaCacheService
+from mr_file_converter.services.telegram.file_id_service import \
+    TelegramFileIdService
+
+
+@pytest.fixture()
+def youtube_media_cache_service(tmp_path) -> YouTubeMediaCacheService:
+    return YouTubeMediaCacheService(
+        file_id_service=TelegramFileIdService(database_path=str(tmp_path / 'file_ids.db'))
+    )
+
+
+def sent_message(file_id: str) -> MagicMock:
+    message = MagicMock()
+    message.effective_attachment.file_id = file_id
+    return message
+
+
+def test_send_by_file_id_of_earlier_download(youtube_media_cache_service: YouTubeMediaCacheService):
+    """
+    Given:
+     - a media that was never sent.
+
+    When:
+     - sending the media twice.
+
+    Then:
+     - make sure the media is downloaded and sent the first time.
+     - make sure the media is sent by the file_id telegram returned for it the second time, without downloading it.
+    """
+    key = youtube_media_cache_service.get_key('rn9AQoI7mYU', 'mp4', '720p')
+    download_and_send = MagicMock(return_value=sent_message('video_123'))
+    send_file_id = MagicMock()
+
+    youtube_media_cache_service.send(key, send_file_id=send_file_id, download_and_send=download_and_send)
+    youtube_media_cache_service.send(key, send_file_id=send_file_id, download_and_send=download_and_send)
+
+    assert download_and_send.call_count == 1
+    send_file_id.assert_called_once_with('video_123')
+
+
+def test_concurrent_requests_coalesce(youtube_media_cache_service: YouTubeMediaCacheService):
+    """
+    Given:
+     - 5 requests for the same media that was never sent.
+
+    When:
+     - sending the media for all the requests at once.
+
+    Then:
+     - make sure the media is downloaded only once.
+     - make sure the rest of the requests send it by the file_id of the download.
+    """
+    key = youtube_media_cache_service.get_key('rn9AQoI7mYU', 'mp3', '128kbps')
+    all_requests_waiting = threading.Event()
+
+    def download_and_send():
+        assert all_requests_waiting.wait(timeout=5)
+        return sent_message('audio_123')
+
+    download_and_send_mock = MagicMock(side_effect=download_and_send)
+    send_file_id = MagicMock()
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [
+            executor.submit(
+                youtube_media_cache_service.send, key, send_file_id=send_file_id, download_and_send=download_and_send_mock
+            )
+            for _ in range(5)
+        ]
+        threading.Timer(0.2, all_requests_waiting.set).start()
+        for future in futures:
+            future.result(timeout=10)
+
+    assert download_and_send_mock.call_count == 1
+    assert send_file_id.call_count == 4
+    assert {call.args for call in send_file_id.call_args_list} == {('audio_123',)}
+
+
+def test_failed_download_fails_waiting_requests(youtube_media_cache_service: YouTubeMediaCacheService):
+    """
+    Given:
+     - 2 requests for the same media, whose download fails.
+
+    When:
+     - sending the media for both requests at once.
+
+    Then:
+     - make sure the media is downloaded only once, and both requests fail with the error of the download.
+     - make sure nothing is cached for the media.
+    """
+    key = youtube_media_cache_service.get_key('rn9AQoI7mYU', 'mp4', '720p')
+    second_request_waiting = threading.Event()
+
+    def download_and_send():
+        assert second_request_waiting.wait(timeout=5)
+        raise ConnectionError('download failed')
+
+    download_and_send_mock = MagicMock(side_effect=download_and_send)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(
+                youtube_media_cache_service.send, key, send_file_id=MagicMock(), download_and_send=download_and_send_mock
+            )
+            for _ in range(2)
+        ]
+        threading.Timer(0.2, second_request_waiting.set).start()
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result(timeout=10)
+
+    assert download_and_send_mock.call_count == 1
+    assert youtube_media_cache_service.file_id_service.get(key) is None
+
+
+def test_stale_file_id(youtube_media_cache_service: YouTubeMediaCacheService):
+    """
+    Given:
+     - a media whose file_id telegram does not accept anymore.
+
+    When:
+     - sending the media.
+
+    Then:
+     - make sure the media is downloaded and sent again, and the new file_id replaces the stale one.
+    """
+    key = youtube_media_cache_service.get_key('rn9AQoI7mYU', 'mp4', '720p')
+    youtube_media_cache_service.file_id_service.set(key, 'stale_123')
+
+    youtube_media_cache_service.send(
+        key,
+        send_file_id=MagicMock(side_effect=BadRequest('wrong file identifier')),
+        download_and_send=MagicMock(return_value=sent_message('video_456'))
+    )
+
+    assert youtube_media_cache_service.file_id_service.get(key) == 'video_456'
@@ -0,0 +1,191 @@
+import os
+from contextlib import contextmanager
+from typing import List
+
+import pytest
+
+from mr_file_converter.services.conversion.conversion_registry import (
+    ConversionRegistry, chain_conversions, fan_out_conversions)
+from mr_file_converter.services.conversion.errors import ConversionNotSupported
+from mr_file_converter.services.xml.xml_service import XMLService
+
+
+@pytest.mark.parametrize(
+    'source_format, target_format, expected_plan',
+    [
+        ('json', 'yml', ['json->yml']),
+        ('xml', 'text', ['xml->json', 'json->text']),
+        ('photo', 'docx', ['photo->pdf', 'pdf->docx']),
+        ('photo', 'text', ['photo->text']),
+        ('html', 'docx', ['html->pdf', 'pdf->docx'])
+    ]
+)
+def test_plan(
+    conversion_registry: ConversionRegistry, source_format: str, target_format: str, expected_plan: List[str]
+):
+    """
+    Given:
+     - Case 1: json to yml, which a service converts directly
+     - Case 2: xml to text, which no service converts directly
+     - Case 3: photo to docx, which no service converts directly
+     - Case 4: photo to text, which can be converted directly or through pdf
+     - Case 5: html to docx, which no service converts directly
+
+    When:
+     - planning the conversion
+
+    Then:
+     - make sure the cheapest chain of conversions is planned
+    """
+    plan = conversion_registry.plan(source_format, target_format)
+
+    assert [f'{step.source_format}->{step.target_format}' for step in plan] == expected_plan
+
+
+def test_plan_unreachable_format(conversion_registry: ConversionRegistry):
+    """
+    Given:
+     - docx, which cannot be converted to any format
+
+    When:
+     - planning the conversion of docx to pdf
+
+    Then:
+     - make sure the ConversionNotSupported exception is raised
+    """
+    with pytest.raises(ConversionNotSupported):
+        conversion_registry.plan('docx', 'pdf')
+
+
+def test_get_reachable_formats(conversion_registry: ConversionRegistry):
+    """
+    Given:
+     - the conversions of all the services
+
+    When:
+     - getting the formats xml and pdf can be converted to
+
+    Then:
+     - make sure formats that can only be reached through other formats are included
+     - make sure the formats are ordered from the cheapest conversion to the most expensive one
+    """
+    assert conversion_registry.get_reachable_formats('xml') == ['json', 'yml', 'text']
+    assert conversion_registry.get_reachable_formats('pdf') == ['text', 'docx']
+
+
+class FakeService:
+    """
+    Converts a file by appending the target format to its content.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.intermediate_results: List[str] = []
+
+    @contextmanager
+    def convert(self, source_file_path: str, custom_file_name: str, target_format: str):
+        file_path = str(self.directory / f'{custom_file_name}.{target_format}')
+        with open(source_file_path) as source_file, open(file_path, 'w') as file:
+            file.write(f'{source_file.read()}->{target_format}')
+        try:
+            yield file_path
+        finally:
+            os.remove(file_path)
+
+    def to_json(self, source_file_path: str, custom_file_name: str):
+        return self.convert(source_file_path, custom_file_name, 'json')
+
+    def to_text(self, source_file_path: str, custom_file_name: str):
+        self.intermediate_results.append(source_file_path)
+        return self.convert(source_file_path, custom_file_name, 'text')
+
+
+def test_chain_conversions(tmp_path):
+    """
+    Given:
+     - two conversions that are chained one after the other
+
+    When:
+     - running the chained conversions
+
+    Then:
+     - make sure every conversion converts the result of the previous conversion
+     - make sure the intermediate result is removed once the next conversion is done with it
+     - make sure the final result is removed once it has been used
+    """
+    service = FakeService(tmp_path)
+    source_file_path = tmp_path / 'test.xml'
+    source_file_path.write_text('xml')
+
+    with chain_conversions(
+        [(service, 'to_json'), (service, 'to_text')], str(source_file_path), 'test'
+    ) as text_file:
+        assert open(text_file).read() == 'xml->json->text'
+        assert not os.path.exists(service.intermediate_results[0])
+
+    assert not os.path.exists(text_file)
+
+
+def test_chain_structured_conversions_in_memory(
+    mocker, conversion_registry: ConversionRegistry, xml_service: XMLService, base_file_path: str
+):
+    """
+    Given:
+     - a xml file
+
+    When:
+     - running the planned xml to text conversion, which goes through json
+
+    Then:
+     - make sure the xml is not written into an intermediate json file
+     - make sure the text is the json representation of the xml
+    """
+    source_file_path = f'{base_file_path}/services/xml/test_data/test.xml'
+    to_json_spy = mocker.spy(xml_service, 'to_json')
+
+    with chain_conversions(
+        [(step.service, step.method_name) for step in conversion_registry.plan('xml', 'text')],
+        source_file_path,
+        'test'
+    ) as text_file:
+        assert xml_service.json_converter.loads(
+            xml_service.io_service.read_file(text_file)
+        ) == xml_service.get_xml_file_content(source_file_path)
+
+    assert not to_json_spy.called
+
+
+def test_fan_out_conversions(
+    mocker, conversion_registry: ConversionRegistry, xml_service: XMLService, base_file_path: str
+):
+    """
+    Given:
+     - a xml file
+
+    When:
+     - converting the xml file into json, yml and text at once
+
+    Then:
+     - make sure the xml file is parsed only once
+     - make sure every format is converted
+     - make sure the converted files are removed once they have been used
+    """
+    source_file_path = f'{base_file_path}/services/xml/test_data/test.xml'
+    read_spy = mocker.spy(xml_service.xml_converter, 'read')
+
+    with fan_out_conversions(
+        {
+            _format: [(step.service, step.method_name) for step in conversion_registry.plan('xml', _format)]
+            for _format in ('json', 'yml', 'text')
+        },
+        source_file_path,
+        'test'
+    ) as converted_files:
+        assert read_spy.call_count == 1
+        assert xml_service.json_converter.read(converted_files['json']) == xml_service.get_xml_file_content(
+            source_file_path
+        )
+        assert xml_service.yml_converter.read(converted_files['yml'])
+        assert converted_files['text'].endswith('.txt')
+
+    assert not any(os.path.exists(file_path) for file_path in converted_files.values())
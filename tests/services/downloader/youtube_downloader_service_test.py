@@ -0,0 +1,93 @@
+from urllib.error import URLError
+
+import pytest
+from pytest_mock import MockerFixture
+
+from mr_file_converter.services.audio.audio_service import AudioService
+from mr_file_converter.services.downloader.errors import YouTubeVideoTooLarge
+from mr_file_converter.services.downloader.youtube_downloader_service import \
+    YouTubeAudioDownloaderService
+from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.telegram.telegram_service import \
+    TelegramService
+
+
+@pytest.fixture()
+def youtube(mocker: MockerFixture):
+    """
+    A video of 60 seconds, its mp3 of 128kbps is 960000 bytes.
+    """
+    return mocker.MagicMock(length=60, watch_url='https://www.youtube.com/watch?v=rn9AQoI7mYU')
+
+
+def get_audio_downloader(
+    youtube, telegram_service: TelegramService, io_service: IOService, max_file_size_bytes: int
+) -> YouTubeAudioDownloaderService:
+    return YouTubeAudioDownloaderService(
+        youtube,
+        telegram_service,
+        io_service,
+        AudioService(ffmpeg_path=None, bitrate_kbps=128, max_workers=1),
+        max_file_size_bytes=max_file_size_bytes
+    )
+
+
+@pytest.mark.parametrize(
+    'stream_sizes, expected_abr',
+    [
+        ({'160kbps': 10, '128kbps': 5, '48kbps': 1}, '160kbps'),
+        ({'160kbps': 100, '128kbps': 50, '48kbps': 10}, '48kbps'),
+        ({'160kbps': 100, '128kbps': 20, '48kbps': 10}, '128kbps')
+    ]
+)
+def test_select_the_best_audio_stream_that_fits(
+    mocker: MockerFixture,
+    youtube,
+    telegram_service: TelegramService,
+    io_service: IOService,
+    stream_sizes,
+    expected_abr: str
+):
+    """
+    Given:
+     - audio streams of a video in several bitrates, some of them larger than the size limit of 20 bytes.
+
+    When:
+     - selecting the audio stream to download
+
+    Then:
+     - make sure the best stream whose size fits the size limit is selected, by the sizes of the streams.
+    """
+    streams = [mocker.MagicMock(abr=abr, filesize=filesize) for abr, filesize in stream_sizes.items()]
+    audio_downloader = get_audio_downloader(youtube, telegram_service, io_service, max_file_size_bytes=20)
+    mocker.patch.object(audio_downloader, 'get_streams', return_value=streams)
+
+    assert audio_downloader.select_stream().abr == expected_abr
+
+
+def test_select_audio_stream_without_size(
+    mocker: MockerFixture,
+    youtube,
+    telegram_service: TelegramService,
+    io_service: IOService
+):
+    """
+    Given:
+     - an audio stream whose size is not in its metadata and cannot be requested.
+     - a size limit that is smaller than the mp3 of the video.
+
+    When:
+     - selecting the audio stream to download
+
+    Then:
+     - make sure the size of the stream is estimated by the bitrate of the mp3 and the length of the video.
+     - make sure YouTubeVideoTooLarge is raised, as the estimated size is over the size limit.
+    """
+    stream = mocker.MagicMock()
+    type(stream).filesize = mocker.PropertyMock(side_effect=URLError('no connection'))
+    audio_downloader = get_audio_downloader(youtube, telegram_service, io_service, max_file_size_bytes=900000)
+    mocker.patch.object(audio_downloader, 'get_streams', return_value=[stream])
+
+    assert audio_downloader.get_file_size(stream) == 960000
+    with pytest.raises(YouTubeVideoTooLarge):
+        audio_downloader.select_stream()
@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pytest_mock import MockerFixture
+
+from mr_file_converter.services.downloader import youtube_metadata_service
+from mr_file_converter.services.downloader.youtube_metadata_service import \
+    YouTubeMetadataService
+
+
+@pytest.mark.parametrize(
+    'url, expected_video_id',
+    [
+        ('https://www.youtube.com/watch?v=rn9AQoI7mYU&list=RD7pKrVB5f2W0&index=5', 'rn9AQoI7mYU'),
+        ('https://m.youtube.com/watch?feature=share&v=rn9AQoI7mYU', 'rn9AQoI7mYU'),
+        ('youtube.com/watch?v=rn9AQoI7mYU', 'rn9AQoI7mYU'),
+        ('https://youtu.be/rn9AQoI7mYU?t=42', 'rn9AQoI7mYU'),
+        ('https://www.youtube.com/shorts/rn9AQoI7mYU', 'rn9AQoI7mYU'),
+        ('https://www.youtube-nocookie.com/embed/rn9AQoI7mYU', 'rn9AQoI7mYU'),
+        ('https://www.youtube.com/watch?v=rn9AQoI7mY', None),
+        ('https://www.youtube.com/watch?v=', None),
+        ('https://www.youtube.com/watch?list=RD7pKrVB5f2W0', None),
+        ('https://www.youtube.com/playlist?list=RD7pKrVB5f2W0', None),
+        ('https://www.notyoutube.com/watch?v=rn9AQoI7mYU', None),
+        ('rn9AQoI7mYU', None),
+        ('a', None)
+    ]
+)
+def test_parse_video_id(url: str, expected_video_id: str | None):
+    """
+    Given:
+     - a URL.
+
+    When:
+     - parsing the id of the video of the URL.
+
+    Then:
+     - make sure the id of the video is parsed from the URLs of YouTube videos, and None is returned otherwise.
+    """
+    assert YouTubeMetadataService.parse_video_id(url) == expected_video_id
+
+
+def test_metadata_is_fetched_once(mocker: MockerFixture):
+    """
+    Given:
+     - 5 concurrent requests for the metadata of the same video.
+
+    When:
+     - getting the metadata of the video, before and after it expires.
+
+    Then:
+     - make sure the metadata is fetched once for all the concurrent requests.
+     - make sure the metadata is fetched again only once it expires.
+    """
+    all_requests_waiting = threading.Event()
+
+    def fetch(url: str):
+        assert all_requests_waiting.wait(timeout=5)
+        return mocker.MagicMock(watch_url=url)
+
+    youtube_mock = mocker.patch.object(youtube_metadata_service, 'YouTube', side_effect=fetch)
+    monotonic_mock = mocker.patch.object(youtube_metadata_service.time, 'monotonic', return_value=0)
+    metadata_service = YouTubeMetadataService(ttl_seconds=60, max_entries=10)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(metadata_service.get, 'rn9AQoI7mYU') for _ in range(5)]
+        threading.Timer(0.2, all_requests_waiting.set).start()
+        videos = {future.result(timeout=10) for future in futures}
+
+    assert youtube_mock.call_count == 1
+    assert len(videos) == 1
+    assert videos.pop().watch_url == 'https://youtube.com/watch?v=rn9AQoI7mYU'
+    assert metadata_service.get('rn9AQoI7mYU')
+    assert youtube_mock.call_count == 1
+
+    monotonic_mock.return_value = 61
+    metadata_service.get('rn9AQoI7mYU')
+    assert youtube_mock.call_count == 2
+
+
+def test_least_recently_used_metadata_is_evicted(mocker: MockerFixture):
+    """
+    Given:
+     - a memoization of up to 2 videos.
+
+    When:
+     - getting the metadata of 3 videos.
+
+    Then:
+     - make sure the metadata of the least recently used video is evicted.
+    """
+    youtube_mock = mocker.patch.object(youtube_metadata_service, 'YouTube')
+    metadata_service = YouTubeMetadataService(ttl_seconds=60, max_entries=2)
+
+    for video_id in ('aaaaaaaaaaa', 'bbbbbbbbbbb', 'aaaaaaaaaaa', 'ccccccccccc'):
+        metadata_service.get(video_id)
+
+    assert metadata_service.get_memoized('aaaaaaaaaaa')
+    assert metadata_service.get_memoized('ccccccccccc')
+    assert not metadata_service.get_memoized('bbbbbbbbbbb')
+    assert youtube_mock.call_count == 3
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from mr_file_converter.services.event_loop.event_loop_service import \
+    EventLoopService
+
+
+@pytest.fixture()
+def event_loop_service():
+    event_loop_service = EventLoopService(blocking_workers=1)
+    yield event_loop_service
+    event_loop_service.shutdown()
+
+
+@pytest.fixture()
+def callback_context() -> MagicMock:
+    context = MagicMock()
+    context.settled = threading.Event()
+    context.dispatcher.update_persistence.side_effect = lambda update: context.settled.set()
+    context.dispatcher.dispatch_error.side_effect = lambda *args, **kwargs: context.settled.set()
+    return context
+
+
+def test_run_coroutine_callback(event_loop_service: EventLoopService, callback_context: MagicMock):
+    """
+    Given:
+     - a callback that is a coroutine function.
+
+    When:
+     - running the callback on the event loop.
+
+    Then:
+     - make sure the promise of the callback is completed with the state the callback returned.
+     - make sure the persistence is updated once the callback is done.
+    """
+    async def callback(update, context):
+        await asyncio.sleep(0.01)
+        return 1
+
+    promise = event_loop_service.callback(callback)(MagicMock(), callback_context)
+
+    assert promise.result(timeout=5) == 1
+    assert callback_context.settled.wait(timeout=5)
+    assert callback_context.dispatcher.update_persistence.called
+
+
+def test_run_blocking_callback(event_loop_service: EventLoopService, callback_context: MagicMock):
+    """
+    Given:
+     - a callback that is a plain function.
+
+    When:
+     - running the callback on the event loop.
+
+    Then:
+     - make sure the callback runs on the blocking executor, rather than on the event loop itself.
+    """
+    promise = event_loop_service.callback(
+        lambda update, context: threading.current_thread().name
+    )(MagicMock(), callback_context)
+
+    assert promise.result(timeout=5).startswith('blocking')
+
+
+def test_run_failing_callback(event_loop_service: EventLoopService, callback_context: MagicMock):
+    """
+    Given:
+     - a callback that raises an error.
+
+    When:
+     - running the callback on the event loop.
+
+    Then:
+     - make sure the error is dispatched to the error handlers of the dispatcher along with the promise.
+    """
+    async def callback(update, context):
+        raise ValueError('error')
+
+    update = MagicMock()
+    promise = event_loop_service.callback(callback)(update, callback_context)
+
+    assert callback_context.settled.wait(timeout=5)
+    assert isinstance(promise.exception, ValueError)
+    callback_context.dispatcher.dispatch_error.assert_called_once_with(update, promise.exception, promise=promise)
+
+
+def test_waiting_callbacks_hold_no_threads(event_loop_service: EventLoopService, callback_context: MagicMock):
+    """
+    Given:
+     - an event loop service with a single blocking thread.
+     - 50 callbacks that wait for 0.5 seconds each.
+
+    When:
+     - running all the callbacks at once.
+
+    Then:
+     - make sure the callbacks wait concurrently, rather than one after the other.
+    """
+    async def callback(update, context):
+        await asyncio.sleep(0.5)
+        return 1
+
+    start = time.monotonic()
+    promises = [event_loop_service.callback(callback)(MagicMock(), callback_context) for _ in range(50)]
+
+    assert [promise.result(timeout=10) for promise in promises] == [1] * 50
+    assert time.monotonic() - start < 5
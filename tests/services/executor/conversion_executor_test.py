@@ -0,0 +1,306 @@
+import os
+from contextlib import nullcontext
+
+import PyPDF2
+import pytest
+from pytest_mock import MockerFixture
+
+from mr_file_converter.containers import Converters, Services
+from mr_file_converter.services.conversion.conversion_registry import \
+    ConversionRegistry
+from mr_file_converter.services.executor import conversion_executor
+from mr_file_converter.services.executor.conversion_executor import (
+    ProcessPoolConversionExecutor, WorkerError, raises_picklable_errors)
+from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.json.json_service import JsonService
+from mr_file_converter.services.pdf import pdf_service
+from mr_file_converter.services.pdf.pdf_service import PdfService
+from mr_file_converter.services.xml.xml_service import XMLService
+
+
+@pytest.fixture()
+def process_pool_conversion_executor(io_service: IOService):
+    conversion_executor = ProcessPoolConversionExecutor(
+        io_service=io_service, max_workers=1, format_limits={'json:yml': 1}
+    )
+    yield conversion_executor
+    conversion_executor.shutdown()
+
+
+def test_execute_in_worker_process(
+    process_pool_conversion_executor: ProcessPoolConversionExecutor,
+    json_service: JsonService,
+    base_file_path: str
+):
+    """
+    Given:
+     - a json file
+     - a conversion executor with a process pool
+
+    When:
+     - executing the json to yml conversion
+
+    Then:
+     - make sure the converted yml file exists and can be read
+     - make sure the converted file is removed once it has been used
+    """
+    with process_pool_conversion_executor.execute(
+        ConversionRegistry(services=[json_service]).plan('json', 'yml'),
+        f'{base_file_path}/services/json/test_data/test.json',
+        'test'
+    ) as yml_file:
+        assert yml_file.endswith('.yml')
+        assert json_service.yml_converter.read(yml_file)
+
+    assert not os.path.exists(yml_file)
+
+
+def test_execute_chain_in_worker_process(
+    process_pool_conversion_executor: ProcessPoolConversionExecutor,
+    json_service: JsonService,
+    xml_service: XMLService,
+    base_file_path: str
+):
+    """
+    Given:
+     - a xml file
+     - a conversion executor with a process pool
+
+    When:
+     - executing the planned xml to text conversion, which goes through json
+
+    Then:
+     - make sure the converted text file is the json representation of the xml
+    """
+    with process_pool_conversion_executor.execute(
+        ConversionRegistry(services=[json_service, xml_service]).plan('xml', 'text'),
+        f'{base_file_path}/services/xml/test_data/test.xml',
+        'test'
+    ) as text_file:
+        assert text_file.endswith('.txt')
+        assert json_service.json_converter.loads(
+            json_service.io_service.read_file(text_file)
+        ) == xml_service.get_xml_file_content(f'{base_file_path}/services/xml/test_data/test.xml')
+
+
+def test_execute_many_in_worker_process(
+    process_pool_conversion_executor: ProcessPoolConversionExecutor,
+    json_service: JsonService,
+    base_file_path: str
+):
+    """
+    Given:
+     - a json file
+     - a conversion executor with a process pool
+
+    When:
+     - executing the conversions of the json file into yml and xml at once
+
+    Then:
+     - make sure both converted files exist and can be read
+     - make sure the converted files are removed once they have been used
+    """
+    conversion_registry = ConversionRegistry(services=[json_service])
+
+    with process_pool_conversion_executor.execute_many(
+        {_format: conversion_registry.plan('json', _format) for _format in ('yml', 'xml')},
+        f'{base_file_path}/services/json/test_data/test.json',
+        'test'
+    ) as converted_files:
+        assert json_service.yml_converter.read(converted_files['yml'])
+        assert json_service.xml_converter.read(converted_files['xml'])
+
+    assert not any(os.path.exists(file_path) for file_path in converted_files.values())
+
+
+def test_execute_inline_services_in_calling_process(
+    mocker: MockerFixture,
+    process_pool_conversion_executor: ProcessPoolConversionExecutor,
+    json_service: JsonService,
+    xml_service: XMLService,
+    base_file_path: str
+):
+    """
+    Given:
+     - a conversion executor whose XMLService conversions run inline
+     - a xml file
+
+    When:
+     - executing the planned xml to text conversion, which goes through json
+
+    Then:
+     - make sure the whole chain runs in the calling process, without starting the worker processes
+    """
+    process_pool_conversion_executor.inline_services = {'xml'}
+    pool_mocker = mocker.patch.object(ProcessPoolConversionExecutor, 'pool')
+
+    with process_pool_conversion_executor.execute(
+        ConversionRegistry(services=[json_service, xml_service]).plan('xml', 'text'),
+        f'{base_file_path}/services/xml/test_data/test.xml',
+        'test'
+    ) as text_file:
+        assert text_file.endswith('.txt')
+
+    assert not pool_mocker.submit.called
+
+
+def test_worker_services_without_pools(monkeypatch: pytest.MonkeyPatch):
+    """
+    Given:
+     - the services of a conversion worker process
+
+    When:
+     - initializing the worker
+
+    Then:
+     - make sure the services of the worker do not start pools of processes of their own
+    """
+    # the services of the worker are restored once the test is done
+    monkeypatch.setattr(conversion_executor, '_worker_services', None)
+    conversion_executor._init_worker()
+    worker_services = conversion_executor._worker_services
+
+    assert worker_services is not None
+    assert worker_services.ocr().max_workers == 0
+    assert worker_services.pdf().max_workers == 1
+
+
+@pytest.fixture()
+def default_services():
+    """
+    The services as they are wired by default, with 2 pdf workers.
+    """
+    services = Services(converters=Converters())
+    services.pdf.add_kwargs(max_workers=2)
+    yield services
+    services.conversion_executor().shutdown()
+    services.pdf().shutdown()
+
+
+def test_default_executor_runs_pdf_jobs_on_the_pdf_workers(
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    default_services: Services,
+    multi_page_pdf_file_path: str
+):
+    """
+    Given:
+     - the conversion executor and the pdf service as they are wired by default, with 2 pdf workers
+     - a pdf file of 6 pages
+
+    When:
+     - executing the pdf to docx conversion
+
+    Then:
+     - make sure the job is not run by a conversion worker process, where the pdf service has a single worker
+     - make sure the pages are sharded between the 2 pdf workers
+    """
+    monkeypatch.setattr(PdfService, 'min_docx_pages_per_shard', 1)
+    conversion_executor_pool_mocker = mocker.patch.object(ProcessPoolConversionExecutor, 'pool')
+    pdf_pool_spy = mocker.spy(pdf_service, 'ProcessPoolExecutor')
+
+    with default_services.conversion_executor().execute(
+        default_services.conversion_registry().plan('pdf', 'docx'), multi_page_pdf_file_path, 'test'
+    ) as docx_file:
+        assert docx_file.endswith('.docx')
+
+    assert not conversion_executor_pool_mocker.submit.called
+    assert pdf_pool_spy.call_args.kwargs['max_workers'] == 2
+
+
+def test_default_executor_extracts_pdf_text_in_parallel(
+    mocker: MockerFixture,
+    default_services: Services,
+    multi_page_pdf_file_path: str
+):
+    """
+    Given:
+     - the conversion executor and the pdf service as they are wired by default, with 2 pdf workers and chunks of 2
+       pages
+     - a pdf file of 6 pages
+
+    When:
+     - executing the pdf to text conversion
+
+    Then:
+     - make sure the chunks of pages are extracted by the 2 pdf workers
+     - make sure the text of all the pages is written in order
+    """
+    default_services.pdf.add_kwargs(pages_per_chunk=2)
+    pdf_pool_spy = mocker.spy(pdf_service, 'ProcessPoolExecutor')
+
+    with default_services.conversion_executor().execute(
+        default_services.conversion_registry().plan('pdf', 'text'), multi_page_pdf_file_path, 'test'
+    ) as text_file:
+        with open(text_file) as file:
+            assert file.read() == '\n'.join(
+                page.extract_text() for page in PyPDF2.PdfReader(multi_page_pdf_file_path).pages
+            )
+
+    assert pdf_pool_spy.call_args.kwargs['max_workers'] == 2
+
+
+def test_format_limit(process_pool_conversion_executor: ProcessPoolConversionExecutor):
+    """
+    Given:
+     - a conversion executor that limits json to yml conversions to 1 at a time
+
+    When:
+     - getting the limits of json to yml and of json to xml conversions
+
+    Then:
+     - make sure json to yml conversion cannot run while another json to yml conversion runs
+     - make sure json to xml conversions are not limited
+    """
+    json_to_yml_limit = process_pool_conversion_executor.get_format_limit('json', 'yml')
+
+    with json_to_yml_limit:
+        assert not json_to_yml_limit.acquire(blocking=False)  # type: ignore
+        assert isinstance(
+            process_pool_conversion_executor.get_format_limit('json', 'xml'), nullcontext
+        )
+
+
+def test_parse_format_limits():
+    """
+    Given:
+     - format limits configuration
+
+    When:
+     - parsing the format limits
+
+    Then:
+     - make sure the limits are parsed per format
+    """
+    assert ProcessPoolConversionExecutor.parse_format_limits('photo:text=2, docx=1') == {
+        'photo:text': 2, 'docx': 1
+    }
+    assert ProcessPoolConversionExecutor.parse_format_limits('') == {}
+
+
+class UnpicklableError(Exception):
+
+    def __init__(self):
+        super().__init__('cannot be created again from its args')
+
+
+@pytest.mark.parametrize('error, expected_error', [(UnpicklableError(), WorkerError), (ValueError(), ValueError)])
+def test_raises_picklable_errors(error: Exception, expected_error: type):
+    """
+    Given:
+     - a function of a worker process that raises an error which cannot be pickled.
+     - a function of a worker process that raises an error which can be pickled.
+
+    When:
+     - calling the functions.
+
+    Then:
+     - make sure the error which cannot be pickled is replaced by a WorkerError.
+     - make sure the error which can be pickled is raised as is.
+    """
+    @raises_picklable_errors
+    def worker_function():
+        raise error
+
+    with pytest.raises(expected_error):
+        worker_function()
@@ -1,4 +1,6 @@
 import os.path
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
@@ -87,3 +89,52 @@ def test_html_to_text(html_service: HTMLService, io_service: IOService, html_tes
     ) as text_file:
         assert os.path.exists(text_file)
         assert io_service.read_file(text_file)
+
+
+class FakeRendererService:
+    """
+    Renders a html file by copying it into the output file slowly, so concurrent renders overlap.
+    """
+
+    @staticmethod
+    def render_file(source_file_path: str, file_path: str, output_format: str):
+        with open(source_file_path) as source_file:
+            html = source_file.read()
+        for char in html:
+            with open(file_path, 'a') as file:
+                file.write(char)
+            time.sleep(0.001)
+
+
+@pytest.mark.parametrize('conversion', ['to_png', 'to_jpg'])
+def test_concurrent_html_to_image_with_same_name(io_service: IOService, tmp_path, conversion: str):
+    """
+    Given:
+     - 8 different html files.
+     - the same custom file name for all of them.
+
+    When:
+     - converting all the html files into images concurrently.
+
+    Then:
+     - make sure every conversion writes its image into a path of its own, with the requested file name.
+     - make sure no conversion overrides the image of another conversion.
+    """
+    html_service = HTMLService(io_service=io_service, renderer_service=FakeRendererService())  # type: ignore
+    html_files = []
+    for number in range(8):
+        html_file = tmp_path / f'{number}.html'
+        html_file.write_text(f'<p>{number}</p>')
+        html_files.append(str(html_file))
+
+    def convert(html_file: str):
+        with getattr(html_service, conversion)(source_file_path=html_file, custom_file_name='same') as image_file:
+            with open(image_file) as file:
+                return image_file, io_service.read_file(html_file) == file.read()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(convert, html_files))
+
+    assert len({image_file for image_file, _ in results}) == 8
+    assert all(os.path.basename(image_file).startswith('same.') for image_file, _ in results)
+    assert all(is_content_of_its_own for _, is_content_of_its_own in results)
@@ -1,4 +1,8 @@
 import os.path
+import tempfile
+import zipfile
+
+import pytest
 
 from mr_file_converter.services.io.io_service import IOService
 
@@ -16,3 +20,86 @@ def test_create_temp_file(io_service: IOService):
    """
     with io_service.create_temp_file(prefix='test', suffix='txt') as file_name:
         assert os.path.exists(file_name)
+
+
+def test_create_job_file(io_service: IOService):
+    """
+    Given:
+    - the same file name for two jobs
+
+    When:
+    - creating a job file for each job
+
+    Then:
+    - make sure both paths have the requested file name, in a different directory
+    - make sure the directory of a job is removed once the job is done
+   """
+    with io_service.create_job_file('test.png') as first_file, io_service.create_job_file('test.png') as second_file:
+        assert os.path.basename(first_file) == os.path.basename(second_file) == 'test.png'
+        assert os.path.dirname(first_file) != os.path.dirname(second_file)
+
+    assert not os.path.exists(os.path.dirname(first_file))
+
+
+def test_create_zip_file(io_service: IOService, tmp_path):
+    """
+    Given:
+    - two files
+
+    When:
+    - creating a zip file of both files
+
+    Then:
+    - make sure the zip file has the requested file name
+    - make sure both files are in the zip file under their archive names
+   """
+    (tmp_path / 'first').write_text('first')
+    (tmp_path / 'second').write_text('second')
+
+    with io_service.create_zip_file(
+        'test.zip', files={'test.json': str(tmp_path / 'first'), 'test.yml': str(tmp_path / 'second')}
+    ) as zip_file:
+        assert os.path.basename(zip_file) == 'test.zip'
+        with zipfile.ZipFile(zip_file) as archive:
+            assert archive.read('test.json') == b'first'
+            assert archive.read('test.yml') == b'second'
+
+
+@pytest.mark.parametrize('file_name', ['../../test.png', '/tmp/test.png', 'directory/../test.png'])
+def test_create_job_file_outside_of_its_directory(io_service: IOService, file_name: str):
+    """
+    Given:
+    - a file name that points outside of the directory of the job
+
+    When:
+    - creating a job file and a temp file with the file name
+
+    Then:
+    - make sure both files are created inside their directory, under the name of the file only
+   """
+    temp_directory = tempfile.gettempdir()
+
+    with io_service.create_job_file(file_name) as job_file:
+        assert os.path.basename(job_file) == 'test.png'
+        assert os.path.dirname(os.path.dirname(job_file)) == os.path.realpath(temp_directory)
+
+    with io_service.create_temp_file(prefix=file_name, suffix='txt') as temp_file:
+        assert os.path.basename(temp_file).startswith('test.png')
+        assert os.path.dirname(temp_file) == temp_directory
+
+
+@pytest.mark.parametrize('file_name', ['', '..', 'directory/..', '/'])
+def test_create_job_file_with_invalid_name(io_service: IOService, file_name: str):
+    """
+    Given:
+    - a file name without a name of a file
+
+    When:
+    - creating a job file with the file name
+
+    Then:
+    - make sure ValueError is raised
+   """
+    with pytest.raises(ValueError):
+        with io_service.create_job_file(file_name):
+            pass
@@ -0,0 +1,71 @@
+import threading
+from typing import Generator
+
+import pytest
+
+from mr_file_converter.services.io.spool_file import SpoolFile
+
+
+def test_read_while_writing(tmp_path):
+    """
+    Given:
+     - a spool file whose writer writes a chunk only once the reader got the previous chunk.
+
+    When:
+     - reading the spool file while it is being written.
+
+    Then:
+     - make sure the reader gets every chunk as soon as it is written, before the writer is done.
+     - make sure the whole content is in the file once the writer is done.
+    """
+    chunk_read = threading.Event()
+
+    def chunks() -> Generator[bytes, None, None]:
+        for chunk in (b'a' * 10, b'b' * 10, b'c' * 10):
+            yield chunk
+            assert chunk_read.wait(timeout=5)
+            chunk_read.clear()
+
+    spool_file = SpoolFile(str(tmp_path / 'video.mp4'))
+    writer = threading.Thread(target=spool_file.write_chunks, args=(chunks(),))
+    writer.start()
+
+    read_chunks = []
+    for chunk in spool_file.read_chunks():
+        read_chunks.append(chunk)
+        chunk_read.set()
+    writer.join()
+
+    assert read_chunks == [b'a' * 10, b'b' * 10, b'c' * 10]
+    spool_file.wait()
+    with open(spool_file.path, 'rb') as file:
+        assert file.read() == b''.join(read_chunks)
+
+
+def test_writer_failure(tmp_path):
+    """
+    Given:
+     - a spool file whose chunks fail after the first one.
+
+    When:
+     - reading the spool file and waiting for it.
+
+    Then:
+     - make sure the reader gets the first chunk and then the error of the chunks.
+     - make sure waiting for the spool file raises the error of the chunks.
+    """
+    def chunks() -> Generator[bytes, None, None]:
+        yield b'a'
+        raise ConnectionError('download failed')
+
+    spool_file = SpoolFile(str(tmp_path / 'video.mp4'))
+    threading.Thread(target=spool_file.write_chunks, args=(chunks(),)).start()
+
+    read_chunks = []
+    with pytest.raises(ConnectionError):
+        for chunk in spool_file.read_chunks():
+            read_chunks.append(chunk)
+
+    assert read_chunks == [b'a']
+    with pytest.raises(ConnectionError):
+        spool_file.wait()
@@ -69,3 +69,103 @@ def test_json_to_text(json_service: JsonService, json_test_data_base_path: str):
         custom_file_name='test'
     ) as text_file:
         assert os.path.exists(text_file)
+
+
+@pytest.mark.parametrize('conversion', ['to_yml', 'to_xml'])
+@pytest.mark.parametrize('data', [[{'id': 1, 'name': 'a'}, [1.5, 2], 'b', None], {'a': {'b': [1, 2]}, 'c': 'd'}, []])
+def test_json_streaming_conversion(json_service: JsonService, tmp_path, conversion: str, data):
+    """
+    Given:
+     - json files whose top level is an array, an object and an empty array.
+     - a json service that streams every json file.
+
+    When:
+     - converting the json file with and without streaming.
+
+    Then:
+     - make sure the streamed conversion creates exactly the same file as the conversion that loads the whole json.
+    """
+    source_file_path = str(tmp_path / 'test.json')
+    json_service.json_converter.write(data, file_path=source_file_path)
+
+    with getattr(json_service, conversion)(source_file_path, custom_file_name='test') as converted_file:
+        with open(converted_file) as file:
+            expected = file.read()
+
+    json_service.streaming_threshold_bytes = 0
+    with getattr(json_service, conversion)(source_file_path, custom_file_name='test') as converted_file:
+        with open(converted_file) as file:
+            assert file.read() == expected
+
+
+def test_json_streaming_invalid_json(json_service: JsonService, tmp_path):
+    """
+    Given:
+     - a json file that is truncated in the middle of its top level array.
+     - a json service that streams every json file.
+
+    When:
+     - converting the json file into a yml file.
+
+    Then:
+     - make sure the conversion fails.
+    """
+    source_file_path = tmp_path / 'test.json'
+    source_file_path.write_text('[{"id": 1}, {"id": 2')
+    json_service.streaming_threshold_bytes = 0
+
+    with pytest.raises(ValueError):
+        with json_service.to_yml(str(source_file_path), custom_file_name='test'):
+            pass
+
+
+def test_document_is_parsed_once(mocker, json_service: JsonService, json_test_data_base_path: str):
+    """
+    Given:
+     - a parsed document of a json file.
+
+    When:
+     - converting the document into yml, xml and text files.
+
+    Then:
+     - make sure the json file is parsed only once.
+     - make sure every conversion creates the same file as converting the json file itself.
+    """
+    source_file_path = f'{json_test_data_base_path}/test.json'
+    read_spy = mocker.spy(json_service.json_converter, 'read')
+    document = json_service.parse(source_file_path)
+    conversions = ('to_yml', 'to_xml', 'to_text')
+
+    converted_documents = []
+    for conversion in conversions:
+        with getattr(json_service, conversion)(document, custom_file_name='test') as converted_file:
+            converted_documents.append(json_service.io_service.read_file(converted_file))
+    assert read_spy.call_count == 1
+
+    for conversion, converted_document in zip(conversions, converted_documents):
+        with getattr(json_service, conversion)(source_file_path, custom_file_name='test') as converted_file:
+            assert json_service.io_service.read_file(converted_file) == converted_document
+
+
+@pytest.mark.parametrize('converter_name', ['json_converter', 'yml_converter', 'xml_converter'])
+def test_dump_and_load_bytes(json_service: JsonService, tmp_path, converter_name: str):
+    """
+    Given:
+     - data with non ascii text.
+
+    When:
+     - dumping the data into bytes and loading it back with the json, yml and xml converters.
+
+    Then:
+     - make sure the data is loaded back as is.
+     - make sure the bytes are the same as the file the converter writes.
+    """
+    converter = getattr(json_service, converter_name)
+    data = {'name': 'héllo', 'items': {'item': ['1', '2']}}
+
+    dumped = converter.dump_bytes(data)
+    converter.write(data, file_path=str(tmp_path / 'test'))
+
+    loaded = converter.load_bytes(dumped)
+    assert (loaded.get('root', loaded) if converter_name == 'xml_converter' else loaded) == data
+    assert (tmp_path / 'test').read_bytes() == dumped
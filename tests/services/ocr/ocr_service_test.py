@@ -0,0 +1,151 @@
+import threading
+
+import pytest
+from PIL import Image, ImageDraw
+
+from mr_file_converter.services.ocr.ocr_service import OCRService
+
+
+@pytest.fixture()
+def text_lines_image() -> Image.Image:
+    """
+    A white image of 100x100 pixels with 5 black lines of 10 pixels height, separated by 10 blank rows.
+    """
+    image = Image.new('L', (100, 100), color=255)
+    draw = ImageDraw.Draw(image)
+    for top in range(5, 100, 20):
+        draw.rectangle((0, top, 99, top + 9), fill=0)
+    return image
+
+
+def test_get_binarization_threshold():
+    """
+    Given:
+     - histogram of an image with dark text around gray level 30 and a light background around gray level 220.
+
+    When:
+     - getting the binarization threshold.
+
+    Then:
+     - make sure the threshold separates the text from the background.
+    """
+    histogram = [0] * 256
+    histogram[25:35] = [10] * 10
+    histogram[215:225] = [100] * 10
+
+    assert 34 <= OCRService.get_binarization_threshold(histogram) < 215
+
+
+def test_preprocess():
+    """
+    Given:
+     - gray RGB image of 600 DPI.
+
+    When:
+     - preprocessing the image with a target DPI of 300.
+
+    Then:
+     - make sure the image is downscaled to half of its size.
+     - make sure the image is binarized.
+    """
+    image = Image.new('RGB', (200, 100), color=(128, 128, 128))
+    image.info['dpi'] = (600, 600)
+
+    preprocessed_image = OCRService(max_workers=0, target_dpi=300).preprocess(image)
+
+    assert preprocessed_image.size == (100, 50)
+    assert preprocessed_image.mode == '1'
+
+
+def test_split_into_tiles(text_lines_image: Image.Image):
+    """
+    Given:
+     - image of 100x100 pixels with 5 lines of text.
+     - max tile size of 3000 pixels (30 rows).
+
+    When:
+     - splitting the image into tiles.
+
+    Then:
+     - make sure the tiles cover the whole image and none of them is bigger than the max tile size.
+     - make sure every tile is cut at a blank row, so the lines of text are not cut.
+    """
+    tiles = OCRService(max_workers=0, max_tile_pixels=3000).split_into_tiles(text_lines_image)
+
+    assert sum(tile.height for tile in tiles) == 100
+    assert all(tile.width * tile.height <= 3000 for tile in tiles)
+    for tile in tiles:
+        assert tile.getpixel((0, 0)) == 255
+        assert tile.getpixel((0, tile.height - 1)) == 255
+
+
+def test_image_to_text_of_tiles(mocker, text_lines_image: Image.Image, tmp_path):
+    """
+    Given:
+     - image with 5 lines of text that is split into several tiles.
+
+    When:
+     - extracting the text of the image.
+
+    Then:
+     - make sure every tile is recognized.
+     - make sure the text of the tiles is joined in the order of the tiles.
+    """
+    image_file_path = str(tmp_path / 'test.png')
+    text_lines_image.save(image_file_path)
+    image_to_string_mock = mocker.patch(
+        'mr_file_converter.services.ocr.ocr_service.pytesseract.image_to_string',
+        side_effect=[f'tile {number}' for number in range(10)]
+    )
+
+    text = OCRService(max_workers=0, max_tile_pixels=3000).image_to_text(image_file_path)
+
+    assert image_to_string_mock.call_count > 1
+    assert text == '\n'.join(f'tile {number}' for number in range(image_to_string_mock.call_count))
+
+
+def test_preprocess_without_dpi():
+    """
+    Given:
+     - photo of a page of 1700x2200 pixels without DPI metadata.
+
+    When:
+     - preprocessing the image with a target DPI of 100.
+
+    Then:
+     - make sure the image is downscaled as a letter page, to 850 pixels on its short side.
+    """
+    image = Image.new('RGB', (1700, 2200), color=(128, 128, 128))
+
+    preprocessed_image = OCRService(max_workers=0, target_dpi=100).preprocess(image)
+
+    assert preprocessed_image.size == (850, 1100)
+
+
+def test_image_to_text_with_warm_engine(mocker, text_lines_image: Image.Image, tmp_path):
+    """
+    Given:
+     - tesserocr is installed.
+     - image with 5 lines of text that is split into several tiles.
+
+    When:
+     - extracting the text of the image.
+
+    Then:
+     - make sure a single tesseract engine is created and reused for all the tiles.
+     - make sure tesseract is not started as a process.
+    """
+    image_file_path = str(tmp_path / 'test.png')
+    text_lines_image.save(image_file_path)
+    tesserocr_mock = mocker.patch('mr_file_converter.services.ocr.ocr_service.tesserocr')
+    mocker.patch('mr_file_converter.services.ocr.ocr_service._engines', threading.local())
+    engine_mock = tesserocr_mock.PyTessBaseAPI.return_value
+    engine_mock.GetUTF8Text.side_effect = [f'tile {number}' for number in range(10)]
+    image_to_string_mock = mocker.patch('mr_file_converter.services.ocr.ocr_service.pytesseract.image_to_string')
+
+    text = OCRService(max_workers=0, max_tile_pixels=3000).image_to_text(image_file_path)
+
+    tesserocr_mock.PyTessBaseAPI.assert_called_once_with(lang='eng')
+    assert engine_mock.SetImage.call_count > 1
+    assert text == '\n'.join(f'tile {number}' for number in range(engine_mock.SetImage.call_count))
+    assert not image_to_string_mock.called
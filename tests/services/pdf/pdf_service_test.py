@@ -1,7 +1,11 @@
 import os
+from typing import List
 
+import docx
+import PyPDF2
 import pytest
 
+from mr_file_converter.services.pdf import pdf_service as pdf_service_module
 from mr_file_converter.services.pdf.pdf_service import PdfService
 
 
@@ -10,6 +14,10 @@ def pdf_test_data_base_path(base_file_path) -> str:
     return f'{base_file_path}/services/pdf/test_data'
 
 
+def get_docx_text(docx_file_path: str) -> List[str]:
+    return [paragraph.text for paragraph in docx.Document(docx_file_path).paragraphs]
+
+
 def test_pdf_to_docx(pdf_service: PdfService, pdf_test_data_base_path: str):
     """
     Given:
@@ -46,3 +54,93 @@ def test_pdf_to_text(pdf_service: PdfService, pdf_test_data_base_path: str):
         custom_file_name='test'
     ) as txt_file:
         assert os.path.exists(txt_file)
+
+
+def test_pdf_to_text_in_parallel(pdf_service: PdfService, multi_page_pdf_file_path: str):
+    """
+    Given:
+     - pdf file with 6 pages
+     - pdf service that extracts the text of every page in a chunk of its own with 2 worker processes.
+
+    When:
+     - converting the pdf file into a txt file.
+
+    Then:
+     - make sure the text of the pages is written in the order of the pages.
+    """
+    pdf_service.max_workers, pdf_service.pages_per_chunk = 2, 1
+    with pdf_service.to_txt(source_file_path=multi_page_pdf_file_path, custom_file_name='test') as txt_file:
+        assert pdf_service.io_service.read_file(txt_file) == '\n'.join(
+            page.extract_text() for page in PyPDF2.PdfReader(multi_page_pdf_file_path).pages
+        )
+
+
+def test_pdf_to_docx_in_parallel(pdf_service: PdfService, multi_page_pdf_file_path: str):
+    """
+    Given:
+     - pdf file with 6 pages
+     - pdf service with 3 worker processes that shards every page range.
+
+    When:
+     - converting the pdf file into a docx file in a single process and in shards of pages.
+
+    Then:
+     - make sure the merged shards create the same docx content as the conversion in a single process.
+    """
+    with pdf_service.to_docx(source_file_path=multi_page_pdf_file_path, custom_file_name='test') as docx_file:
+        expected_text = get_docx_text(docx_file)
+
+    pdf_service.max_workers, pdf_service.min_docx_pages_per_shard = 3, 1
+    with pdf_service.to_docx(source_file_path=multi_page_pdf_file_path, custom_file_name='test') as docx_file:
+        assert get_docx_text(docx_file) == expected_text
+
+
+def test_pdf_to_docx_page_range(pdf_service: PdfService, pdf_test_data_base_path: str, multi_page_pdf_file_path: str):
+    """
+    Given:
+     - pdf file with 6 pages, which are the 2 pages of the test pdf file 3 times.
+     - pdf service with 2 worker processes that shards every page range.
+
+    When:
+     - converting only pages 2-3 of the pdf file into a docx file.
+
+    Then:
+     - make sure the docx file has the same content as the test pdf file.
+    """
+    with pdf_service.to_docx(
+        source_file_path=f'{pdf_test_data_base_path}/test.pdf', custom_file_name='test'
+    ) as docx_file:
+        expected_text = get_docx_text(docx_file)
+
+    pdf_service.max_workers, pdf_service.min_docx_pages_per_shard = 2, 1
+    with pdf_service.to_docx(
+        source_file_path=multi_page_pdf_file_path, custom_file_name='test', page_range=(2, 4)
+    ) as docx_file:
+        assert get_docx_text(docx_file) == expected_text
+
+
+def test_pdf_conversions_share_the_pool(
+    mocker, pdf_service: PdfService, pdf_test_data_base_path: str, multi_page_pdf_file_path: str
+):
+    """
+    Given:
+     - pdf file with 6 pages.
+     - pdf service with 2 worker processes that shards every page range.
+
+    When:
+     - converting the pdf file into a docx file twice and into a text file.
+
+    Then:
+     - make sure a single pool of worker processes is started for all the conversions.
+    """
+    process_pool_spy = mocker.spy(pdf_service_module, 'ProcessPoolExecutor')
+    pdf_service.max_workers, pdf_service.min_docx_pages_per_shard, pdf_service.pages_per_chunk = 2, 1, 2
+
+    for _ in range(2):
+        with pdf_service.to_docx(source_file_path=multi_page_pdf_file_path, custom_file_name='test'):
+            pass
+    with pdf_service.to_txt(source_file_path=multi_page_pdf_file_path, custom_file_name='test'):
+        pass
+
+    assert process_pool_spy.call_count == 1
+    assert process_pool_spy.call_args.kwargs['max_workers'] == 2
@@ -0,0 +1,159 @@
+from queue import Queue
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+from telegram import Bot, Chat, Message, MessageEntity, Update, User
+from telegram.ext import (CommandHandler, ConversationHandler, Dispatcher,
+                          Filters, MessageHandler)
+from telegram.ext.utils.promise import Promise
+
+from mr_file_converter.services.persistence.sqlite_persistence import \
+    SQLitePersistence
+
+ask_name_stage, done_stage = range(2)
+
+
+@pytest.fixture()
+def database_path(tmp_path) -> str:
+    return str(tmp_path / 'persistence.db')
+
+
+@pytest.fixture()
+def bot() -> Bot:
+    bot = MagicMock(spec=Bot)
+    bot.id = 1
+    bot.defaults = None
+    bot.arbitrary_callback_data = False
+    return bot
+
+
+def text_update(bot: Bot, update_id: int, text: str) -> Update:
+    user = User(id=123, first_name='test', is_bot=False)
+    message = Message(
+        message_id=update_id,
+        date=None,  # type: ignore
+        chat=Chat(id=123, type='private'),
+        from_user=user,
+        text=text,
+        entities=[MessageEntity(type='bot_command', offset=0, length=len(text))] if text.startswith('/') else [],
+        bot=bot
+    )
+    return Update(update_id=update_id, message=message)
+
+
+def create_worker(bot: Bot, database_path: str, received_names: List[str]) -> Dispatcher:
+    """
+    Creates a dispatcher that acts like a single bot process with its own persistence instance.
+    """
+    def start(update, context):
+        context.user_data['requested_format'] = 'yml'
+        return ask_name_stage
+
+    def receive_name(update, context):
+        received_names.append(f"{update.message.text}.{context.user_data['requested_format']}")
+        return ConversationHandler.END
+
+    dispatcher = Dispatcher(bot, Queue(), persistence=SQLitePersistence(database_path=database_path))
+    dispatcher.add_handler(
+        ConversationHandler(
+            entry_points=[CommandHandler('file', start)],
+            states={ask_name_stage: [MessageHandler(Filters.text, receive_name)]},
+            fallbacks=[],
+            name='file',
+            persistent=True
+        )
+    )
+    return dispatcher
+
+
+def test_conversation_moves_between_workers(bot: Bot, database_path: str):
+    """
+    Given:
+     - two bot processes (dispatchers) that share the same SQLite database
+
+    When:
+     - starting a conversation in the first process
+     - continuing the conversation in the second process
+
+    Then:
+     - make sure the second process continues the conversation from the stage the first process stopped at
+     - make sure the user data that was saved by the first process is available in the second process
+     - make sure the conversation is removed from the database once it has ended
+    """
+    received_names: List[str] = []
+    first_worker = create_worker(bot, database_path, received_names)
+    second_worker = create_worker(bot, database_path, received_names)
+
+    first_worker.process_update(text_update(bot, 1, '/file'))
+    second_worker.process_update(text_update(bot, 2, 'converted'))
+
+    assert received_names == ['converted.yml']
+    assert not SQLitePersistence(database_path=database_path).get_conversation_keys('file')
+
+
+def test_conversation_survives_restart(bot: Bot, database_path: str):
+    """
+    Given:
+     - a conversation that was started before the bot restarted
+
+    When:
+     - continuing the conversation after the restart
+
+    Then:
+     - make sure the conversation continues from the stage it was in before the restart
+    """
+    received_names: List[str] = []
+    create_worker(bot, database_path, received_names).process_update(text_update(bot, 1, '/file'))
+
+    create_worker(bot, database_path, received_names).process_update(text_update(bot, 2, 'restarted'))
+
+    assert received_names == ['restarted.yml']
+
+
+def test_refresh_user_data(database_path: str):
+    """
+    Given:
+     - user data that was updated by another bot process
+
+    When:
+     - refreshing the user data
+
+    Then:
+     - make sure the user data is replaced by the updated user data
+    """
+    persistence = SQLitePersistence(database_path=database_path)
+    user_data = persistence.get_user_data()[123]
+    user_data['url'] = 'https://old.com'
+
+    SQLitePersistence(database_path=database_path).update_user_data(123, {'url': 'https://new.com'})
+    persistence.refresh_user_data(123, user_data)
+
+    assert user_data == {'url': 'https://new.com'}
+
+
+def test_pending_state_is_stored_once_done(database_path: str):
+    """
+    Given:
+     - a conversation stage that runs asynchronously
+
+    When:
+     - the stage is running
+     - the stage is done
+
+    Then:
+     - make sure the previous state is stored while the stage is running
+     - make sure the resulting state is stored once the stage is done
+    """
+    persistence = SQLitePersistence(database_path=database_path)
+    conversations = persistence.get_conversations('file')
+    persistence.update_conversation('file', (123, 123), ask_name_stage)
+
+    promise = Promise(lambda: done_stage, args=[], kwargs={})
+    conversations[(123, 123)] = (ask_name_stage, promise)
+    persistence.update_conversation('file', (123, 123), (conversations[(123, 123)], promise))
+    assert persistence.get_conversation_state('file', (123, 123)) == ask_name_stage
+
+    promise.run()
+    assert persistence.get_conversation_state('file', (123, 123)) == done_stage
+    assert conversations[(123, 123)] == done_stage
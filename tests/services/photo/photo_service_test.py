@@ -1,5 +1,6 @@
 import os
 
+import PyPDF2
 import pytest
 
 from mr_file_converter.services.photo.photo_service import PhotoService
@@ -56,3 +57,22 @@ def test_photo_to_text(photo_service: PhotoService, photo_test_data_base_path: s
         assert os.path.exists(text_file)
         with open(text_file, 'r') as file:
             assert file.read().strip() == 'Sample Text 1'
+
+
+def test_merge_photos_to_pdf(photo_service: PhotoService, photo_test_data_base_path: str):
+    """
+    Given:
+     - test photo files (png, jpg)
+     - custom file name.
+
+    When:
+     - merging the photo files into a pdf file.
+
+    Then:
+     - make sure the pdf file has a page for every photo.
+    """
+    with photo_service.merge_to_pdf(
+        source_file_paths=[f'{photo_test_data_base_path}/test.png', f'{photo_test_data_base_path}/test.jpg'],
+        custom_file_name='test'
+    ) as pdf_file:
+        assert len(PyPDF2.PdfReader(pdf_file).pages) == 2
@@ -0,0 +1,57 @@
+"""
+A fake chrome that answers the chrome DevTools protocol commands of the renderer over the pipes of
+--remote-debugging-pipe, every launch is logged into the file in FAKE_CHROME_LAUNCHES_FILE.
+"""
+import base64
+import json
+import os
+import sys
+
+RESULTS = {
+    'Target.createTarget': {'targetId': 'target'},
+    'Target.attachToTarget': {'sessionId': 'session'},
+    'Page.enable': {},
+    'Page.getLayoutMetrics': {'cssContentSize': {'width': 100, 'height': 200}},
+    'Page.captureScreenshot': {'data': base64.b64encode(b'screenshot').decode()},
+    'Page.printToPDF': {'data': base64.b64encode(b'%PDF').decode()}
+}
+
+
+def send(message: dict):
+    os.write(4, json.dumps(message).encode() + b'\0')
+
+
+def main():
+    if launches_file := os.getenv('FAKE_CHROME_LAUNCHES_FILE'):
+        with open(launches_file, 'a') as file:
+            file.write(f'{" ".join(sys.argv[1:])}\n')
+
+    buffer = b''
+    url = ''
+    while chunk := os.read(3, 1024):
+        buffer += chunk
+        while b'\0' in buffer:
+            raw_message, buffer = buffer.split(b'\0', 1)
+            message = json.loads(raw_message)
+            method = message['method']
+            if method == 'Browser.close':
+                return
+            if method == 'Page.navigate':
+                url = message['params']['url']
+                send({'id': message['id'], 'result': {'frameId': 'frame'}, 'sessionId': 'session'})
+                # a page that never finishes loading
+                if 'hang' not in url:
+                    send({'method': 'Page.loadEventFired', 'params': {}, 'sessionId': 'session'})
+            elif method == 'Page.getLayoutMetrics' and 'endless' in url:
+                # a page that is (almost) endlessly long
+                send({'id': message['id'], 'result': {'cssContentSize': {'width': 100, 'height': 10 ** 7}}})
+            elif method == 'Page.captureScreenshot' and 'endless' in url:
+                # the screenshot is the height that was captured
+                height = str(message['params']['clip']['height']).encode()
+                send({'id': message['id'], 'result': {'data': base64.b64encode(height).decode()}})
+            else:
+                send({'id': message['id'], 'result': RESULTS[method]})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+import os
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mr_file_converter.services.renderer.renderer_service import (
+    ChromeRenderer, RenderError, RendererService)
+
+
+@pytest.fixture()
+def launches_file(tmp_path, monkeypatch) -> str:
+    launches_file = str(tmp_path / 'launches.txt')
+    monkeypatch.setenv('FAKE_CHROME_LAUNCHES_FILE', launches_file)
+    return launches_file
+
+
+@pytest.fixture()
+def fake_chrome_path(tmp_path, launches_file: str) -> str:
+    fake_chrome_path = tmp_path / 'chrome'
+    fake_chrome_path.write_text(
+        f'#!/bin/sh\nexec {sys.executable} {os.path.dirname(__file__)}/fake_chrome.py "$@"\n'
+    )
+    fake_chrome_path.chmod(fake_chrome_path.stat().st_mode | stat.S_IEXEC)
+    return str(fake_chrome_path)
+
+
+@pytest.fixture()
+def renderer_service(fake_chrome_path: str):
+    renderer_service = RendererService(chrome_path=fake_chrome_path, pool_size=2, max_renders=3, render_timeout=5)
+    yield renderer_service
+    renderer_service.shutdown()
+
+
+def get_launches_count(launches_file: str) -> int:
+    with open(launches_file) as file:
+        return len(file.readlines())
+
+
+@pytest.mark.parametrize('output_format, expected_content', [('png', b'screenshot'), ('pdf', b'%PDF')])
+def test_render(renderer_service: RendererService, tmp_path, output_format: str, expected_content: bytes):
+    """
+    Given:
+     - a renderer service with a (fake) browser.
+
+    When:
+     - rendering a url into png and pdf files.
+
+    Then:
+     - make sure the rendered content that the browser returned is written to the file.
+    """
+    file_path = str(tmp_path / f'test.{output_format}')
+
+    renderer_service.render('https://example.com', file_path=file_path, output_format=output_format)
+
+    with open(file_path, 'rb') as file:
+        assert file.read() == expected_content
+
+
+def test_browser_is_reused_and_recycled(renderer_service: RendererService, launches_file: str, tmp_path):
+    """
+    Given:
+     - a renderer service that recycles a browser after 3 renders.
+
+    When:
+     - rendering 4 urls one after the other.
+
+    Then:
+     - make sure the first 3 renders reuse the same browser.
+     - make sure a new browser is started for the 4th render.
+    """
+    for _ in range(3):
+        renderer_service.render('https://example.com', file_path=str(tmp_path / 'test.png'), output_format='png')
+    assert get_launches_count(launches_file) == 1
+
+    renderer_service.render('https://example.com', file_path=str(tmp_path / 'test.png'), output_format='png')
+    assert get_launches_count(launches_file) == 2
+
+
+def test_pool_is_bounded(renderer_service: RendererService, launches_file: str, tmp_path):
+    """
+    Given:
+     - a renderer service with a pool of 2 browsers.
+
+    When:
+     - rendering 4 urls concurrently.
+
+    Then:
+     - make sure all the renders succeed.
+     - make sure no more than 2 browsers are started.
+    """
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(
+            lambda number: renderer_service.render(
+                'https://example.com', file_path=str(tmp_path / f'{number}.png'), output_format='png'
+            ),
+            range(4)
+        ))
+
+    assert all(os.path.exists(tmp_path / f'{number}.png') for number in range(4))
+    assert get_launches_count(launches_file) <= 2
+
+
+def test_render_timeout(renderer_service: RendererService, launches_file: str, tmp_path):
+    """
+    Given:
+     - a renderer service with a render timeout of 1 second.
+     - a page that never finishes loading.
+
+    When:
+     - rendering the page.
+     - rendering another page afterwards.
+
+    Then:
+     - make sure the render of the page that never loads fails with a timeout.
+     - make sure the browser that timed out is replaced by a new browser.
+    """
+    renderer_service.render_timeout = 1
+
+    with pytest.raises(TimeoutError):
+        renderer_service.render('https://hang.com', file_path=str(tmp_path / 'test.png'), output_format='png')
+
+    renderer_service.render('https://example.com', file_path=str(tmp_path / 'test.png'), output_format='png')
+    assert get_launches_count(launches_file) == 2
+
+
+def test_render_local_url(renderer_service: RendererService, launches_file: str, tmp_path):
+    """
+    Given:
+     - a url of a local file.
+
+    When:
+     - rendering the url.
+
+    Then:
+     - make sure RenderError is raised without starting a browser.
+    """
+    with pytest.raises(RenderError):
+        renderer_service.render('file:///proc/self/environ', file_path=str(tmp_path / 'test.pdf'), output_format='pdf')
+
+    assert not os.path.exists(launches_file)
+
+
+def test_screenshot_height_is_capped(renderer_service: RendererService, tmp_path):
+    """
+    Given:
+     - a page that is endlessly long.
+
+    When:
+     - rendering the page into a png.
+
+    Then:
+     - make sure only the top of the page, up to the max capture height, is captured.
+    """
+    file_path = str(tmp_path / 'test.png')
+
+    renderer_service.render('https://endless.com', file_path=file_path, output_format='png')
+
+    with open(file_path) as file:
+        assert int(file.read()) == ChromeRenderer.max_capture_height
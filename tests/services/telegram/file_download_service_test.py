@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+from mr_file_converter.services.io.io_service import IOService
+from mr_file_converter.services.telegram.errors import FileTooLarge
+from mr_file_converter.services.telegram.file_download_service import \
+    TelegramFileDownloadService
+
+FILE_CONTENT = b'{"a": 1}' * 1000
+
+
+class FileRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(FILE_CONTENT)))
+        self.end_headers()
+        self.wfile.write(FILE_CONTENT)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def file_server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FileRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def downloads_directory(tmp_path) -> str:
+    return str(tmp_path / 'downloads')
+
+
+@pytest.fixture()
+def file_download_service(
+    io_service: IOService, downloads_directory: str, file_server_url: str
+) -> TelegramFileDownloadService:
+    bot = MagicMock()
+    bot.get_file.side_effect = lambda file_id: MagicMock(
+        file_path=f'{file_server_url}/documents/{file_id}.json', file_size=None
+    )
+    return TelegramFileDownloadService(
+        io_service=io_service,
+        downloads_directory=downloads_directory,
+        max_file_size_bytes=len(FILE_CONTENT),
+        max_concurrent_downloads=2,
+        orphan_max_age_seconds=60,
+        bot=bot
+    )
+
+
+def test_download(file_download_service: TelegramFileDownloadService, downloads_directory: str):
+    """
+    Given:
+     - a file in telegram.
+
+    When:
+     - downloading the file and removing it afterwards.
+
+    Then:
+     - make sure the file is downloaded into a job directory of its own with the name telegram stores it under.
+     - make sure the job directory is removed along with the file.
+    """
+    file_path = file_download_service.download('file_1')
+
+    with open(file_path, 'rb') as file:
+        assert file.read() == FILE_CONTENT
+    assert os.path.basename(file_path) == 'file_1.json'
+    assert os.path.dirname(os.path.dirname(file_path)) == downloads_directory
+
+    file_download_service.remove(file_path)
+    assert not os.listdir(downloads_directory)
+
+
+def test_download_concurrently(file_download_service: TelegramFileDownloadService):
+    """
+    Given:
+     - several files with the same name in telegram.
+
+    When:
+     - downloading more files than there are pooled connections, concurrently.
+
+    Then:
+     - make sure every file is downloaded into a different path.
+    """
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        file_paths = list(executor.map(lambda _: file_download_service.download('file'), range(5)))
+
+    assert len(set(file_paths)) == 5
+    assert all(os.path.getsize(file_path) == len(FILE_CONTENT) for file_path in file_paths)
+
+
+def test_download_too_large_file(file_download_service: TelegramFileDownloadService, downloads_directory: str):
+    """
+    Given:
+     - Case 1: a file that telegram reports as larger than the size limit.
+     - Case 2: a file whose size telegram does not report, which is larger than the size limit.
+
+    When:
+     - downloading the file.
+
+    Then:
+     - Case 1: make sure FileTooLarge is raised before the file is requested.
+     - Case 2: make sure FileTooLarge is raised and the partially downloaded file is removed.
+    """
+    with pytest.raises(FileTooLarge):
+        file_download_service.download('file', file_size=len(FILE_CONTENT) + 1)
+    assert not file_download_service.bot.get_file.called
+
+    file_download_service.max_file_size_bytes = len(FILE_CONTENT) // 2
+    with pytest.raises(FileTooLarge):
+        file_download_service.download('file')
+    assert not os.listdir(downloads_directory)
+
+
+def test_remove_orphans(io_service: IOService, downloads_directory: str):
+    """
+    Given:
+     - a job directory that was left behind a long time ago.
+     - a job directory of a download that is still in use.
+
+    When:
+     - starting the download service.
+
+    Then:
+     - make sure only the job directory that was left behind is removed.
+    """
+    orphan_directory = io_service.make_job_directory(downloads_directory)
+    old_time = time.time() - 120
+    os.utime(orphan_directory, (old_time, old_time))
+    job_directory = io_service.make_job_directory(downloads_directory)
+
+    TelegramFileDownloadService(
+        io_service=io_service,
+        downloads_directory=downloads_directory,
+        max_file_size_bytes=1024,
+        max_concurrent_downloads=1,
+        orphan_max_age_seconds=60,
+        bot=MagicMock()
+    )
+
+    assert not os.path.exists(orphan_directory)
+    assert os.path.exists(job_directory)
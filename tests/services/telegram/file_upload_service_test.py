@@ -0,0 +1,104 @@
+import json
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Generator
+from unittest.mock import MagicMock
+
+import pytest
+from telegram.error import BadRequest
+
+from mr_file_converter.services.telegram.file_upload_service import \
+    TelegramFileUploadService
+
+
+class UploadRequestHandler(BaseHTTPRequestHandler):
+
+    uploads: Dict[str, dict] = {}
+
+    def read_chunked_body(self) -> bytes:
+        body = b''
+        while chunk_size := int(self.rfile.readline().strip(), 16):
+            body += self.rfile.read(chunk_size)
+            self.rfile.readline()
+        self.rfile.readline()
+        return body
+
+    def do_POST(self):
+        assert self.headers['Transfer-Encoding'] == 'chunked'
+        form = BytesParser(policy=HTTP).parsebytes(
+            f'Content-Type: {self.headers["Content-Type"]}\r\n\r\n'.encode() + self.read_chunked_body()
+        )
+        fields = {part.get_param('name', header='content-disposition'): part for part in form.iter_parts()}
+        method = self.path.rsplit('/', 1)[-1]
+        self.uploads[method] = {
+            'file_name': fields['video'].get_filename(),
+            'content': fields['video'].get_content(),
+            'params': {name: part.get_content() for name, part in fields.items() if name != 'video'}
+        }
+
+        if fields['chat_id'].get_content() == '0':
+            self.send_response(400)
+            response = {'ok': False, 'description': 'Bad Request: chat not found'}
+        else:
+            self.send_response(200)
+            response = {'ok': True, 'result': {'message_id': 1, 'date': 0, 'chat': {'id': 1, 'type': 'private'}}}
+        self.end_headers()
+        self.wfile.write(json.dumps(response).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def file_upload_service():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), UploadRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield TelegramFileUploadService(
+        max_concurrent_uploads=1, bot=MagicMock(base_url=f'http://127.0.0.1:{server.server_address[1]}/botTOKEN')
+    )
+    server.shutdown()
+    server.server_close()
+
+
+def test_upload(file_upload_service: TelegramFileUploadService):
+    """
+    Given:
+     - a video that is produced in chunks.
+
+    When:
+     - uploading the video with sendVideo.
+
+    Then:
+     - make sure the chunks are sent as the content of the file, along with its name and the params of the method.
+     - make sure the message telegram sent back is returned.
+    """
+    def chunks() -> Generator[bytes, None, None]:
+        for i in range(5):
+            yield bytes([i]) * 1024
+
+    message = file_upload_service.upload(
+        'sendVideo', 'video', 'my video.mp4', chunks(), chat_id=1, supports_streaming=True, reply_to_message_id=None
+    )
+
+    upload = UploadRequestHandler.uploads['sendVideo']
+    assert upload['file_name'] == 'my video.mp4'
+    assert upload['content'] == b''.join(chunks())
+    assert upload['params'] == {'chat_id': '1', 'supports_streaming': 'true'}
+    assert message.message_id == 1
+
+
+def test_upload_rejected(file_upload_service: TelegramFileUploadService):
+    """
+    Given:
+     - a chat that telegram does not know.
+
+    When:
+     - uploading a video to the chat.
+
+    Then:
+     - make sure BadRequest is raised with the description of telegram.
+    """
+    with pytest.raises(BadRequest, match='Chat not found'):
+        file_upload_service.upload('sendVideo', 'video', 'video.mp4', [b'video'], chat_id=0)
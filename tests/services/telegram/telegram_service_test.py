@@ -4,8 +4,11 @@ from unittest.mock import MagicMock
 import pytest
 from pytest_mock import MockerFixture
 from telegram import CallbackQuery, Document, Message, PhotoSize, Update
-from telegram.ext import CallbackContext
+from telegram.error import BadRequest
+from telegram.ext import CallbackContext, Updater
 
+from mr_file_converter.services.telegram.file_id_service import \
+    TelegramFileIdService
 from mr_file_converter.services.telegram.telegram_service import \
     TelegramService
 
@@ -24,6 +27,23 @@ def telegram_photo() -> List[PhotoSize]:
     return [photo]
 
 
+@pytest.fixture()
+def file_id_telegram_service(tmp_path, updater: Updater) -> TelegramService:
+    return TelegramService(
+        updater=updater,
+        file_id_service=TelegramFileIdService(
+            database_path=str(tmp_path / 'file_ids.db')
+        )
+    )
+
+
+@pytest.fixture()
+def converted_file(tmp_path) -> str:
+    converted_file_path = tmp_path / 'converted.yml'
+    converted_file_path.write_text('a: 1')
+    return str(converted_file_path)
+
+
 @pytest.fixture()
 def telegram_message() -> Message:
     return cast(Message, MagicMock())
@@ -174,3 +194,314 @@ def test_get_callback_query(
     assert telegram_service.get_message(
         telegram_update
     ).message_id == 'callback_query_message_id'
+
+
+def test_send_same_file_twice_uploads_once(
+    mocker: MockerFixture,
+    file_id_telegram_service: TelegramService,
+    telegram_update: Update,
+    converted_file: str
+):
+    """
+    Given:
+    - a converted file that is sent twice with the same file name
+
+    When:
+    - sending the file
+
+    Then:
+    - make sure the file is uploaded only the first time
+    - make sure the second time the file is sent by the file_id that telegram returned for the upload
+    """
+    send_document_mocker = mocker.patch.object(
+        file_id_telegram_service.bot, 'send_document'
+    )
+    send_document_mocker.return_value.effective_attachment.file_id = 'uploaded_file_id'
+
+    for _ in range(2):
+        file_id_telegram_service.send_file(
+            telegram_update, document_path=converted_file, file_name='test.yml'
+        )
+
+    first_call, second_call = send_document_mocker.call_args_list
+    assert first_call.kwargs['document'].name == converted_file
+    assert second_call.kwargs['document'] == 'uploaded_file_id'
+
+
+def test_send_same_file_with_different_name_uploads_again(
+    mocker: MockerFixture,
+    file_id_telegram_service: TelegramService,
+    telegram_update: Update,
+    converted_file: str
+):
+    """
+    Given:
+    - a converted file that is sent twice with different file names
+
+    When:
+    - sending the file
+
+    Then:
+    - make sure the file is uploaded both times, as a file sent by file_id keeps its original name
+    """
+    send_document_mocker = mocker.patch.object(
+        file_id_telegram_service.bot, 'send_document'
+    )
+    send_document_mocker.return_value.effective_attachment.file_id = 'uploaded_file_id'
+
+    for file_name in ('first.yml', 'second.yml'):
+        file_id_telegram_service.send_file(
+            telegram_update, document_path=converted_file, file_name=file_name
+        )
+
+    assert all(
+        call.kwargs['document'] != 'uploaded_file_id' for call in send_document_mocker.call_args_list
+    )
+
+
+def test_send_file_with_stale_file_id(
+    mocker: MockerFixture,
+    file_id_telegram_service: TelegramService,
+    telegram_update: Update,
+    converted_file: str
+):
+    """
+    Given:
+    - a file_id of a previous upload that telegram does not accept anymore
+
+    When:
+    - sending the file
+
+    Then:
+    - make sure the file is uploaded again and the new file_id is stored
+    """
+    file_id_service = file_id_telegram_service.file_id_service
+    assert file_id_service is not None
+    key = file_id_service.get_key(converted_file, 'document', 'test.yml')
+    file_id_service.set(key, 'stale_file_id')
+
+    message = MagicMock()
+    message.effective_attachment.file_id = 'new_file_id'
+    send_document_mocker = mocker.patch.object(
+        file_id_telegram_service.bot,
+        'send_document',
+        side_effect=[BadRequest('wrong file identifier'), message]
+    )
+
+    file_id_telegram_service.send_file(
+        telegram_update, document_path=converted_file, file_name='test.yml'
+    )
+
+    assert send_document_mocker.call_count == 2
+    assert file_id_service.get(key) == 'new_file_id'
+
+
+def test_send_files_as_album(
+    mocker: MockerFixture,
+    telegram_service: TelegramService,
+    telegram_update: Update,
+    converted_file: str
+):
+    """
+    Given:
+    - two converted files
+
+    When:
+    - sending the files together
+
+    Then:
+    - make sure the files are sent as a single album of documents with their file names
+    """
+    send_media_group_mocker = mocker.patch.object(telegram_service.bot, 'send_media_group')
+
+    telegram_service.send_files(telegram_update, files={'test.yml': converted_file, 'test.json': converted_file})
+
+    media = send_media_group_mocker.call_args.kwargs['media']
+    assert [document.media.filename for document in media] == ['test.yml', 'test.json']
+
+
+def test_send_same_files_twice_uploads_once(
+    mocker: MockerFixture,
+    file_id_telegram_service: TelegramService,
+    telegram_update: Update,
+    converted_file: str,
+    tmp_path
+):
+    """
+    Given:
+    - two converted files that are sent together twice, and one of them was already sent by itself
+
+    When:
+    - sending the files together
+
+    Then:
+    - make sure the file that was already sent is sent by its file_id
+    - make sure the other file is uploaded only the first time, and sent by its file_id the second time
+    """
+    other_file = tmp_path / 'converted.json'
+    other_file.write_text('{"a": 1}')
+    file_id_service = file_id_telegram_service.file_id_service
+    assert file_id_service is not None
+    file_id_service.set(file_id_service.get_key(converted_file, 'document', 'test.yml'), 'sent_file_id')
+
+    uploaded_message, sent_message = MagicMock(), MagicMock()
+    uploaded_message.effective_attachment.file_id = 'uploaded_file_id'
+    send_media_group_mocker = mocker.patch.object(
+        file_id_telegram_service.bot, 'send_media_group', return_value=[sent_message, uploaded_message]
+    )
+
+    for _ in range(2):
+        file_id_telegram_service.send_files(
+            telegram_update, files={'test.yml': converted_file, 'test.json': str(other_file)}
+        )
+
+    first_call, second_call = send_media_group_mocker.call_args_list
+    assert first_call.kwargs['media'][0].media == 'sent_file_id'
+    assert first_call.kwargs['media'][1].media.filename == 'test.json'
+    assert [document.media for document in second_call.kwargs['media']] == ['sent_file_id', 'uploaded_file_id']
+
+
+def test_send_files_with_stale_file_id(
+    mocker: MockerFixture,
+    file_id_telegram_service: TelegramService,
+    telegram_update: Update,
+    converted_file: str
+):
+    """
+    Given:
+    - a file_id of a previous upload of one of the files that telegram does not accept anymore
+
+    When:
+    - sending the files together
+
+    Then:
+    - make sure the files are uploaded again and the new file_id is stored
+    """
+    file_id_service = file_id_telegram_service.file_id_service
+    assert file_id_service is not None
+    key = file_id_service.get_key(converted_file, 'document', 'test.yml')
+    file_id_service.set(key, 'stale_file_id')
+
+    message, other_message = MagicMock(), MagicMock()
+    message.effective_attachment.file_id = 'new_file_id'
+    other_message.effective_attachment.file_id = 'other_file_id'
+    send_media_group_mocker = mocker.patch.object(
+        file_id_telegram_service.bot,
+        'send_media_group',
+        side_effect=[BadRequest('wrong file identifier'), [message, other_message]]
+    )
+
+    file_id_telegram_service.send_files(
+        telegram_update, files={'test.yml': converted_file, 'test.json': converted_file}
+    )
+
+    assert send_media_group_mocker.call_count == 2
+    assert all(not isinstance(document.media, str) for document in send_media_group_mocker.call_args.kwargs['media'])
+    assert file_id_service.get(key) == 'new_file_id'
+
+
+def test_get_file_with_download_service(
+    updater: Updater,
+    telegram_message_with_document: Message,
+    telegram_update: Update
+):
+    """
+    Given:
+    - a document from a message
+    - a telegram service with a download service
+
+    When:
+    - trying to download the document file
+
+    Then:
+    - make sure the file is downloaded by the download service along with the size telegram reported
+    - make sure the downloaded file is removed by the download service
+    """
+    download_service = MagicMock()
+    telegram_service = TelegramService(updater=updater, download_service=download_service)
+    telegram_message_with_document.document.file_size = 100
+    telegram_update.effective_message = telegram_message_with_document
+
+    file_path = telegram_service.get_file(telegram_update)
+    telegram_service.remove_downloaded_file(file_path)
+
+    assert download_service.download.call_args.args == ('document_123',)
+    assert download_service.download.call_args.kwargs == {'file_size': 100}
+    download_service.remove.assert_called_once_with(file_path)
+
+
+@pytest.fixture()
+def photo_sizes() -> List[PhotoSize]:
+    return [
+        PhotoSize(file_id='small', file_unique_id='small', width=90, height=60, file_size=1000),
+        PhotoSize(file_id='medium', file_unique_id='medium', width=320, height=213, file_size=10000),
+        PhotoSize(file_id='large', file_unique_id='large', width=1280, height=853, file_size=100000)
+    ]
+
+
+@pytest.mark.parametrize(
+    'target_format, max_file_size, expected_file_id',
+    [
+        (None, None, 'large'),
+        ('pdf', None, 'large'),
+        ('preview', None, 'medium'),
+        ('big_preview', None, 'large'),
+        ('pdf', 50000, 'medium')
+    ]
+)
+def test_select_photo_size(
+    mocker: MockerFixture,
+    photo_sizes: List[PhotoSize],
+    target_format: str | None,
+    max_file_size: int | None,
+    expected_file_id: str
+):
+    """
+    Given:
+     - Case 1: a photo whose target format is not known yet
+     - Case 2: a photo that is converted into a pdf
+     - Case 3: a photo for a preview, that needs a shorter side of at least 200 pixels
+     - Case 4: a photo for a preview, that needs a shorter side of at least 2000 pixels
+     - Case 5: a photo that is converted into a pdf, whose largest size is over the size limit
+
+    When:
+     - selecting the size of the photo to download
+
+    Then:
+     - Case 1: make sure the largest size is selected
+     - Case 2: make sure the largest size is selected
+     - Case 3: make sure the smallest size that is large enough is selected
+     - Case 4: make sure the largest size is selected, as no size is large enough
+     - Case 5: make sure the largest size within the size limit is selected
+    """
+    mocker.patch.object(TelegramService, 'photo_min_sides', {'preview': 200, 'big_preview': 2000})
+
+    assert TelegramService.select_photo_size(
+        photo_sizes, target_format=target_format, max_file_size=max_file_size
+    ).file_id == expected_file_id
+
+
+def test_get_photo_file_in_largest_size(
+    mocker: MockerFixture,
+    telegram_service: TelegramService,
+    telegram_message: Message,
+    telegram_update: Update,
+    photo_sizes: List[PhotoSize]
+):
+    """
+    Given:
+    - a photo from a message, in several sizes
+
+    When:
+    - trying to download the photo file
+
+    Then:
+    - make sure the largest size of the photo is downloaded rather than its thumbnail
+    """
+    get_file_mocker = mocker.patch.object(telegram_service.bot, 'get_file')
+    telegram_message.document = None
+    telegram_message.photo = photo_sizes
+    telegram_update.effective_message = telegram_message
+
+    telegram_service.get_file(telegram_update)
+    assert get_file_mocker.call_args.kwargs == {'file_id': 'large'}
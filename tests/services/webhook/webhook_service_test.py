@@ -0,0 +1,224 @@
+import asyncio
+import json
+from typing import List, Tuple
+from unittest.mock import MagicMock
+
+import pytest
+from telegram import Update
+from telegram.ext import Updater
+
+from mr_file_converter.services.webhook.webhook_service import WebhookService
+
+
+def synthetic_update(update_id: int) -> dict:
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': 1,
+            'date': 1669000000,
+            'chat': {'id': 123, 'type': 'private'},
+            'from': {'id': 123, 'is_bot': False, 'first_name': 'test'},
+            'text': '/file'
+        }
+    }
+
+
+async def post(port: int, path: str, body: bytes) -> int:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+def run_webhook(webhook_service: WebhookService, bodies: List[Tuple[str, bytes]]) -> List[int]:
+    async def scenario():
+        server = await webhook_service.start_server()
+        port = server.sockets[0].getsockname()[1]
+        statuses = [await post(port, path, body) for path, body in bodies]
+        await webhook_service.queue.join()  # type: ignore
+        await webhook_service.stop_workers()
+        server.close()
+        await server.wait_closed()
+        return statuses
+
+    return asyncio.run(scenario())
+
+
+@pytest.fixture()
+def webhook_service(updater: Updater) -> WebhookService:
+    return WebhookService(
+        updater=updater,
+        webhook_url='https://example.com/telegram',
+        listen='127.0.0.1',
+        port=0,
+        url_path='telegram',
+        workers=2,
+        max_queue_size=10
+    )
+
+
+def test_post_update(webhook_service: WebhookService):
+    """
+    Given:
+     - synthetic telegram updates in JSON
+
+    When:
+     - posting the updates to the webhook endpoint
+
+    Then:
+     - make sure every post is answered with 200
+     - make sure every update is processed by the dispatcher
+    """
+    statuses = run_webhook(
+        webhook_service,
+        [('/telegram', json.dumps(synthetic_update(update_id)).encode()) for update_id in range(3)]
+    )
+
+    assert statuses == [200, 200, 200]
+    process_update_mock: MagicMock = webhook_service.updater.dispatcher.process_update  # type: ignore
+    processed_updates = [call.args[0] for call in process_update_mock.call_args_list]
+    assert all(isinstance(update, Update) for update in processed_updates)
+    assert sorted(update.update_id for update in processed_updates) == [0, 1, 2]
+    assert processed_updates[0].message.text == '/file'
+
+
+def test_post_invalid_requests(webhook_service: WebhookService):
+    """
+    Given:
+     - a post to an unknown path
+     - a post with a body that is not JSON
+     - posts with JSON bodies that are not telegram updates
+
+    When:
+     - posting the requests to the webhook server
+
+    Then:
+     - make sure the requests are answered with 404 and 400
+     - make sure nothing is processed by the dispatcher
+    """
+    statuses = run_webhook(
+        webhook_service,
+        [
+            ('/other', json.dumps(synthetic_update(1)).encode()),
+            ('/telegram', b'not json'),
+            ('/telegram', b'[1, 2]'),
+            ('/telegram', b'{"update_id": 1, "message": 5}')
+        ]
+    )
+
+    assert statuses == [404, 400, 400, 400]
+    assert not webhook_service.updater.dispatcher.process_update.called  # type: ignore
+
+
+def test_backpressure_when_queue_is_full(webhook_service: WebhookService):
+    """
+    Given:
+     - a webhook with an update queue of 2 updates and no workers taking updates from the queue
+
+    When:
+     - posting 3 updates
+
+    Then:
+     - make sure the first 2 updates are accepted
+     - make sure the third update is rejected with 503 so telegram would deliver it again later
+    """
+    webhook_service.workers = 0
+    webhook_service.max_queue_size = 2
+
+    async def scenario():
+        server = await webhook_service.start_server()
+        port = server.sockets[0].getsockname()[1]
+        statuses = [
+            await post(port, '/telegram', json.dumps(synthetic_update(update_id)).encode())
+            for update_id in range(3)
+        ]
+        server.close()
+        await server.wait_closed()
+        return statuses
+
+    assert asyncio.run(scenario()) == [200, 200, 503]
+
+
+def test_post_with_wrong_secret_token(webhook_service: WebhookService):
+    """
+    Given:
+     - a webhook that is configured with a secret token
+
+    When:
+     - posting an update without the secret token header
+
+    Then:
+     - make sure the request is rejected with 403
+    """
+    webhook_service.secret_token = 'secret'
+
+    statuses = run_webhook(
+        webhook_service, [('/telegram', json.dumps(synthetic_update(1)).encode())]
+    )
+
+    assert statuses == [403]
+
+
+def test_slow_request_timeout(webhook_service: WebhookService):
+    """
+    Given:
+     - a client that sends the headers of a request but never sends its body
+
+    When:
+     - posting the request to the webhook server
+
+    Then:
+     - make sure the request is answered with 408 once the request timeout is over
+    """
+    webhook_service.request_timeout_seconds = 0.2
+
+    async def scenario():
+        server = await webhook_service.start_server()
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'POST /telegram HTTP/1.1\r\nContent-Length: 100\r\n\r\n')
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        writer.close()
+        await webhook_service.stop_workers()
+        server.close()
+        await server.wait_closed()
+        return int(status_line.split()[1])
+
+    assert asyncio.run(scenario()) == 408
+
+
+def test_run_with_invalid_config(webhook_service: WebhookService):
+    """
+    Given:
+     - Case 1: a webhook without a webhook url.
+     - Case 2: a webhook with more max connections than telegram accepts.
+
+    When:
+     - Case 1: running the webhook.
+     - Case 2: creating the webhook.
+
+    Then:
+     - Case 1: make sure ValueError is raised before the webhook is registered in telegram.
+     - Case 2: make sure the webhook asks telegram for the max connections that telegram accepts.
+    """
+    webhook_service.webhook_url = None
+    with pytest.raises(ValueError, match='WEBHOOK_URL'):
+        webhook_service.run()
+    assert not webhook_service.updater.bot.set_webhook.called  # type: ignore
+
+    assert WebhookService(
+        updater=webhook_service.updater,
+        webhook_url='https://example.com/telegram',
+        listen='127.0.0.1',
+        port=0,
+        url_path='telegram',
+        workers=1,
+        max_queue_size=500,
+        max_connections=500
+    ).max_connections == 100
@@ -50,3 +50,60 @@ def test_xml_to_yml(xml_service: XMLService, xml_test_data_base_path: str):
     ) as yml_file:
         assert os.path.exists(yml_file)
         assert xml_service.yml_converter.read(yml_file)
+
+
+@pytest.mark.parametrize('conversion', ['to_json', 'to_yml'])
+@pytest.mark.parametrize('xml', [
+    'test.xml',
+    '<root><item id="1">a</item><item><name>b</name></item><item/></root>'
+])
+def test_xml_streaming_conversion(xml_service: XMLService, xml_test_data_base_path: str, tmp_path, conversion: str, xml):
+    """
+    Given:
+     - XML feeds of repeated records, with and without the root element that is removed from the converted file.
+     - XML service that streams every XML file.
+
+    When:
+     - converting the XML file with and without streaming.
+
+    Then:
+     - make sure the streamed conversion creates exactly the same file as the conversion that loads the whole XML.
+    """
+    if xml.endswith('.xml'):
+        source_file_path = f'{xml_test_data_base_path}/{xml}'
+    else:
+        source_file_path = str(tmp_path / 'test.xml')
+        xml_service.io_service.write_data_to_file(xml, file_path=source_file_path)
+
+    with getattr(xml_service, conversion)(source_file_path, custom_file_name='test') as converted_file:
+        with open(converted_file) as file:
+            expected = file.read()
+
+    xml_service.streaming_threshold_bytes = 0
+    with getattr(xml_service, conversion)(source_file_path, custom_file_name='test') as converted_file:
+        with open(converted_file) as file:
+            assert file.read() == expected
+
+
+@pytest.mark.parametrize('xml', [
+    '<root><item>a</item><other>b</other></root>',
+    '<root id="1"><item>a</item><item>b</item></root>',
+    '<root>text<item>a</item><item>b</item></root>',
+    '<root><item>a</item></root>',
+    '<root xmlns:a="https://a.com"><a:item>a</a:item><a:item>b</a:item></root>'
+])
+def test_get_record_tags_of_xml_that_is_not_a_feed(xml_service: XMLService, tmp_path, xml: str):
+    """
+    Given:
+     - XML files that cannot be streamed as a feed of repeated records.
+
+    When:
+     - getting the tags of the records.
+
+    Then:
+     - make sure the XML files are not considered as feeds of records.
+    """
+    source_file_path = str(tmp_path / 'test.xml')
+    xml_service.io_service.write_data_to_file(xml, file_path=source_file_path)
+
+    assert xml_service.xml_converter.get_record_tags(source_file_path) is None